@@ -0,0 +1,131 @@
+"""
+Shared harness for the benchmark scripts: timing, machine-readable results
+and comparison against a stored baseline.
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+
+# Repository root, so the scripts run from a checkout.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def measure(function, setup=None, repeat=3):
+    """
+    Returns the best time in seconds of repeat calls of function. setup, if
+    given, is called untimed before each call and its result passed on.
+    """
+    best = None
+    for _ in range(repeat):
+        arguments = setup() if setup is not None else ()
+        start = timeit.default_timer()
+        function(*arguments)
+        elapsed = timeit.default_timer() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class Results(object):
+    """
+    Benchmark timings keyed by case and size.
+    """
+
+    def __init__(self, benchmark, **metadata):
+        self.benchmark = benchmark
+        self.metadata  = dict(metadata, python=platform.python_version(),
+                              platform=platform.platform())
+        self.entries   = []
+
+    def add(self, case, size, seconds, **extra):
+        entry = dict(extra, case=case, size=size, seconds=seconds)
+        self.entries.append(entry)
+        print("%-28s %8d %12.6fs" % (case, size, seconds))
+        sys.stdout.flush()
+
+    def toJSON(self):
+        return {"benchmark": self.benchmark, "metadata": self.metadata,
+                "results": self.entries}
+
+    def write(self, path):
+        with open(path, "w") as stream:
+            json.dump(self.toJSON(), stream, indent=1, sort_keys=True)
+
+    def compare(self, path, tolerance):
+        """
+        Prints the ratio of each timing to the baseline's and returns the
+        entries slower than tolerance times their baseline.
+        """
+        with open(path) as stream:
+            baseline = json.load(stream)
+        previous = dict(((entry["case"], entry["size"]), entry["seconds"])
+                        for entry in baseline["results"])
+        regressions = []
+        print("\n%-28s %8s %12s %12s %8s" % ("case", "size", "baseline",
+                                             "current", "ratio"))
+        for entry in self.entries:
+            key = (entry["case"], entry["size"])
+            if key not in previous:
+                continue
+            ratio = entry["seconds"] / previous[key] if previous[key] else 1.0
+            flag  = ""
+            if ratio > tolerance:
+                regressions.append(entry)
+                flag = "  REGRESSION"
+            print("%-28s %8d %11.6fs %11.6fs %7.2fx%s" % (
+                entry["case"], entry["size"], previous[key],
+                entry["seconds"], ratio, flag))
+        return regressions
+
+
+def argumentParser(description, sizes):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--sizes", default=",".join(str(size)
+                                                    for size in sizes),
+                        help="comma separated graph sizes "
+                             "(default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="timed runs per case; the best is kept "
+                             "(default: %(default)s)")
+    parser.add_argument("--output", metavar="PATH",
+                        help="writes the results as JSON")
+    parser.add_argument("--baseline", metavar="PATH",
+                        help="compares with results written earlier")
+    parser.add_argument("--tolerance", type=float, default=1.5,
+                        help="the slowdown over the baseline reported as a "
+                             "regression (default: %(default)s)")
+    return parser
+
+def parseSizes(text):
+    return [int(size) for size in text.split(",") if size]
+
+def finish(results, options):
+    """
+    Writes and compares the results as requested and returns an exit code.
+    """
+    if options.output:
+        results.write(options.output)
+    if options.baseline:
+        regressions = results.compare(options.baseline, options.tolerance)
+        if regressions:
+            print("\n%d regressions over %.2fx." % (len(regressions),
+                                                     options.tolerance))
+            return 1
+    return 0
+
+def offscreenApplication():
+    """
+    Returns a QApplication that needs no display. Qt builds with platform
+    plugins honour QT_QPA_PLATFORM; the others need a virtual display such
+    as Xvfb.
+    """
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt4.QtGui import QApplication
+    application = QApplication.instance()
+    if application is None:
+        application = QApplication([sys.argv[0], "-platform", "offscreen"])
+    return application
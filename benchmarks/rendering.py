@@ -0,0 +1,155 @@
+"""
+Times drawing the node view at scale::
+
+    python benchmarks/rendering.py --output rendering.json
+
+Each size populates a NodeViewScene with Mix nodes at random positions and
+about as many random connections, as ``examples/nodes.py`` does, then times:
+
+* ``populate-nodes`` and ``populate-connections``, adding them to the scene;
+* ``repaint-scene``, drawing the whole scene into an offscreen QImage;
+* ``repaint-view``, drawing the view at its zoom level;
+* ``pan`` and ``zoom``, scrolling or scaling the view and redrawing it, per
+  frame;
+* ``drag``, moving a selected group of nodes and redrawing the view, per
+  frame, which includes updating the paths of their connections.
+
+``--without-shadows`` disables the nodes' drop shadows, so that two
+runs give the cost of the shadows. Results are written and compared as with
+``benchmarks/topology.py``.
+"""
+from __future__ import print_function
+
+import math
+import random
+import sys
+
+import common
+
+SIZES  = [1000, 5000, 20000]
+FRAMES = 20
+IMAGE  = (1920, 1080)
+
+
+def populate(view, size, generator, results, shadows):
+    from giza.widgets.nodeview.node import NodeConnection
+    from giza.nodetypes.convert import MixNode
+
+    scene = view.scene()
+    extent = 120 * math.sqrt(size)
+    nodes = []
+    def addNodes():
+        for _ in range(size):
+            node = MixNode(scene.graph)
+            node.setPos(generator.random() * extent - extent / 2,
+                        generator.random() * extent - extent / 2)
+            if not shadows:
+                node.shadowEnabled = False
+            scene.addItem(node)
+            nodes.append(node)
+    results.add("populate-nodes", size, common.measure(addNodes, repeat=1))
+
+    # Edges run from lower to higher indices so that none closes a cycle.
+    def addConnections():
+        for index in range(1, size):
+            source = nodes[generator.randrange(index)]
+            port   = nodes[index].inputPorts[generator.randrange(2)]
+            scene.addItem(NodeConnection(source.outputPorts[0], port))
+    results.add("populate-connections", size,
+                common.measure(addConnections, repeat=1))
+    return nodes
+
+def paint(target, draw):
+    from PyQt4.QtGui import QPainter
+    painter = QPainter(target)
+    try:
+        draw(painter)
+    finally:
+        painter.end()
+
+def perFrame(function, repeat):
+    return common.measure(function, repeat=repeat) / FRAMES
+
+
+def run(sizes, repeat, results, shadows):
+    application = common.offscreenApplication()
+    from PyQt4.QtGui import QImage, QColor, QGraphicsItem
+    from PyQt4.QtCore import QRectF
+    from giza.graph import Graph
+    from giza.widgets import NodeView, NodeViewScene
+
+    for size in sizes:
+        generator = random.Random(size)
+        view = NodeView()
+        view.scene().shutdown()
+        view.setScene(NodeViewScene(Graph()))
+        view.resize(*IMAGE)
+        view.show()
+        application.processEvents()
+        scene = view.scene()
+
+        nodes = populate(view, size, generator, results, shadows)
+        application.processEvents()
+
+        image = QImage(IMAGE[0], IMAGE[1], QImage.Format_ARGB32_Premultiplied)
+        image.fill(QColor(255, 255, 255).rgb())
+        target = QRectF(0, 0, IMAGE[0], IMAGE[1])
+        results.add("repaint-scene", size, common.measure(
+            lambda: paint(image, lambda painter: scene.render(
+                painter, target, scene.itemsBoundingRect())), repeat=repeat))
+
+        view.centerOn(nodes[0])
+        results.add("repaint-view", size, common.measure(
+            lambda: paint(image, view.render), repeat=repeat))
+
+        scrollBar = view.horizontalScrollBar()
+        def pan():
+            for step in range(FRAMES):
+                scrollBar.setValue(scrollBar.value() +
+                                   (40 if step < FRAMES // 2 else -40))
+                paint(image, view.render)
+        results.add("pan", size, perFrame(pan, repeat), frames=FRAMES)
+
+        def zoom():
+            for step in range(FRAMES):
+                factor = 0.9 if step < FRAMES // 2 else 1 / 0.9
+                view.scale(factor, factor)
+                paint(image, view.render)
+        results.add("zoom", size, perFrame(zoom, repeat), frames=FRAMES)
+
+        group = generator.sample(nodes, max(10, size // 100))
+        for node in group:
+            # Node.setSelected only restyles the node; select it in the scene.
+            QGraphicsItem.setSelected(node, True)
+        def drag():
+            for step in range(FRAMES):
+                delta = 5 if step < FRAMES // 2 else -5
+                for node in group:
+                    node.moveBy(delta, delta)
+                # Connection paths are updated once per frame, normally
+                # from the view's paint event, which render() bypasses.
+                scene.flushConnections()
+                paint(image, view.render)
+        results.add("drag", size, perFrame(drag, repeat), frames=FRAMES,
+                    selected=len(group))
+
+        view.close()
+        scene.clear()
+        view = scene = nodes = group = None
+        application.processEvents()
+
+
+def main(arguments=None):
+    parser = common.argumentParser(__doc__.strip().splitlines()[0], SIZES)
+    parser.add_argument("--without-shadows", action="store_true",
+                        help="disables the drop shadows of the nodes")
+    options = parser.parse_args(arguments)
+
+    shadows = not options.without_shadows
+    results = common.Results("rendering", shadows=shadows)
+    run(common.parseSizes(options.sizes), options.repeat, results, shadows)
+    return common.finish(results, options)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+"""
+Times the graph topology operations of the node view at scale::
+
+    python benchmarks/topology.py --output topology.json
+    python benchmarks/topology.py --baseline topology.json
+
+Cases, for each graph size:
+
+* ``ancestors-chain``, ``Node.getAllAncestors`` at the end of a chain, first
+  on a fresh graph (``-cold``, which builds the reachability index) and
+  then again;
+* ``ancestors-fan``, the same at the root of a binary fan-in;
+* ``canConnect-dense``, 1000 ``NodeConnection.canConnect`` checks between
+  random ports of a graph with two edges per node;
+* ``removeConnections``, ``NodePort.removeConnections`` on an output
+  feeding every other node;
+* ``connect-bulk``, connecting a chain of nodes, one ``NodeConnection`` per
+  edge.
+
+The widgets run without a display on the Qt "offscreen" platform. With
+``--backend graph`` the same operations run on the headless graph alone,
+which separates the cost of the widgets from the cost of the graph.
+
+Results are written as JSON with ``--output``. ``--baseline`` compares them
+with results written earlier and exits with 1 if a case is slower than
+``--tolerance`` times its baseline.
+"""
+from __future__ import print_function
+
+import random
+import sys
+
+import common
+
+SIZES  = [100, 1000, 10000, 100000]
+CHECKS = 1000
+
+
+class GraphBackend(object):
+    """
+    The topology operations on a headless graph.
+    """
+
+    name = "graph"
+
+    def __init__(self):
+        from giza.graph import Graph, INPUT, OUTPUT
+        self.Graph, self.INPUT, self.OUTPUT = Graph, INPUT, OUTPUT
+
+    def newGraph(self):
+        self.graph = self.Graph()
+
+    def addNodes(self, count):
+        graph, nodes = self.graph, []
+        for _ in range(count):
+            nodeId = graph.addNode("Mix")
+            inputs = [graph.addPort(nodeId, self.INPUT, "color", label)
+                      for label in ("A", "B")]
+            output = graph.addPort(nodeId, self.OUTPUT, "color", "Color")
+            nodes.append((nodeId, inputs, output))
+        return nodes
+
+    def output(self, node):
+        return node[2]
+
+    def input(self, node, index):
+        return node[1][index]
+
+    def connect(self, source, destination):
+        self.graph.connect(source, destination)
+
+    def ancestors(self, node):
+        return self.graph.getAllAncestors(node[0])
+
+    def canConnect(self, port1, port2):
+        return self.graph.canConnect(port1, port2)
+
+    def removeConnections(self, port):
+        for edgeId in list(self.graph.portEdges(port)):
+            self.graph.disconnect(edgeId)
+
+
+class WidgetBackend(object):
+    """
+    The topology operations on node view widgets in a scene.
+    """
+
+    name = "widgets"
+
+    def __init__(self):
+        self.application = common.offscreenApplication()
+        from giza.graph import Graph
+        from giza.widgets import NodeViewScene
+        from giza.widgets.nodeview.node import NodeConnection
+        from giza.nodetypes.convert import MixNode
+        self.Graph, self.NodeViewScene = Graph, NodeViewScene
+        self.NodeConnection, self.MixNode = NodeConnection, MixNode
+        self.scene = None
+
+    def newGraph(self):
+        if self.scene is not None:
+            self.scene.shutdown()
+            self.scene.clear()
+        self.graph = self.Graph()
+        self.scene = self.NodeViewScene(self.graph)
+        # An unconnected connection whose canConnect does the checks.
+        self.checker = self.NodeConnection()
+
+    def addNodes(self, count):
+        nodes = []
+        for _ in range(count):
+            node = self.MixNode(self.graph)
+            self.scene.addItem(node)
+            nodes.append(node)
+        return nodes
+
+    def output(self, node):
+        return node.outputPorts[0]
+
+    def input(self, node, index):
+        return [port for port in node.inputPorts
+                if port.label in ("A", "B")][index]
+
+    def connect(self, source, destination):
+        connection = self.NodeConnection(source, destination)
+        self.scene.addItem(connection)
+
+    def ancestors(self, node):
+        return node.getAllAncestors()
+
+    def canConnect(self, port1, port2):
+        return self.checker.canConnect(port1, port2)
+
+    def removeConnections(self, port):
+        port.removeConnections()
+
+
+def chain(backend, size):
+    backend.newGraph()
+    nodes = backend.addNodes(size)
+    for previous, node in zip(nodes, nodes[1:]):
+        backend.connect(backend.output(previous), backend.input(node, 0))
+    return nodes
+
+def fan(backend, size):
+    """
+    Node i is fed by nodes 2i + 1 and 2i + 2, so node 0 has every other
+    node upstream.
+    """
+    backend.newGraph()
+    nodes = backend.addNodes(size)
+    for index in range(1, size):
+        parent = nodes[(index - 1) // 2]
+        backend.connect(backend.output(nodes[index]),
+                        backend.input(parent, (index - 1) % 2))
+    return nodes
+
+def dense(backend, size, generator):
+    backend.newGraph()
+    nodes = backend.addNodes(size)
+    for index in range(1, size):
+        for slot in range(2):
+            source = nodes[generator.randrange(index)]
+            backend.connect(backend.output(source),
+                            backend.input(nodes[index], slot))
+    return nodes
+
+def star(backend, size):
+    backend.newGraph()
+    nodes = backend.addNodes(size)
+    source = backend.output(nodes[0])
+    for node in nodes[1:]:
+        backend.connect(source, backend.input(node, 0))
+    return (source,)
+
+
+def run(backend, sizes, repeat, results):
+    for size in sizes:
+        nodes = chain(backend, size)
+        results.add("ancestors-chain-cold", size,
+                    common.measure(lambda: backend.ancestors(nodes[-1]),
+                                   repeat=1))
+        results.add("ancestors-chain", size,
+                    common.measure(lambda: backend.ancestors(nodes[-1]),
+                                   repeat=repeat))
+
+        nodes = fan(backend, size)
+        results.add("ancestors-fan-cold", size,
+                    common.measure(lambda: backend.ancestors(nodes[0]),
+                                   repeat=1))
+        results.add("ancestors-fan", size,
+                    common.measure(lambda: backend.ancestors(nodes[0]),
+                                   repeat=repeat))
+
+        generator = random.Random(size)
+        nodes = dense(backend, size, generator)
+        pairs = [(backend.output(generator.choice(nodes)),
+                  backend.input(generator.choice(nodes), generator.randrange(2)))
+                 for _ in range(CHECKS)]
+        def check():
+            for port1, port2 in pairs:
+                backend.canConnect(port1, port2)
+        backend.canConnect(*pairs[0])
+        results.add("canConnect-dense", size,
+                    common.measure(check, repeat=repeat), checks=CHECKS)
+
+        results.add("removeConnections", size,
+                    common.measure(backend.removeConnections,
+                                   lambda: star(backend, size), repeat))
+
+        def unconnected():
+            backend.newGraph()
+            return (backend.addNodes(size),)
+        def connectChain(nodes):
+            for previous, node in zip(nodes, nodes[1:]):
+                backend.connect(backend.output(previous),
+                                backend.input(node, 0))
+        results.add("connect-bulk", size,
+                    common.measure(connectChain, unconnected, repeat))
+        nodes = pairs = None
+    backend.newGraph()
+
+
+def main(arguments=None):
+    parser = common.argumentParser(__doc__.strip().splitlines()[0], SIZES)
+    parser.add_argument("--backend", choices=["widgets", "graph"],
+                        default="widgets",
+                        help="what to time (default: %(default)s)")
+    options = parser.parse_args(arguments)
+
+    backend = WidgetBackend() if options.backend == "widgets" \
+              else GraphBackend()
+    results = common.Results("topology", backend=backend.name)
+    run(backend, common.parseSizes(options.sizes), options.repeat, results)
+    return common.finish(results, options)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,12 @@
+from giza.engine.evaluator import Evaluator, EvaluationError
+from giza.engine.cache import ResultCache, sizeOf
+from giza.engine.scheduler import Scheduler, ScheduleReport
+from giza.engine.process import ProcessBackend
+from giza.engine.tiles import TiledEvaluator, Region
+from giza.engine.batch import BatchEvaluator, Samples
+from giza.engine.progressive import ProgressiveEvaluation
+from giza.engine.jobs import EvaluationJob, EvaluationCancelled
+from giza.engine.diskcache import DiskCache
+from giza.engine.animation import Animation, FrameReport
+from giza.engine.compiler import Compiler, CompiledPlan, CompileError
+from giza.engine.profiler import Profiler, NodeProfile
@@ -0,0 +1,175 @@
+import bisect
+import numbers
+import time
+
+from giza.graph.reachability import maskToIds
+
+
+def interpolate(value1, value2, t):
+    """
+    Interpolates linearly between two numbers or tuples of numbers. Other
+    values hold until the next keyframe.
+    """
+    if isinstance(value1, bool) or isinstance(value2, bool):
+        return value1
+    if isinstance(value1, numbers.Number) and isinstance(value2, numbers.Number):
+        value = value1 + (value2 - value1) * t
+        if isinstance(value1, numbers.Integral) and \
+                isinstance(value2, numbers.Integral):
+            return int(round(value))
+        return value
+    if isinstance(value1, tuple) and isinstance(value2, tuple) and \
+            len(value1) == len(value2):
+        return tuple(interpolate(item1, item2, t)
+                     for item1, item2 in zip(value1, value2))
+    return value1
+
+
+class FrameReport(object):
+    """
+    Timing of a rendered frame range.
+
+    ``computed`` maps node ids to the number of times they were computed
+    and ``durations`` to the seconds spent on them.
+    """
+
+    def __init__(self):
+        self.frames    = 0
+        self.wallTime  = 0.0
+        self.computed  = {}
+        self.durations = {}
+
+    @property
+    def framesPerSecond(self):
+        return self.frames / self.wallTime if self.wallTime else 0.0
+
+
+class Animation(object):
+    """
+    Animation
+
+    Renders frame ranges. Time enters a graph through the nodes whose
+    operator declares a ``timeParameter``, such as
+    :class:`~giza.operators.input.TimeInput`, and through parameters given
+    keyframes with :meth:`setKeyframe`.
+
+    Only the nodes downstream of those sources, found through the graph's
+    reachability index, depend on time. Each frame sets the time parameters,
+    which invalidates exactly those nodes, so the time-invariant part of the
+    graph is computed once for the whole range and the rest once per frame.
+    """
+
+    def __init__(self, evaluator):
+        self.evaluator = evaluator
+        self.graph     = evaluator.graph
+        self.keyframes = {}
+
+    def setKeyframe(self, nodeId, name, frame, value):
+        """
+        Sets the value of a node parameter at a frame. Between keyframes,
+        numbers and colors are interpolated linearly.
+        """
+        keys = self.keyframes.setdefault((nodeId, name), [])
+        frames = [key[0] for key in keys]
+        index = bisect.bisect_left(frames, frame)
+        if index < len(keys) and keys[index][0] == frame:
+            keys[index] = (frame, value)
+        else:
+            keys.insert(index, (frame, value))
+
+    def removeKeyframes(self, nodeId, name):
+        self.keyframes.pop((nodeId, name), None)
+
+    def valueAt(self, nodeId, name, frame):
+        """
+        Returns the keyframed value of a parameter at a frame.
+        """
+        keys  = self.keyframes[(nodeId, name)]
+        index = bisect.bisect_right([key[0] for key in keys], frame)
+        if index == 0:
+            return keys[0][1]
+        if index == len(keys):
+            return keys[-1][1]
+        (frame1, value1), (frame2, value2) = keys[index - 1], keys[index]
+        return interpolate(value1, value2,
+                           float(frame - frame1) / (frame2 - frame1))
+
+    def timeSources(self):
+        """
+        Returns the ids of the nodes whose parameters change with time.
+        """
+        graph   = self.graph
+        sources = set(nodeId for nodeId, name in self.keyframes
+                      if graph.hasNode(nodeId))
+        for nodeId in graph.nodeIds():
+            if self.evaluator.operator(nodeId).timeParameter is not None:
+                sources.add(nodeId)
+        return sorted(sources)
+
+    def timeDependentMask(self):
+        """
+        Returns a bitset of the nodes that depend on time.
+        """
+        reachability = self.graph.reachability
+        mask = 0
+        for nodeId in self.timeSources():
+            mask |= (1 << nodeId) | reachability.descendantMask(nodeId)
+        return mask
+
+    def timeDependentNodes(self):
+        return maskToIds(self.timeDependentMask())
+
+    def setFrame(self, frame, sources=None):
+        """
+        Sets the time parameters of the graph for a frame. The time sources
+        can be given when they are already known.
+        """
+        graph = self.graph
+        if sources is None:
+            sources = self.timeSources()
+        for nodeId in sources:
+            name = self.evaluator.operator(nodeId).timeParameter
+            if name is not None and graph.parameter(nodeId, name) != frame:
+                graph.setParameter(nodeId, name, frame)
+        for (nodeId, name) in self.keyframes:
+            if graph.hasNode(nodeId):
+                value = self.valueAt(nodeId, name, frame)
+                if graph.parameter(nodeId, name) != value:
+                    graph.setParameter(nodeId, name, value)
+
+    def renderFrame(self, frame, portIds, report=None, sources=None):
+        """
+        Returns the values of output ports at a frame, or with the time
+        parameters left as they are if frame is None.
+        """
+        evaluator = self.evaluator
+        graph     = self.graph
+        if frame is not None:
+            self.setFrame(frame, sources)
+        for nodeId in evaluator.plan([graph.portNode(portId)
+                                      for portId in portIds]):
+            start = time.time()
+            evaluator.values[nodeId] = evaluator.computeNode(nodeId)
+            if report is not None:
+                report.computed[nodeId] = report.computed.get(nodeId, 0) + 1
+                report.durations[nodeId] = report.durations.get(nodeId, 0.0) \
+                                           + time.time() - start
+        if report is not None:
+            report.frames += 1
+        return [evaluator.evaluate(portId) for portId in portIds]
+
+    def render(self, portIds, frames, callback=None):
+        """
+        Renders the output ports for each frame, calling
+        ``callback(frame, values)`` as frames complete, and returns a
+        FrameReport.
+        """
+        report  = FrameReport()
+        sources = self.timeSources()
+        start   = time.time()
+        for frame in frames:
+            values = self.renderFrame(frame, portIds, report, sources)
+            if callback is not None:
+                callback(frame, values)
+        report.wallTime = time.time() - start
+        return report
@@ -0,0 +1,142 @@
+import numpy
+
+from giza.graph.reachability import maskToIds
+
+
+class Samples(list):
+    """
+    The per-sample values of an output that was computed once per sample.
+    """
+
+
+def sample(value, index):
+    """
+    Returns one sample of a batched value: an item of Samples or of a 1-D
+    array, or a tuple of such samples for colors. Anything else is the same
+    for every sample.
+    """
+    if isinstance(value, Samples):
+        return value[index]
+    if isinstance(value, numpy.ndarray) and value.ndim:
+        return value[index]
+    if isinstance(value, tuple):
+        return tuple(sample(item, index) for item in value)
+    return value
+
+
+class BatchEvaluator(object):
+    """
+    BatchEvaluator
+
+    Evaluates a graph across many values of some parameters in one pass,
+    for parameter sweeps. Each swept parameter is given a 1-D array of
+    samples, all of the same length.
+
+    Nodes that do not depend on a swept parameter are computed once by the
+    wrapped evaluator. Nodes that do are batched: operators that set
+    ``vectorized`` compute the whole batch at once, with NumPy arrays in
+    place of their value inputs and parameters; the others, such as pixmap
+    operators, are computed once per sample.
+    """
+
+    def __init__(self, evaluator):
+        self.evaluator = evaluator
+        self.graph     = evaluator.graph
+        self.values    = {}
+        self.count     = 0
+
+    def run(self, nodeIds, sweeps):
+        """
+        Computes the given nodes for every sample. sweeps maps
+        ``(nodeId, parameterName)`` pairs to sequences of samples.
+        """
+        graph  = self.graph
+        sweeps = dict((key, numpy.asarray(samples))
+                      for key, samples in sweeps.items())
+        counts = set(len(samples) for samples in sweeps.values())
+        if len(counts) != 1:
+            raise ValueError("Every sweep must have the same number of "
+                             "samples.")
+        self.count = counts.pop()
+
+        batched = set()
+        for nodeId, name in sweeps:
+            batched.add(nodeId)
+            batched.update(maskToIds(graph.reachability.descendantMask(nodeId)))
+
+        needed = set(nodeIds)
+        for nodeId in nodeIds:
+            needed.update(maskToIds(graph.reachability.ancestorMask(nodeId)))
+
+        self.values = {}
+        for nodeId in sorted(needed & batched,
+                             key=graph.order.position.__getitem__):
+            self.values[nodeId] = self.computeBatched(nodeId, sweeps)
+
+        for nodeId in needed - batched:
+            self.evaluator.evaluateNode(nodeId)
+
+    def evaluate(self, portId, sweeps):
+        """
+        Returns the list of the values of an output port, one per sample.
+        """
+        value = self.evaluateVector(portId, sweeps)
+        return [sample(value, index) for index in range(self.count)]
+
+    def evaluateVector(self, portId, sweeps):
+        """
+        Returns the batched value of an output port: an array, a tuple of
+        arrays or Samples, or a single value if it does not depend on the
+        sweeps.
+        """
+        nodeId = self.graph.portNode(portId)
+        self.run([nodeId], sweeps)
+        label = self.graph.port(portId).label
+        if nodeId in self.values:
+            return self.values[nodeId][label]
+        return self.evaluator.evaluate(portId)
+
+    def computeBatched(self, nodeId, sweeps):
+        graph      = self.graph
+        evaluator  = self.evaluator
+        operator   = evaluator.operator(nodeId)
+        parameters = evaluator.gatherParameters(nodeId)
+        swept      = []
+        for (sweptNode, name), samples in sweeps.items():
+            if sweptNode == nodeId:
+                parameters[name] = samples
+                swept.append(name)
+
+        inputs  = {}
+        varying = []
+        fanned  = False
+        for portId in graph.inputPorts(nodeId):
+            port = graph.port(portId)
+            if port.edges:
+                source = graph.port(graph.edgeSource(port.edges[0]))
+                if source.node in self.values:
+                    value = self.values[source.node][source.label]
+                    fanned = fanned or isinstance(value, Samples)
+                    varying.append(port.label)
+                else:
+                    value = evaluator.evaluateNode(source.node)[source.label]
+                inputs[port.label] = value
+            else:
+                inputs[port.label] = operator.defaultValue(port.kind,
+                                                           port.label)
+
+        if operator.vectorized and not fanned:
+            return operator.compute(inputs, parameters)
+
+        outputs = {}
+        for index in range(self.count):
+            sampleInputs     = dict(inputs)
+            sampleParameters = dict(parameters)
+            for label in varying:
+                sampleInputs[label] = sample(inputs[label], index)
+            for name in swept:
+                sampleParameters[name] = parameters[name][index]
+            result = operator.compute(sampleInputs, sampleParameters)
+            for label, value in result.items():
+                outputs.setdefault(label, Samples()).append(value)
+        return outputs
@@ -0,0 +1,126 @@
+from collections import OrderedDict
+import numbers
+import sys
+import threading
+
+
+def sizeOf(value):
+    """
+    Returns an estimate of the number of bytes held by a value.
+
+    Pixmap buffers are measured by the size of their pixel data: anything
+    with an ``nbytes`` attribute (NumPy arrays and image buffers), Cairo image
+    surfaces and QImages.
+    """
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, numbers.Integral):
+        return nbytes
+    if hasattr(value, "get_stride") and hasattr(value, "get_height"):
+        return value.get_stride() * value.get_height()
+    if hasattr(value, "byteCount"):
+        return value.byteCount()
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(sizeOf(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeOf(item)
+                                          for item in value.values())
+    return sys.getsizeof(value)
+
+
+class ResultCache(object):
+    """
+    ResultCache
+
+    A least recently used cache of node outputs with a byte budget. Entries
+    are keyed by ``(nodeId, portId, fingerprint)``, where the fingerprint
+    identifies the node's type, parameters and upstream values, so that
+    returning to an earlier state of the graph finds its results again.
+
+    When an insertion takes the cache over its budget, the least recently
+    used entries are evicted until it fits. Values larger than the whole
+    budget are not stored.
+
+    The cache may be shared by the threads of a scheduler.
+    """
+
+    def __init__(self, budget=256 * 1024 * 1024):
+        self.budget  = budget
+        self.size    = 0
+        self.entries = OrderedDict()
+        self.lock    = threading.RLock()
+
+        self.hits      = 0
+        self.misses    = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key, default=None):
+        """
+        Returns the value stored under key and marks it as recently used.
+        """
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.entries[key] = entry
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        """
+        Stores a value, evicting older entries to stay within the budget.
+        """
+        size = sizeOf(value)
+        with self.lock:
+            self.discard(key)
+            if size > self.budget:
+                return
+            self.entries[key] = (value, size)
+            self.size += size
+            self._evict()
+
+    def discard(self, key):
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                self.size -= entry[1]
+
+    def setBudget(self, budget):
+        with self.lock:
+            self.budget = budget
+            self._evict()
+
+    def _evict(self):
+        while self.size > self.budget:
+            key, (value, size) = self.entries.popitem(last=False)
+            self.size -= size
+            self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def hitRate(self):
+        lookups = self.hits + self.misses
+        return float(self.hits) / lookups if lookups else 0.0
+
+    def statistics(self):
+        """
+        Returns a dictionary describing the cache usage.
+        """
+        return {
+            "entries"  : len(self.entries),
+            "size"     : self.size,
+            "budget"   : self.budget,
+            "hits"     : self.hits,
+            "misses"   : self.misses,
+            "evictions": self.evictions,
+            "hitRate"  : self.hitRate(),
+        }
@@ -0,0 +1,190 @@
+from giza.graph.reachability import maskToIds
+
+# Port kinds the compiler can fuse.
+VALUE_KINDS = ("value", "color")
+
+
+class CompileError(Exception):
+    """
+    Raised when a subgraph cannot be compiled.
+    """
+
+
+class CompiledPlan(object):
+    """
+    A generated function computing some output ports of a graph.
+
+    The function reads the node parameters when it is called, so parameter
+    changes need no recompilation; ``version`` is the graph's topology
+    version it was compiled for. ``parameterNodes`` holds the nodes whose
+    parameters the function takes, that is those that were not folded into
+    constants.
+    """
+
+    def __init__(self, graph, portIds, function, source, nodeIds, version,
+                 parameterNodes=()):
+        self.graph    = graph
+        self.portIds  = portIds
+        self.function = function
+        self.source   = source
+        self.nodeIds  = nodeIds
+        self.version  = version
+        self.parameterNodes = set(parameterNodes)
+
+    def isStale(self):
+        return self.version != self.graph.topologyVersion
+
+    def evaluate(self, sweeps=None):
+        """
+        Returns the values of the output ports. sweeps maps
+        ``(nodeId, parameterName)`` pairs to values overriding the graph's,
+        such as NumPy arrays of samples for vectorized operators.
+        """
+        if not sweeps:
+            return self.function()
+        overrides = {}
+        for (nodeId, name), value in sweeps.items():
+            if nodeId not in self.nodeIds:
+                continue
+            if nodeId not in self.parameterNodes:
+                raise CompileError("Node %r was folded into a constant; its "
+                                   "parameter %r cannot be overridden." %
+                                   (nodeId, name))
+            key = "p%d" % nodeId
+            if key not in overrides:
+                overrides[key] = dict(self.graph.parameters(nodeId))
+            overrides[key][name] = value
+        return self.function(**overrides)
+
+
+class Compiler(object):
+    """
+    Compiler
+
+    Fuses the value and color nodes feeding some output ports into a single
+    generated Python function, skipping the per-node work of the evaluator:
+    planning, fingerprinting, caching and building input and output
+    dictionaries.
+
+    Only the nodes upstream of the requested outputs are compiled. Inputs
+    that are not connected are folded into constants, and so are nodes with
+    neither parameters nor connected inputs. Operators describe their
+    outputs as Python expressions with ``expression``; the others are called
+    through their compute function. The expressions of vectorized operators
+    also accept NumPy arrays, so a plan can evaluate parameter sweeps.
+
+    Plans are cached per set of outputs and recompiled only when the graph's
+    topology version changes.
+    """
+
+    def __init__(self, evaluator):
+        self.evaluator = evaluator
+        self.graph     = evaluator.graph
+        self.plans     = {}
+
+    def compile(self, portIds):
+        """
+        Returns a CompiledPlan for the given output ports.
+        """
+        key  = tuple(portIds)
+        plan = self.plans.get(key)
+        if plan is None or plan.isStale():
+            plan = self.plans[key] = self._compile(list(portIds))
+        return plan
+
+    def evaluate(self, portIds, sweeps=None):
+        return self.compile(portIds).evaluate(sweeps)
+
+    def _compile(self, portIds):
+        graph     = self.graph
+        evaluator = self.evaluator
+
+        targets = set(graph.portNode(portId) for portId in portIds)
+        mask    = 0
+        for nodeId in targets:
+            mask |= (1 << nodeId) | graph.reachability.ancestorMask(nodeId)
+        nodeIds = maskToIds(mask)
+        nodeIds.sort(key=graph.order.position.__getitem__)
+
+        namespace = {}
+        constants = {}
+        def constant(value):
+            name = "k%d" % len(namespace)
+            namespace[name] = value
+            constants[name] = value
+            return name
+
+        lines     = []
+        variables = {}
+        arguments = []
+        parameterNodes = []
+        for nodeId in nodeIds:
+            operator = evaluator.operator(nodeId)
+            ports    = [graph.port(portId) for portId in graph.nodePorts(nodeId)]
+            if any(port.kind not in VALUE_KINDS for port in ports) or \
+                    operator.resolutionParameters:
+                raise CompileError("Node %r (%s) is not a value node." %
+                                   (nodeId, graph.nodeType(nodeId)))
+
+            inputs = {}
+            for portId in graph.inputPorts(nodeId):
+                port = graph.port(portId)
+                if port.edges:
+                    inputs[port.label] = variables[graph.edgeSource(port.edges[0])]
+                else:
+                    inputs[port.label] = constant(
+                        operator.defaultValue(port.kind, port.label))
+
+            names = sorted(set(operator.parameters) |
+                           set(graph.parameters(nodeId)))
+            outputPorts = graph.outputPorts(nodeId)
+
+            if not names and all(name in constants for name in inputs.values()):
+                outputs = operator.compute(
+                    dict((label, constants[name])
+                         for label, name in inputs.items()), {})
+                for portId in outputPorts:
+                    variables[portId] = constant(
+                        outputs[graph.port(portId).label])
+                continue
+
+            parameterDict = "p%d" % nodeId
+            namespace["P%d" % nodeId] = graph.parameters(nodeId)
+            arguments.append("%s=P%d" % (parameterDict, nodeId))
+            parameterNodes.append(nodeId)
+            parameters = {}
+            for index, name in enumerate(names):
+                variable = "q%d_%d" % (nodeId, index)
+                lines.append("%s = %s.get(%r, %s)" % (
+                    variable, parameterDict, name,
+                    constant(operator.parameters.get(name))))
+                parameters[name] = variable
+
+            expressions = operator.expression(inputs, parameters)
+            if expressions is None:
+                operatorName = constant(operator)
+                outputsName  = "o%d" % nodeId
+                lines.append("%s = %s.compute({%s}, {%s})" % (
+                    outputsName, operatorName,
+                    ", ".join("%r: %s" % item for item in sorted(inputs.items())),
+                    ", ".join("%r: %s" % item
+                              for item in sorted(parameters.items()))))
+                expressions = dict(
+                    (graph.port(portId).label,
+                     "%s[%r]" % (outputsName, graph.port(portId).label))
+                    for portId in outputPorts)
+
+            for index, portId in enumerate(outputPorts):
+                label    = graph.port(portId).label
+                variable = "v%d_%d" % (nodeId, index)
+                lines.append("%s = %s" % (variable, expressions[label]))
+                variables[portId] = variable
+
+        lines.append("return [%s]" % ", ".join(variables[portId]
+                                               for portId in portIds))
+        source = "def compiled(%s):\n    %s\n" % (", ".join(arguments),
+                                                  "\n    ".join(lines))
+        exec(compile(source, "<giza compiled plan>", "exec"), namespace)
+        return CompiledPlan(graph, portIds, namespace["compiled"], source,
+                            set(nodeIds), graph.topologyVersion,
+                            parameterNodes)
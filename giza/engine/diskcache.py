@@ -0,0 +1,210 @@
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+
+import numpy
+
+from giza.image import ImageBuffer
+
+MAGIC  = b"GIZI"
+HEADER = struct.Struct("<4sIII")
+# Pixel data starts on a page-friendly boundary so that it can be mapped.
+DATA_OFFSET = 64
+
+
+def defaultCacheDirectory():
+    """
+    Returns the per-user directory for cached pixmaps.
+    """
+    root = os.environ.get("XDG_CACHE_HOME") or \
+           os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(root, "giza", "pixmaps")
+
+
+class DiskCache(object):
+    """
+    DiskCache
+
+    A content-addressed store of pixmap outputs on disk, shared by every
+    process using the same directory. Entries are keyed by a node's
+    fingerprint, a digest of its type, parameters and upstream fingerprints,
+    and the output's label. Node ids play no part in the key, so reopening a
+    graph or evaluating it from another process finds the same entries.
+
+    Images are read back as copy-on-write memory mappings rather than copied
+    into memory. Writers create a temporary file and rename it into place, so
+    readers never see a partial entry and concurrent writers of the same
+    entry, which hold the same pixels, cannot corrupt it.
+
+    The total size is capped at ``budget`` bytes. Reads refresh an entry's
+    modification time, and pruning removes the least recently used entries
+    first.
+    """
+
+    def __init__(self, directory=None, budget=1024 * 1024 * 1024):
+        self.directory = directory or defaultCacheDirectory()
+        self.budget    = budget
+        self.size      = None
+        self.hits      = 0
+        self.misses    = 0
+        self.lock      = threading.Lock()
+
+        if not os.path.isdir(self.directory):
+            try:
+                os.makedirs(self.directory)
+            except OSError:
+                # Another process may have created it meanwhile.
+                if not os.path.isdir(self.directory):
+                    raise
+
+    def key(self, fingerprint, label):
+        return hashlib.sha1(("%s:%s" % (fingerprint, label)).encode("utf-8")
+                            ).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        """
+        Returns the image stored under key, or None.
+        """
+        path = self.path(key)
+        try:
+            with open(path, "rb") as stream:
+                magic, width, height, stride = HEADER.unpack(
+                    stream.read(HEADER.size))
+            if magic != MAGIC:
+                return self._miss()
+            data = numpy.memmap(path, numpy.uint8, "c", DATA_OFFSET,
+                                (height, stride))
+            os.utime(path, None)
+        except (IOError, OSError, ValueError, struct.error):
+            return self._miss()
+        self.hits += 1
+        return ImageBuffer(width, height, data)
+
+    def _miss(self):
+        self.misses += 1
+        return None
+
+    def put(self, key, image):
+        """
+        Stores an image under key.
+        """
+        path = self.path(key)
+        if os.path.exists(path):
+            return
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                if not os.path.isdir(directory):
+                    raise
+
+        handle, temporary = tempfile.mkstemp(".tmp", "", directory)
+        try:
+            with os.fdopen(handle, "wb") as stream:
+                header = HEADER.pack(MAGIC, image.width, image.height,
+                                     image.stride)
+                stream.write(header + b"\0" * (DATA_OFFSET - len(header)))
+                stream.write(image.data.tobytes())
+            os.rename(temporary, path)
+        except OSError:
+            # Renaming over an existing entry fails on Windows; the entry
+            # written by the other process holds the same pixels.
+            self._unlink(temporary)
+            return
+
+        with self.lock:
+            if self.size is not None:
+                self.size += DATA_OFFSET + image.data.nbytes
+            if self.size is None or self.size > self.budget:
+                self.prune()
+
+    def getOutputs(self, fingerprint, labels):
+        """
+        Returns a node's outputs if every one of them is stored, or None.
+        """
+        if not labels:
+            return None
+        outputs = {}
+        for label in labels:
+            image = self.get(self.key(fingerprint, label))
+            if image is None:
+                return None
+            outputs[label] = image
+        return outputs
+
+    def putOutputs(self, fingerprint, outputs):
+        """
+        Stores a node's outputs if they are all images; nodes with other
+        outputs are cheap to recompute and not worth a round trip to disk.
+        """
+        if not outputs or not all(isinstance(value, ImageBuffer)
+                                  for value in outputs.values()):
+            return
+        for label, image in outputs.items():
+            self.put(self.key(fingerprint, label), image)
+
+    def entries(self):
+        """
+        Returns (path, size, mtime) for every entry.
+        """
+        entries = []
+        for shard in os.listdir(self.directory):
+            directory = os.path.join(self.directory, shard)
+            if len(shard) != 2 or not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    info = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, info.st_size, info.st_mtime))
+        return entries
+
+    def prune(self, budget=None):
+        """
+        Removes the least recently used entries until the cache holds at
+        most three quarters of its budget.
+        """
+        budget  = self.budget if budget is None else budget
+        entries = self.entries()
+        size    = sum(entry[1] for entry in entries)
+        if size > budget:
+            target = budget * 3 // 4
+            entries.sort(key=lambda entry: entry[2])
+            for path, entrySize, mtime in entries:
+                if size <= target:
+                    break
+                self._unlink(path)
+                size -= entrySize
+        self.size = size
+
+    def clear(self):
+        self.prune(0)
+
+    def _unlink(self, path):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    def statistics(self):
+        if self.size is None:
+            with self.lock:
+                self.prune()
+        lookups = self.hits + self.misses
+        return {
+            "size"   : self.size,
+            "budget" : self.budget,
+            "hits"   : self.hits,
+            "misses" : self.misses,
+            "hitRate": float(self.hits) / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,290 @@
+import hashlib
+import json
+import time
+
+from giza.graph import (INPUT, NODE_REMOVED, EDGE_ADDED, EDGE_REMOVED,
+                        PARAMETER_CHANGED)
+from giza.graph.reachability import maskToIds
+from giza.operators import getOperator
+from giza.engine.profiler import COMPUTED, MEMORY, DISK
+
+
+class EvaluationError(Exception):
+    """
+    Raised when a node cannot be evaluated.
+    """
+
+
+class Evaluator(object):
+    """
+    Evaluator
+
+    Lazily evaluates the nodes of a graph. Requesting the value of an output
+    port pulls only the upstream nodes it depends on, and only those that are
+    dirty get computed. Computed outputs are kept until a connection or
+    parameter change invalidates the node, which also invalidates everything
+    downstream of it.
+
+    Because a node is only ever computed after all of its ancestors, a clean
+    node always has clean ancestors, and invalidation can stop at nodes that
+    are already dirty.
+
+    Each computed node also gets a fingerprint: a digest of its type, its
+    parameters and the fingerprints of the outputs feeding it. When a
+    :class:`~giza.engine.cache.ResultCache` is given, outputs are stored in
+    it under their fingerprint, so a node whose inputs and parameters return
+    to an earlier state is not computed again. A
+    :class:`~giza.engine.diskcache.DiskCache` additionally keeps pixmap
+    outputs across sessions and processes.
+
+    The graph can be evaluated at a fraction of its full resolution with
+    :meth:`setResolution`. Operators scale their pixel-sized parameters
+    accordingly, and since parameters are fingerprinted, proxy and full
+    resolution results live side by side in the cache.
+
+    Setting ``profiler`` to a :class:`~giza.engine.profiler.Profiler`
+    records the time, cache hits and output size of every node evaluation.
+    """
+
+    def __init__(self, graph, cache=None, diskCache=None):
+        self.graph        = graph
+        self.cache        = cache
+        self.diskCache    = diskCache
+        self.values       = {}
+        self.fingerprints = {}
+        self.operators    = {}
+        self.resolution   = 1.0
+        self.profiler     = None
+
+        graph.addListener(self.graphChanged)
+
+    def close(self):
+        """
+        Detaches the evaluator from its graph.
+        """
+        self.graph.removeListener(self.graphChanged)
+        self.invalidateAll()
+
+    # ------------------------------------------------------------------
+    # Dirty propagation
+    # ------------------------------------------------------------------
+
+    def graphChanged(self, event, *args):
+        if event == PARAMETER_CHANGED:
+            self.invalidate(args[0])
+        elif event in (EDGE_ADDED, EDGE_REMOVED):
+            self.invalidate(self.graph.portNode(args[2]))
+        elif event == NODE_REMOVED:
+            self.values.pop(args[0], None)
+            self.fingerprints.pop(args[0], None)
+            if self.profiler is not None:
+                self.profiler.forget(args[0])
+
+    def isDirty(self, nodeId):
+        return nodeId not in self.values
+
+    def invalidate(self, nodeId):
+        """
+        Marks a node and everything downstream of it as dirty.
+        """
+        if nodeId not in self.values:
+            return
+        del self.values[nodeId]
+        self.fingerprints.pop(nodeId, None)
+        for descendant in maskToIds(self.graph.reachability.descendantMask(nodeId)):
+            self.values.pop(descendant, None)
+            self.fingerprints.pop(descendant, None)
+
+    def invalidateAll(self):
+        self.values.clear()
+        self.fingerprints.clear()
+
+    def setResolution(self, resolution):
+        """
+        Sets the fraction of the full resolution the graph is evaluated at.
+        """
+        if resolution != self.resolution:
+            self.resolution = resolution
+            self.invalidateAll()
+
+    # ------------------------------------------------------------------
+    # Evaluation
+    # ------------------------------------------------------------------
+
+    def operator(self, nodeId):
+        """
+        Returns the operator instance computing the node.
+        """
+        typeName = self.graph.nodeType(nodeId)
+        operator = self.operators.get(typeName)
+        if operator is None:
+            operatorClass = getOperator(typeName)
+            if operatorClass is None:
+                raise EvaluationError("No operator for node type %r." %
+                                      typeName)
+            operator = self.operators[typeName] = operatorClass()
+        return operator
+
+    def evaluate(self, portId):
+        """
+        Returns the value of an output port, computing whatever it needs.
+        """
+        graph  = self.graph
+        nodeId = graph.portNode(portId)
+        return self.evaluateNode(nodeId)[graph.port(portId).label]
+
+    def evaluateNode(self, nodeId):
+        """
+        Returns the outputs of a node as a dictionary keyed by port label.
+        """
+        for dirtyNode in self.plan([nodeId]):
+            self.values[dirtyNode] = self.computeNode(dirtyNode)
+        return self.values[nodeId]
+
+    def plan(self, nodeIds):
+        """
+        Returns the dirty nodes the given nodes depend on, themselves
+        included, in the order they must be computed.
+        """
+        graph   = self.graph
+        values  = self.values
+        pending = [nodeId for nodeId in nodeIds if nodeId not in values]
+        dirty   = set(pending)
+        for nodeId in pending:
+            for ancestor in graph.immediateAncestors(nodeId):
+                if ancestor not in values and ancestor not in dirty:
+                    dirty.add(ancestor)
+                    pending.append(ancestor)
+        pending.sort(key=graph.order.position.__getitem__)
+        return pending
+
+    def gatherInputs(self, nodeId):
+        """
+        Returns the input values of a node, keyed by port label. The nodes
+        upstream of it must have been computed.
+        """
+        graph    = self.graph
+        operator = self.operator(nodeId)
+        inputs   = {}
+        for portId in graph.inputPorts(nodeId):
+            port = graph.port(portId)
+            if port.edges:
+                source = graph.port(graph.edgeSource(port.edges[0]))
+                inputs[port.label] = self.values[source.node][source.label]
+            else:
+                inputs[port.label] = operator.defaultValue(port.kind,
+                                                           port.label)
+        return inputs
+
+    def gatherParameters(self, nodeId):
+        """
+        Returns the node's parameters merged over the operator's defaults and
+        scaled to the current resolution.
+        """
+        operator   = self.operator(nodeId)
+        parameters = dict(operator.parameters)
+        parameters.update(self.graph.parameters(nodeId))
+        if self.resolution != 1.0:
+            operator.scaleParameters(parameters, self.resolution)
+        return parameters
+
+    def fingerprint(self, nodeId, parameters, fingerprints=None):
+        """
+        Returns a digest of the node's type, parameters and upstream
+        fingerprints, which are looked up in fingerprints or, by default,
+        taken from the computed nodes.
+
+        The digest is taken over a canonical JSON encoding, so that it does
+        not depend on whether text is ``str`` or ``unicode`` or whether
+        sequences are tuples or lists, which both change when a graph is
+        saved and loaded again.
+        """
+        if fingerprints is None:
+            fingerprints = self.fingerprints
+        graph    = self.graph
+        upstream = []
+        for portId in graph.inputPorts(nodeId):
+            port = graph.port(portId)
+            if port.edges:
+                source = graph.port(graph.edgeSource(port.edges[0]))
+                upstream.append((port.label, fingerprints[source.node],
+                                 source.label))
+            else:
+                upstream.append((port.label, None, None))
+        key = json.dumps([graph.nodeType(nodeId), parameters, upstream],
+                         sort_keys=True, default=repr)
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def computeNode(self, nodeId, runner=None):
+        """
+        Runs the node's operator, or finds its outputs in the cache, and
+        returns the outputs.
+
+        A runner, called with the operator, inputs and parameters, can take
+        the place of the operator's compute function, for instance to run it
+        in another process.
+        """
+        if self.profiler is None:
+            return self._computeNode(nodeId, runner)[0]
+        start = time.time()
+        outputs, source = self._computeNode(nodeId, runner)
+        self.profiler.record(nodeId, time.time() - start, source, outputs)
+        return outputs
+
+    def _computeNode(self, nodeId, runner):
+        """
+        Returns the node's outputs and where they came from.
+        """
+        inputs      = self.gatherInputs(nodeId)
+        parameters  = self.gatherParameters(nodeId)
+        fingerprint = self.fingerprint(nodeId, parameters)
+        self.fingerprints[nodeId] = fingerprint
+
+        if self.cache is not None:
+            outputs = self.cachedOutputs(nodeId, fingerprint)
+            if outputs is not None:
+                return outputs, MEMORY
+
+        if self.diskCache is not None:
+            outputs = self.diskCache.getOutputs(fingerprint, [
+                self.graph.port(portId).label
+                for portId in self.graph.outputPorts(nodeId)])
+            if outputs is not None:
+                if self.cache is not None:
+                    self.storeOutputs(nodeId, fingerprint, outputs)
+                return outputs, DISK
+
+        operator = self.operator(nodeId)
+        if runner is None:
+            outputs = operator.compute(inputs, parameters)
+        else:
+            outputs = runner(operator, inputs, parameters)
+        if not isinstance(outputs, dict):
+            raise EvaluationError("Node %r returned %r instead of a "
+                                  "dictionary of outputs." % (nodeId, outputs))
+
+        if self.cache is not None:
+            self.storeOutputs(nodeId, fingerprint, outputs)
+        if self.diskCache is not None:
+            self.diskCache.putOutputs(fingerprint, outputs)
+        return outputs, COMPUTED
+
+    def cachedOutputs(self, nodeId, fingerprint):
+        """
+        Returns the node's outputs from the cache, or None unless every one
+        of them is cached.
+        """
+        outputs = {}
+        for portId in self.graph.outputPorts(nodeId):
+            label = self.graph.port(portId).label
+            value = self.cache.get((nodeId, portId, fingerprint), self)
+            if value is self:
+                return None
+            outputs[label] = value
+        return outputs
+
+    def storeOutputs(self, nodeId, fingerprint, outputs):
+        for portId in self.graph.outputPorts(nodeId):
+            label = self.graph.port(portId).label
+            if label in outputs:
+                self.cache.put((nodeId, portId, fingerprint), outputs[label])
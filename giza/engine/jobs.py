@@ -0,0 +1,173 @@
+import threading
+import time
+
+from giza.engine.evaluator import EvaluationError
+from giza.engine.profiler import COMPUTED, MEMORY, DISK
+
+
+class EvaluationCancelled(Exception):
+    pass
+
+
+class EvaluationJob(object):
+    """
+    EvaluationJob
+
+    An evaluation that can run on another thread while the graph keeps
+    changing. Everything the job needs from the graph, that is the dirty
+    nodes, their operators, parameters, fingerprints and clean input values,
+    is captured when it is created, so :meth:`run` never touches the graph.
+
+    A job can be cancelled from any thread; it stops before its next node.
+    :meth:`apply` hands the computed outputs back to the evaluator, keeping
+    only the ones whose fingerprint still matches the graph.
+    """
+
+    def __init__(self, evaluator, portIds, generation=0):
+        graph = evaluator.graph
+        self.portIds    = list(portIds)
+        self.generation = generation
+        self.cache      = evaluator.cache
+        self.diskCache  = evaluator.diskCache
+        self.profiler   = evaluator.profiler
+        self.outputs    = {}
+        self.values     = {}
+        self.complete   = False
+        self.cancelEvent = threading.Event()
+
+        nodeIds = [graph.portNode(portId) for portId in self.portIds]
+        self.plan = evaluator.plan(nodeIds)
+        self.mask = 0
+        self.steps = []
+        fingerprints = dict(evaluator.fingerprints)
+        for nodeId in self.plan:
+            self.mask |= 1 << nodeId
+            operator   = evaluator.operator(nodeId)
+            parameters = evaluator.gatherParameters(nodeId)
+            fingerprint = evaluator.fingerprint(nodeId, parameters,
+                                                fingerprints)
+            fingerprints[nodeId] = fingerprint
+
+            inputs = {}
+            for portId in graph.inputPorts(nodeId):
+                port = graph.port(portId)
+                if port.edges:
+                    source = graph.port(graph.edgeSource(port.edges[0]))
+                    if source.node in evaluator.values:
+                        value = evaluator.values[source.node][source.label]
+                        inputs[port.label] = (None, value)
+                    else:
+                        inputs[port.label] = (source.node, source.label)
+                else:
+                    inputs[port.label] = (None, operator.defaultValue(
+                        port.kind, port.label))
+
+            outputPorts = [(portId, graph.port(portId).label)
+                           for portId in graph.outputPorts(nodeId)]
+            self.steps.append((nodeId, operator, inputs, parameters,
+                               fingerprint, outputPorts))
+
+        self.targets = []
+        for portId, nodeId in zip(self.portIds, nodeIds):
+            if nodeId in evaluator.values:
+                label = graph.port(portId).label
+                self.values[portId] = evaluator.values[nodeId][label]
+            else:
+                self.targets.append((portId, nodeId, graph.port(portId).label))
+
+    def cancel(self):
+        self.cancelEvent.set()
+
+    def isCancelled(self):
+        return self.cancelEvent.is_set()
+
+    def affects(self, nodeId, graph):
+        """
+        Returns whether a change to a node invalidates part of the job.
+        """
+        mask = 1 << nodeId
+        if graph.hasNode(nodeId):
+            mask |= graph.reachability.descendantMask(nodeId)
+        return bool(self.mask & mask)
+
+    def run(self):
+        """
+        Computes the job's nodes. Raises EvaluationCancelled if the job is
+        cancelled before it completes.
+        """
+        cache = self.cache
+        for nodeId, operator, inputs, parameters, fingerprint, outputPorts \
+                in self.steps:
+            if self.isCancelled():
+                raise EvaluationCancelled()
+
+            start   = time.time()
+            source  = MEMORY
+            outputs = None
+            if cache is not None:
+                outputs = {}
+                for portId, label in outputPorts:
+                    value = cache.get((nodeId, portId, fingerprint), self)
+                    if value is self:
+                        outputs = None
+                        break
+                    outputs[label] = value
+
+            if outputs is None and self.diskCache is not None:
+                source  = DISK
+                outputs = self.diskCache.getOutputs(
+                    fingerprint, [label for portId, label in outputPorts])
+                if outputs is not None and cache is not None:
+                    for portId, label in outputPorts:
+                        cache.put((nodeId, portId, fingerprint), outputs[label])
+
+            if outputs is None:
+                source = COMPUTED
+                values = {}
+                for label, (upstream, value) in inputs.items():
+                    if upstream is not None:
+                        value = self.outputs[upstream][value]
+                    values[label] = value
+                outputs = operator.compute(values, parameters)
+                if not isinstance(outputs, dict):
+                    raise EvaluationError("Node %r returned %r instead of a "
+                                          "dictionary of outputs." %
+                                          (nodeId, outputs))
+                if cache is not None:
+                    for portId, label in outputPorts:
+                        if label in outputs:
+                            cache.put((nodeId, portId, fingerprint),
+                                      outputs[label])
+                if self.diskCache is not None:
+                    self.diskCache.putOutputs(fingerprint, outputs)
+            self.outputs[nodeId] = outputs
+            if self.profiler is not None:
+                self.profiler.record(nodeId, time.time() - start, source,
+                                     outputs)
+
+        for portId, nodeId, label in self.targets:
+            self.values[portId] = self.outputs[nodeId][label]
+        self.complete = True
+        return self.values
+
+    def apply(self, evaluator):
+        """
+        Stores the computed outputs that are still current in the evaluator.
+        Must be called on the thread that edits the graph.
+        """
+        graph        = evaluator.graph
+        fingerprints = dict(evaluator.fingerprints)
+        for nodeId, operator, inputs, parameters, fingerprint, outputPorts \
+                in self.steps:
+            if nodeId not in self.outputs or not graph.hasNode(nodeId):
+                continue
+            try:
+                current = evaluator.fingerprint(
+                    nodeId, evaluator.gatherParameters(nodeId), fingerprints)
+            except KeyError:
+                # Something upstream has changed and is not computed yet.
+                continue
+            fingerprints[nodeId] = current
+            if current == fingerprint and nodeId not in evaluator.values:
+                evaluator.values[nodeId]       = self.outputs[nodeId]
+                evaluator.fingerprints[nodeId] = fingerprint
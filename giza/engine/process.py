@@ -0,0 +1,174 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import uuid
+
+try:
+    import numpy
+    from giza.image import ImageBuffer
+except ImportError:
+    numpy = ImageBuffer = None
+
+
+def sharedMemoryDirectory():
+    """
+    Returns the directory holding shared buffers, preferring a memory-backed
+    file system.
+    """
+    if os.path.isdir("/dev/shm"):
+        return "/dev/shm"
+    return tempfile.gettempdir()
+
+
+class SharedArray(object):
+    """
+    A picklable handle on an array stored in a memory-mapped file. Only the
+    handle travels between processes; the pixels stay in shared memory.
+    """
+
+    def __init__(self, path, dtype, shape):
+        self.path  = path
+        self.dtype = dtype
+        self.shape = shape
+
+    @classmethod
+    def fromArray(cls, array):
+        path = os.path.join(sharedMemoryDirectory(),
+                            "giza-%s.buffer" % uuid.uuid4().hex)
+        shared = cls(path, array.dtype.str, array.shape)
+        mapped = numpy.memmap(path, dtype=array.dtype, mode="w+",
+                              shape=array.shape)
+        mapped[...] = array
+        mapped.flush()
+        del mapped
+        return shared
+
+    def open(self):
+        """
+        Maps the array. The mapping stays valid after :meth:`unlink`.
+        """
+        return numpy.memmap(self.path, dtype=numpy.dtype(self.dtype),
+                            mode="r+", shape=self.shape)
+
+    def unlink(self):
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+class SharedImage(SharedArray):
+    """
+    A picklable handle on an ImageBuffer stored in a memory-mapped file.
+    """
+
+    def __init__(self, path, dtype, shape, width=0, height=0):
+        super(SharedImage, self).__init__(path, dtype, shape)
+        self.width  = width
+        self.height = height
+
+    @classmethod
+    def fromImage(cls, image):
+        shared = cls.fromArray(image.data)
+        shared.width, shared.height = image.width, image.height
+        return shared
+
+    def open(self):
+        data = super(SharedImage, self).open()
+        return ImageBuffer(self.width, self.height, data)
+
+
+def share(value):
+    """
+    Replaces the images and arrays in a value by SharedArray handles.
+    """
+    if ImageBuffer is not None and isinstance(value, ImageBuffer):
+        return SharedImage.fromImage(value)
+    if numpy is not None and isinstance(value, numpy.ndarray):
+        return SharedArray.fromArray(value)
+    if isinstance(value, dict):
+        return dict((key, share(item)) for key, item in value.items())
+    return value
+
+def unshare(value):
+    """
+    Replaces the SharedArray handles in a value by mapped images and
+    arrays.
+    """
+    if isinstance(value, SharedArray):
+        return value.open()
+    if isinstance(value, dict):
+        return dict((key, unshare(item)) for key, item in value.items())
+    return value
+
+def handles(value):
+    """
+    Returns the SharedArray handles in a value.
+    """
+    if isinstance(value, SharedArray):
+        return [value]
+    if isinstance(value, dict):
+        return [handle for item in value.values() for handle in handles(item)]
+    return []
+
+
+def _computeRemote(module, typeName, inputs, parameters):
+    """
+    Runs an operator inside a worker process.
+    """
+    from giza.operators import getOperator
+    __import__(module)
+    operator = getOperator(typeName)()
+    return share(operator.compute(unshare(inputs), parameters))
+
+
+class ProcessBackend(object):
+    """
+    ProcessBackend
+
+    Runs operator compute functions in a pool of worker processes, which
+    lets pure-Python operators that hold the GIL run in parallel. Pixmap
+    (:class:`~giza.image.ImageBuffer`) and array inputs and outputs are
+    handed over through memory-mapped files in shared memory rather than
+    pickled.
+
+    Operators select this backend with ``backend = PROCESS``. Their module
+    must be importable by the workers.
+    """
+
+    def __init__(self, processes=None):
+        self.processes = processes or multiprocessing.cpu_count()
+        self.pool      = None
+        self.lock      = threading.Lock()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def compute(self, operator, inputs, parameters):
+        """
+        Computes an operator's outputs in a worker process. Blocks until the
+        outputs are available.
+        """
+        with self.lock:
+            if self.pool is None:
+                self.pool = multiprocessing.Pool(self.processes)
+
+        operatorClass = type(operator)
+        sharedInputs  = share(inputs)
+        try:
+            sharedOutputs = self.pool.apply(_computeRemote, (
+                operatorClass.__module__, operatorClass.__name__,
+                sharedInputs, parameters))
+        finally:
+            for handle in handles(sharedInputs):
+                handle.unlink()
+
+        # The mappings outlive the files, which are unlinked right away.
+        outputs = unshare(sharedOutputs)
+        for handle in handles(sharedOutputs):
+            handle.unlink()
+        return outputs
@@ -0,0 +1,136 @@
+import threading
+
+from giza.engine.cache import sizeOf
+
+# Where a node's outputs came from.
+COMPUTED = "computed"
+MEMORY   = "memory"
+DISK     = "disk"
+
+
+class NodeProfile(object):
+    """
+    Evaluation statistics of a node.
+
+    ``time`` is the total wall time in seconds, lookups included, and
+    ``bytes`` the size of the node's outputs the last time it ran.
+    """
+
+    def __init__(self):
+        self.calls    = 0
+        self.computed = 0
+        self.hits     = 0
+        self.diskHits = 0
+        self.time     = 0.0
+        self.lastTime = 0.0
+        self.bytes    = 0
+
+    @property
+    def hitRate(self):
+        return float(self.hits + self.diskHits) / self.calls \
+               if self.calls else 0.0
+
+    @property
+    def averageTime(self):
+        return self.time / self.calls if self.calls else 0.0
+
+
+class Profiler(object):
+    """
+    Profiler
+
+    Records every node evaluation of the evaluators it is given to, as
+    their ``profiler``: the wall time, whether the outputs were computed or
+    found in the memory or disk cache, and the size of the outputs.
+
+    Evaluation jobs record from their worker thread, so the profiles are
+    read through :meth:`profile` and :meth:`profiles`, which return copies.
+    """
+
+    def __init__(self):
+        self._profiles = {}
+        self.lock      = threading.Lock()
+
+    def record(self, nodeId, seconds, source, outputs):
+        """
+        Records an evaluation of a node that took seconds, source being
+        COMPUTED, MEMORY or DISK.
+        """
+        size = sum(sizeOf(value) for value in outputs.values())
+        with self.lock:
+            profile = self._profiles.get(nodeId)
+            if profile is None:
+                profile = self._profiles[nodeId] = NodeProfile()
+            profile.calls   += 1
+            profile.time    += seconds
+            profile.lastTime = seconds
+            profile.bytes    = size
+            if source == MEMORY:
+                profile.hits += 1
+            elif source == DISK:
+                profile.diskHits += 1
+            else:
+                profile.computed += 1
+
+    def profile(self, nodeId):
+        """
+        Returns a copy of a node's profile, or None if it was not evaluated.
+        """
+        with self.lock:
+            profile = self._profiles.get(nodeId)
+            if profile is None:
+                return None
+            copy = NodeProfile()
+            copy.__dict__.update(profile.__dict__)
+            return copy
+
+    def profiles(self):
+        """
+        Returns copies of the profiles keyed by node id.
+        """
+        with self.lock:
+            nodeIds = list(self._profiles)
+        return dict((nodeId, self.profile(nodeId)) for nodeId in nodeIds)
+
+    def forget(self, nodeId):
+        with self.lock:
+            self._profiles.pop(nodeId, None)
+
+    def reset(self):
+        with self.lock:
+            self._profiles.clear()
+
+    def slowest(self, count=10):
+        """
+        Returns the (nodeId, profile) pairs that took the most time, slowest
+        first.
+        """
+        profiles = sorted(self.profiles().items(),
+                          key=lambda item: item[1].time, reverse=True)
+        return profiles[:count]
+
+    def heat(self, profiles=None):
+        """
+        Returns each node's share of the slowest node's time, from 0 to 1.
+        """
+        if profiles is None:
+            profiles = self.profiles()
+        longest = max([profile.time for profile in profiles.values()] or [0])
+        return dict((nodeId, profile.time / longest if longest else 0.0)
+                    for nodeId, profile in profiles.items())
+
+    def report(self, graph=None, count=10):
+        """
+        Returns a table of the slowest nodes as text.
+        """
+        lines = ["%6s %-16s %6s %10s %10s %6s %10s" % (
+                 "node", "type", "calls", "total ms", "mean ms", "hits",
+                 "bytes")]
+        for nodeId, profile in self.slowest(count):
+            typeName = graph.nodeType(nodeId) \
+                       if graph is not None and graph.hasNode(nodeId) else ""
+            lines.append("%6d %-16s %6d %10.2f %10.3f %5.0f%% %10d" % (
+                nodeId, typeName, profile.calls, profile.time * 1000,
+                profile.averageTime * 1000, profile.hitRate * 100,
+                profile.bytes))
+        return "\n".join(lines)
@@ -0,0 +1,32 @@
+class ProgressiveEvaluation(object):
+    """
+    ProgressiveEvaluation
+
+    Switches an evaluator to a proxy resolution while an interaction, such
+    as dragging a dial, is in progress, and back to full resolution once it
+    ends. Every change made during the interaction is then previewed at a
+    fraction of the cost, and a single full resolution pass follows.
+
+    Interactions may nest; the full resolution pass is requested when the
+    outermost one ends by calling ``fullResolutionRequested``, if set.
+    """
+
+    def __init__(self, evaluator, proxyResolution=0.25):
+        self.evaluator       = evaluator
+        self.proxyResolution = proxyResolution
+        self.interactions    = 0
+        self.fullResolutionRequested = None
+
+    def isInteracting(self):
+        return self.interactions > 0
+
+    def beginInteraction(self):
+        self.interactions += 1
+        self.evaluator.setResolution(self.proxyResolution)
+
+    def endInteraction(self):
+        self.interactions = max(0, self.interactions - 1)
+        if self.interactions == 0:
+            self.evaluator.setResolution(1.0)
+            if self.fullResolutionRequested is not None:
+                self.fullResolutionRequested()
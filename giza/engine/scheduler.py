@@ -0,0 +1,168 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import multiprocessing
+import time
+
+from giza.engine.process import ProcessBackend
+from giza.operators import PROCESS
+
+
+class ScheduleReport(object):
+    """
+    Timing of a scheduled evaluation.
+
+    ``durations`` maps node ids to the seconds spent computing them. The
+    critical path is the chain of dependent nodes with the largest total
+    duration; no amount of parallelism can finish sooner than it.
+    """
+
+    def __init__(self):
+        self.wallTime         = 0.0
+        self.durations        = {}
+        self.criticalPath     = []
+        self.criticalPathTime = 0.0
+
+    @property
+    def busyTime(self):
+        return sum(self.durations.values())
+
+    @property
+    def parallelism(self):
+        """
+        Returns the average number of nodes computed at once.
+        """
+        return self.busyTime / self.wallTime if self.wallTime else 0.0
+
+
+class Scheduler(object):
+    """
+    Scheduler
+
+    Evaluates the dirty nodes needed for some outputs concurrently. The
+    dependency DAG is derived from the graph's ports and connections, and a
+    node is dispatched as soon as all of its dirty ancestors are done, so
+    independent branches run side by side.
+
+    Operators that release the GIL while computing (``releasesGIL = True``,
+    as Cairo and NumPy code does) are dispatched to a thread pool. The
+    others would only contend for the GIL, so they run on the calling
+    thread while the pool works, unless their operator selects the process
+    backend (``backend = PROCESS``). Those are handed to a
+    :class:`~giza.engine.process.ProcessBackend` from the thread pool.
+    """
+
+    def __init__(self, evaluator, maxWorkers=None, processes=None):
+        self.evaluator  = evaluator
+        self.maxWorkers = maxWorkers or multiprocessing.cpu_count()
+        self.executor   = None
+        self.processBackend = ProcessBackend(processes)
+        self.lastReport = None
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        self.processBackend.close()
+
+    def evaluate(self, portIds):
+        """
+        Returns the values of the given output ports.
+        """
+        graph = self.evaluator.graph
+        self.run([graph.portNode(portId) for portId in portIds])
+        return [self.evaluator.evaluate(portId) for portId in portIds]
+
+    def run(self, nodeIds):
+        """
+        Computes the dirty nodes the given nodes depend on and returns a
+        ScheduleReport.
+        """
+        evaluator = self.evaluator
+        graph     = evaluator.graph
+        plan      = evaluator.plan(nodeIds)
+        planned   = set(plan)
+
+        waiting    = {}
+        dependents = dict((nodeId, []) for nodeId in plan)
+        for nodeId in plan:
+            ancestors = [ancestor for ancestor in graph.immediateAncestors(nodeId)
+                         if ancestor in planned]
+            waiting[nodeId] = len(ancestors)
+            for ancestor in ancestors:
+                dependents[ancestor].append(nodeId)
+
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(self.maxWorkers)
+
+        report  = ScheduleReport()
+        ready   = [nodeId for nodeId in plan if waiting[nodeId] == 0]
+        running = {}
+        start   = time.time()
+
+        def finished(nodeId, outputs, duration):
+            evaluator.values[nodeId] = outputs
+            report.durations[nodeId] = duration
+            for dependent in dependents[nodeId]:
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0:
+                    ready.append(dependent)
+
+        try:
+            while ready or running:
+                inline = []
+                for nodeId in ready:
+                    operator = evaluator.operator(nodeId)
+                    if operator.releasesGIL or operator.backend == PROCESS:
+                        future = self.executor.submit(self._compute, nodeId)
+                        running[future] = nodeId
+                    else:
+                        inline.append(nodeId)
+                del ready[:]
+
+                for nodeId in inline:
+                    finished(nodeId, *self._compute(nodeId))
+
+                if running and not ready:
+                    done, pending = wait(list(running),
+                                         return_when=FIRST_COMPLETED)
+                    for future in done:
+                        finished(running.pop(future), *future.result())
+        finally:
+            for future in running:
+                future.cancel()
+            wait(list(running))
+
+        report.wallTime = time.time() - start
+        self._criticalPath(report, plan, planned)
+        self.lastReport = report
+        return report
+
+    def _compute(self, nodeId):
+        start  = time.time()
+        runner = None
+        if self.evaluator.operator(nodeId).backend == PROCESS:
+            runner = self.processBackend.compute
+        outputs = self.evaluator.computeNode(nodeId, runner)
+        return outputs, time.time() - start
+
+    def _criticalPath(self, report, plan, planned):
+        graph     = self.evaluator.graph
+        durations = report.durations
+        finish    = {}
+        previous  = {}
+        for nodeId in plan:
+            best, bestFinish = None, 0.0
+            for ancestor in graph.immediateAncestors(nodeId):
+                if ancestor in planned and finish[ancestor] > bestFinish:
+                    best, bestFinish = ancestor, finish[ancestor]
+            finish[nodeId]   = bestFinish + durations[nodeId]
+            previous[nodeId] = best
+
+        if not finish:
+            return
+        nodeId = max(finish, key=finish.__getitem__)
+        report.criticalPathTime = finish[nodeId]
+        path = []
+        while nodeId is not None:
+            path.append(nodeId)
+            nodeId = previous[nodeId]
+        report.criticalPath = path[::-1]
@@ -0,0 +1,286 @@
+from giza.engine.cache import ResultCache
+from giza.image import ImageBuffer
+from giza.graph.reachability import maskToIds
+
+
+class Region(object):
+    """
+    A rectangle of canvas pixels.
+    """
+    __slots__ = ("x", "y", "width", "height")
+
+    def __init__(self, x, y, width, height):
+        self.x      = x
+        self.y      = y
+        self.width  = width
+        self.height = height
+
+    def __repr__(self):
+        return "Region(%d, %d, %d, %d)" % (self.x, self.y, self.width,
+                                           self.height)
+
+    def __eq__(self, other):
+        return isinstance(other, Region) and self.key() == other.key()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def key(self):
+        return (self.x, self.y, self.width, self.height)
+
+    @property
+    def right(self):
+        return self.x + self.width
+
+    @property
+    def bottom(self):
+        return self.y + self.height
+
+    def isEmpty(self):
+        return self.width <= 0 or self.height <= 0
+
+    def adjusted(self, border):
+        """
+        Returns the region grown by border pixels on every side.
+        """
+        return Region(self.x - border, self.y - border,
+                      self.width + 2 * border, self.height + 2 * border)
+
+    def intersected(self, other):
+        x, y = max(self.x, other.x), max(self.y, other.y)
+        return Region(x, y, max(0, min(self.right, other.right) - x),
+                      max(0, min(self.bottom, other.bottom) - y))
+
+    def tiles(self, tileSize):
+        """
+        Returns the grid-aligned tiles of tileSize pixels covering the region.
+        """
+        tiles = []
+        top = (self.y // tileSize) * tileSize
+        while top < self.bottom:
+            left = (self.x // tileSize) * tileSize
+            while left < self.right:
+                tiles.append(Region(left, top, tileSize, tileSize))
+                left += tileSize
+            top += tileSize
+        return tiles
+
+
+def emptyPixels(region):
+    return ImageBuffer(region.width, region.height)
+
+def copyPixels(target, targetRegion, source, sourceRegion):
+    """
+    Copies the overlapping part of two images, each covering a region of the
+    canvas.
+    """
+    overlap = targetRegion.intersected(sourceRegion)
+    if overlap.isEmpty():
+        return
+    target.array[overlap.y - targetRegion.y:overlap.bottom - targetRegion.y,
+           overlap.x - targetRegion.x:overlap.right - targetRegion.x] = \
+    source.array[overlap.y - sourceRegion.y:overlap.bottom - sourceRegion.y,
+           overlap.x - sourceRegion.x:overlap.right - sourceRegion.x]
+
+def cropPixels(pixels, pixelsRegion, region):
+    """
+    Returns the part of an image covering region. Pixels outside of the
+    image are transparent.
+    """
+    if pixelsRegion == region:
+        return pixels
+    cropped = emptyPixels(region)
+    if pixels is not None:
+        copyPixels(cropped, region, pixels, pixelsRegion)
+    return cropped
+
+
+def clipPixels(pixels, pixelsRegion, bounds):
+    """
+    Clears the pixels of an image that lie outside of bounds.
+    """
+    inside = pixelsRegion.intersected(bounds)
+    if inside == pixelsRegion or pixels is None:
+        return pixels
+    return cropPixels(cropPixels(pixels, pixelsRegion, inside), inside,
+                      pixelsRegion)
+
+
+class TiledEvaluator(object):
+    """
+    TiledEvaluator
+
+    Evaluates pixmap outputs for a rectangle of the canvas instead of whole
+    images. The requested region is split into grid-aligned tiles, and each
+    tile is computed and cached on its own, so a preview showing part of a
+    large canvas only costs the visible tiles.
+
+    Pixmap operators that set ``tiled`` implement ``computeRegion``. The
+    region is propagated upstream, grown by the operator's ``border`` (the
+    radius of a blur, for instance), and the upstream nodes are in turn
+    evaluated tile by tile. Other operators are evaluated whole by the
+    wrapped evaluator and their pixmaps cropped.
+
+    Pixels outside of a node's bounds are transparent, which keeps tiles
+    identical to the matching part of a whole evaluation, and tiles outside
+    of them are not computed at all.
+
+    Pixmaps are :class:`~giza.image.ImageBuffer` instances whose origin is
+    the canvas origin.
+    """
+
+    def __init__(self, evaluator, tileSize=256, cache=None):
+        self.evaluator    = evaluator
+        self.graph        = evaluator.graph
+        self.tileSize     = tileSize
+        # Caches are tested against None: an empty ResultCache is false.
+        if cache is None:
+            cache = evaluator.cache
+        if cache is None:
+            cache = ResultCache()
+        self.cache        = cache
+        self.fingerprints = {}
+        self.regions      = {}
+        self.resolution   = evaluator.resolution
+
+        self.graph.addListener(self.graphChanged)
+
+    def close(self):
+        self.graph.removeListener(self.graphChanged)
+
+    def graphChanged(self, event, *args):
+        self.fingerprints.clear()
+        self.regions.clear()
+
+    def checkResolution(self):
+        if self.resolution != self.evaluator.resolution:
+            self.resolution = self.evaluator.resolution
+            self.graphChanged(None)
+
+    def bounds(self, nodeId):
+        """
+        Returns the region covered by a node's pixmaps, or None if they are
+        unbounded.
+        """
+        self.checkResolution()
+        if nodeId in self.regions:
+            return self.regions[nodeId]
+
+        graph    = self.graph
+        operator = self.evaluator.operator(nodeId)
+        if operator.tiled:
+            inputBounds = {}
+            for portId in graph.inputPorts(nodeId):
+                port = graph.port(portId)
+                if port.kind == "pixmap" and port.edges:
+                    source = graph.portNode(graph.edgeSource(port.edges[0]))
+                    inputBounds[port.label] = self.bounds(source)
+            bounds = operator.bounds(self.evaluator.gatherParameters(nodeId),
+                                     inputBounds)
+        else:
+            bounds = None
+            for portId in graph.outputPorts(nodeId):
+                if graph.port(portId).kind == "pixmap":
+                    pixels = self.evaluator.evaluate(portId)
+                    if pixels is not None:
+                        bounds = Region(0, 0, pixels.width, pixels.height)
+                    break
+        self.regions[nodeId] = bounds
+        return bounds
+
+    def fingerprint(self, nodeId):
+        """
+        Returns the fingerprint of a node without computing it.
+        """
+        self.checkResolution()
+        fingerprint = self.fingerprints.get(nodeId)
+        if fingerprint is not None:
+            return fingerprint
+
+        evaluator = self.evaluator
+        mask      = self.graph.reachability.ancestorMask(nodeId)
+        nodeIds   = [ancestor for ancestor in maskToIds(mask)
+                     if ancestor not in self.fingerprints] + [nodeId]
+        nodeIds.sort(key=self.graph.order.position.__getitem__)
+        for current in nodeIds:
+            parameters = evaluator.gatherParameters(current)
+            self.fingerprints[current] = evaluator.fingerprint(
+                current, parameters, self.fingerprints)
+        return self.fingerprints[nodeId]
+
+    def evaluateRegion(self, portId, region):
+        """
+        Returns the pixels of a pixmap output port within region.
+        """
+        graph    = self.graph
+        nodeId   = graph.portNode(portId)
+        operator = self.evaluator.operator(nodeId)
+
+        if not operator.tiled:
+            pixels = self.evaluator.evaluate(portId)
+            if pixels is None:
+                return emptyPixels(region)
+            return cropPixels(pixels, Region(0, 0, pixels.width, pixels.height),
+                              region)
+
+        tiles = region.tiles(self.tileSize)
+        if len(tiles) == 1 and tiles[0] == region:
+            return self.tile(nodeId, portId, region)
+        pixels = emptyPixels(region)
+        for tile in tiles:
+            copyPixels(pixels, region, self.tile(nodeId, portId, tile), tile)
+        return pixels
+
+    def tile(self, nodeId, portId, tile):
+        """
+        Returns the pixels of a pixmap output port within a single tile.
+        """
+        fingerprint = self.fingerprint(nodeId)
+        key         = (nodeId, portId, fingerprint, tile.key())
+        pixels      = self.cache.get(key)
+        if pixels is not None:
+            return pixels
+
+        bounds = self.bounds(nodeId)
+        if bounds is not None and bounds.intersected(tile).isEmpty():
+            return emptyPixels(tile)
+
+        outputs = self.computeTile(nodeId, tile)
+        for outputPort in self.graph.outputPorts(nodeId):
+            label = self.graph.port(outputPort).label
+            if label in outputs:
+                if bounds is not None:
+                    outputs[label] = clipPixels(outputs[label], tile, bounds)
+                self.cache.put((nodeId, outputPort, fingerprint, tile.key()),
+                               outputs[label])
+        return outputs[self.graph.port(portId).label]
+
+    def computeTile(self, nodeId, tile):
+        """
+        Runs a tiled operator for a tile, gathering its pixmap inputs over the
+        tile grown by the operator's border.
+        """
+        graph      = self.graph
+        evaluator  = self.evaluator
+        operator   = evaluator.operator(nodeId)
+        parameters = evaluator.gatherParameters(nodeId)
+        inputTile  = tile.adjusted(operator.border(parameters))
+
+        inputs = {}
+        for portId in graph.inputPorts(nodeId):
+            port = graph.port(portId)
+            if port.edges:
+                source = graph.edgeSource(port.edges[0])
+                if port.kind == "pixmap":
+                    inputs[port.label] = self.evaluateRegion(source, inputTile)
+                else:
+                    inputs[port.label] = evaluator.evaluate(source)
+            elif port.kind == "pixmap":
+                inputs[port.label] = emptyPixels(inputTile)
+            else:
+                inputs[port.label] = operator.defaultValue(port.kind,
+                                                           port.label)
+        return operator.computeRegion(inputs, parameters, tile)
@@ -0,0 +1,4 @@
+from giza.graph.graph import (Graph, GraphError, INPUT, OUTPUT, NODE_ADDED,
+                              NODE_REMOVED, EDGE_ADDED, EDGE_REMOVED,
+                              PARAMETER_CHANGED)
+from giza.graph.serialize import GraphTables
@@ -0,0 +1,599 @@
+from giza.graph.order import TopologicalOrder
+from giza.graph.reachability import ReachabilityIndex
+
+INPUT  = "input"
+OUTPUT = "output"
+
+# Change notifications sent to graph listeners
+NODE_ADDED        = "nodeAdded"
+NODE_REMOVED      = "nodeRemoved"
+EDGE_ADDED        = "edgeAdded"
+EDGE_REMOVED      = "edgeRemoved"
+PARAMETER_CHANGED = "parameterChanged"
+
+
+class GraphError(Exception):
+    """
+    Raised when an operation would leave the graph in an invalid state.
+    """
+
+
+class NodeRecord(object):
+    """
+    A row of the node table.
+    """
+    __slots__ = ("typeName", "ports", "parameters", "x", "y", "data")
+
+    def __init__(self, typeName, parameters):
+        self.typeName   = typeName
+        self.ports      = []
+        self.parameters = parameters
+        self.x          = 0.0
+        self.y          = 0.0
+        self.data       = None
+
+
+class PortEdges(object):
+    """
+    The edge ids of a port. Behaves like a list for iteration, indexing and
+    appending, but removes an edge in constant time by moving the last edge
+    into its slot, so the order of the edges is not preserved.
+    """
+    __slots__ = ("_edges", "_index")
+
+    def __init__(self):
+        self._edges = []
+        self._index = {}
+
+    def append(self, edgeId):
+        self._index[edgeId] = len(self._edges)
+        self._edges.append(edgeId)
+
+    def remove(self, edgeId):
+        index = self._index.pop(edgeId)
+        last  = self._edges.pop()
+        if last != edgeId:
+            self._edges[index] = last
+            self._index[last]  = index
+
+    def __contains__(self, edgeId):
+        return edgeId in self._index
+
+    def __getitem__(self, index):
+        return self._edges[index]
+
+    def __iter__(self):
+        return iter(self._edges)
+
+    def __len__(self):
+        return len(self._edges)
+
+    def __bool__(self):
+        return bool(self._edges)
+
+    __nonzero__ = __bool__
+
+    def __repr__(self):
+        return "PortEdges(%r)" % (self._edges,)
+
+
+class PortRecord(object):
+    """
+    A row of the port table.
+    """
+    __slots__ = ("node", "direction", "kind", "label", "edges", "data")
+
+    def __init__(self, node, direction, kind, label):
+        self.node      = node
+        self.direction = direction
+        self.kind      = kind
+        self.label     = label
+        self.edges     = PortEdges()
+        self.data      = None
+
+
+class EdgeRecord(object):
+    """
+    A row of the edge table.
+    """
+    __slots__ = ("source", "destination", "data")
+
+    def __init__(self, source, destination):
+        self.source      = source
+        self.destination = destination
+        self.data        = None
+
+
+class Graph(object):
+    """
+    Graph
+
+    A headless node graph made of node, port and edge tables addressed by
+    integer ids. Nodes, ports and edges can be created, connected and queried
+    without any Qt objects; the widgets in :mod:`giza.widgets` mirror a graph
+    rather than own it.
+
+    Every record has a ``data`` slot which views use to map a record back to
+    the item that displays it.
+
+    A topological order of the nodes is maintained as edges are added, and a
+    reachability index caches the ancestors and descendants of the nodes
+    that are queried.
+    Together they keep cycle checks in :meth:`canConnect` and ancestor or
+    descendant queries close to constant time.
+
+    Listeners registered with :meth:`addListener` are called with an event
+    name and its arguments whenever the graph changes:
+
+    * ``NODE_ADDED, nodeId`` and ``NODE_REMOVED, nodeId``;
+    * ``EDGE_ADDED, edgeId, sourcePort, destinationPort`` and
+      ``EDGE_REMOVED, edgeId, sourcePort, destinationPort``;
+    * ``PARAMETER_CHANGED, nodeId, name``.
+
+    ``topologyVersion`` increases whenever a node, port or edge is added or
+    removed, but not when parameters or positions change, so that anything
+    derived from the structure of the graph alone can tell when it is
+    stale.
+    """
+
+    def __init__(self):
+        self.nodes = []
+        self.ports = []
+        self.edges = []
+        self.order = TopologicalOrder(self)
+        self.reachability = ReachabilityIndex(self)
+
+        self._freeNodes = []
+        self._freePorts = []
+        self._freeEdges = []
+
+        # Number of edges between each pair of linked nodes, keyed by
+        # (sourceNode, destinationNode).
+        self._links = {}
+
+        self.listeners = []
+        self.topologyVersion = 0
+
+    def addListener(self, listener):
+        self.listeners.append(listener)
+
+    def removeListener(self, listener):
+        self.listeners.remove(listener)
+
+    def _notify(self, event, *args):
+        for listener in list(self.listeners):
+            listener(event, *args)
+
+    # ------------------------------------------------------------------
+    # Table helpers
+    # ------------------------------------------------------------------
+
+    def _allocate(self, table, free, record):
+        if free:
+            ident = free.pop()
+            table[ident] = record
+        else:
+            ident = len(table)
+            table.append(record)
+        return ident
+
+    def _lookup(self, table, ident, kind):
+        try:
+            record = table[ident]
+        except (IndexError, TypeError):
+            record = None
+        if record is None or ident < 0:
+            raise GraphError("Unknown %s id %r." % (kind, ident))
+        return record
+
+    def node(self, nodeId):
+        return self._lookup(self.nodes, nodeId, "node")
+
+    def port(self, portId):
+        return self._lookup(self.ports, portId, "port")
+
+    def edge(self, edgeId):
+        return self._lookup(self.edges, edgeId, "edge")
+
+    # ------------------------------------------------------------------
+    # Nodes
+    # ------------------------------------------------------------------
+
+    def addNode(self, typeName, parameters=None):
+        """
+        Adds a node of the given type and returns its id.
+        """
+        record = NodeRecord(typeName, dict(parameters or {}))
+        nodeId = self._allocate(self.nodes, self._freeNodes, record)
+        self.order.addNode(nodeId)
+        self.topologyVersion += 1
+        self._notify(NODE_ADDED, nodeId)
+        return nodeId
+
+    def removeNode(self, nodeId):
+        """
+        Removes a node along with its ports and their edges.
+        """
+        record = self.node(nodeId)
+        for portId in list(record.ports):
+            self.removePort(portId)
+        self.order.removeNode(nodeId)
+        self.reachability.nodeRemoved(nodeId)
+        self.nodes[nodeId] = None
+        self._freeNodes.append(nodeId)
+        self.topologyVersion += 1
+        self._notify(NODE_REMOVED, nodeId)
+
+    def nodeIds(self):
+        """
+        Returns a list of the ids of every node in the graph.
+        """
+        return [nodeId for nodeId, record in enumerate(self.nodes)
+                if record is not None]
+
+    def hasNode(self, nodeId):
+        return 0 <= nodeId < len(self.nodes) and self.nodes[nodeId] is not None
+
+    def nodeCount(self):
+        return len(self.nodes) - len(self._freeNodes)
+
+    def setNodePosition(self, nodeId, x, y):
+        record = self.node(nodeId)
+        record.x, record.y = x, y
+
+    def nodePosition(self, nodeId):
+        record = self.node(nodeId)
+        return record.x, record.y
+
+    def nodeType(self, nodeId):
+        return self.node(nodeId).typeName
+
+    def setParameter(self, nodeId, name, value):
+        """
+        Sets a parameter of a node and notifies the listeners.
+        """
+        self.node(nodeId).parameters[name] = value
+        self._notify(PARAMETER_CHANGED, nodeId, name)
+
+    def parameter(self, nodeId, name, default=None):
+        return self.node(nodeId).parameters.get(name, default)
+
+    def parameters(self, nodeId):
+        return self.node(nodeId).parameters
+
+    # ------------------------------------------------------------------
+    # Ports
+    # ------------------------------------------------------------------
+
+    def addPort(self, nodeId, direction=INPUT, kind=None, label=None):
+        """
+        Adds a port to a node and returns its id.
+        """
+        if direction not in (INPUT, OUTPUT):
+            raise GraphError("Invalid port direction %r." % (direction,))
+        node = self.node(nodeId)
+        record = PortRecord(nodeId, direction, kind,
+                            label or direction.capitalize())
+        portId = self._allocate(self.ports, self._freePorts, record)
+        node.ports.append(portId)
+        self.topologyVersion += 1
+        return portId
+
+    def removePort(self, portId):
+        """
+        Removes a port and every edge attached to it.
+        """
+        record = self.port(portId)
+        for edgeId in list(record.edges):
+            self.disconnect(edgeId)
+        self.node(record.node).ports.remove(portId)
+        self.ports[portId] = None
+        self._freePorts.append(portId)
+        self.topologyVersion += 1
+
+    def portNode(self, portId):
+        return self.port(portId).node
+
+    def nodePorts(self, nodeId):
+        return list(self.node(nodeId).ports)
+
+    def inputPorts(self, nodeId):
+        """
+        Returns a list of the node's input port ids.
+        """
+        return [portId for portId in self.node(nodeId).ports
+                if self.ports[portId].direction == INPUT]
+
+    def outputPorts(self, nodeId):
+        """
+        Returns a list of the node's output port ids.
+        """
+        return [portId for portId in self.node(nodeId).ports
+                if self.ports[portId].direction == OUTPUT]
+
+    def findPort(self, nodeId, label, direction=None):
+        """
+        Returns the id of the node's first port with the given label, or None.
+        """
+        for portId in self.node(nodeId).ports:
+            record = self.ports[portId]
+            if record.label == label and direction in (None, record.direction):
+                return portId
+        return None
+
+    def portEdges(self, portId):
+        return list(self.port(portId).edges)
+
+    def connectedPorts(self, portId):
+        """
+        Returns the ids of the ports at the other end of the port's edges.
+        """
+        ports = []
+        for edgeId in self.port(portId).edges:
+            edge = self.edges[edgeId]
+            if edge.source == portId:
+                ports.append(edge.destination)
+            else:
+                ports.append(edge.source)
+        return ports
+
+    # ------------------------------------------------------------------
+    # Edges
+    # ------------------------------------------------------------------
+
+    def canConnect(self, portId1, portId2):
+        """
+        Returns a true/false value indicating whether or not an edge can be
+        made between the two ports, in either order.
+
+        An occupied input port is not a reason to refuse; :meth:`connect`
+        replaces its edge.
+        """
+        if portId1 == portId2:
+            return False
+        if not self.hasPort(portId1) or not self.hasPort(portId2):
+            return False
+
+        port1, port2 = self.ports[portId1], self.ports[portId2]
+
+        # The ports cannot have the same parent node.
+        if port1.node == port2.node:
+            return False
+
+        # The ports must have opposite directions.
+        if port1.direction == port2.direction:
+            return False
+
+        if port1.direction == OUTPUT:
+            source, destination = portId1, portId2
+        else:
+            source, destination = portId2, portId1
+
+        # A connection cannot be a duplicate of another.
+        if self.findEdge(source, destination) is not None:
+            return False
+
+        # The connection cannot be a cyclic loop.
+        if self.wouldCreateCycle(self.ports[source].node,
+                                 self.ports[destination].node):
+            return False
+
+        return True
+
+    def wouldCreateCycle(self, sourceNode, destinationNode):
+        """
+        Returns True if an edge from sourceNode to destinationNode would close
+        a cycle, that is if sourceNode is reachable from destinationNode.
+        """
+        if sourceNode == destinationNode:
+            return True
+        if self.order.precedes(sourceNode, destinationNode):
+            # The edge agrees with the topological order.
+            return False
+        return self.reachability.isReachable(destinationNode, sourceNode)
+
+    def connect(self, portId1, portId2):
+        """
+        Connects two ports and returns the id of the new edge.
+
+        The ports may be given in either order. An input port only holds a
+        single edge, so any existing edge on it is removed first.
+        """
+        if not self.canConnect(portId1, portId2):
+            raise GraphError("Ports %r and %r cannot be connected." %
+                             (portId1, portId2))
+
+        if self.ports[portId1].direction == OUTPUT:
+            source, destination = portId1, portId2
+        else:
+            source, destination = portId2, portId1
+
+        for edgeId in list(self.ports[destination].edges):
+            self.disconnect(edgeId)
+
+        edgeId = self._allocate(self.edges, self._freeEdges,
+                                EdgeRecord(source, destination))
+        self.ports[source].edges.append(edgeId)
+        self.ports[destination].edges.append(edgeId)
+        sourceNode      = self.ports[source].node
+        destinationNode = self.ports[destination].node
+        link = (sourceNode, destinationNode)
+        self._links[link] = self._links.get(link, 0) + 1
+        self.order.addEdge(sourceNode, destinationNode)
+        self.reachability.edgeAdded(sourceNode, destinationNode)
+        self.topologyVersion += 1
+        self._notify(EDGE_ADDED, edgeId, source, destination)
+        return edgeId
+
+    def disconnect(self, edgeId):
+        """
+        Removes an edge.
+        """
+        record = self.edge(edgeId)
+        self.ports[record.source].edges.remove(edgeId)
+        self.ports[record.destination].edges.remove(edgeId)
+        self.edges[edgeId] = None
+        self._freeEdges.append(edgeId)
+
+        sourceNode      = self.ports[record.source].node
+        destinationNode = self.ports[record.destination].node
+        link = (sourceNode, destinationNode)
+        if self._links[link] > 1:
+            self._links[link] -= 1
+        else:
+            del self._links[link]
+            self.reachability.edgeRemoved(sourceNode, destinationNode)
+        self.topologyVersion += 1
+        self._notify(EDGE_REMOVED, edgeId, record.source, record.destination)
+
+    def findEdge(self, sourcePort, destinationPort):
+        """
+        Returns the id of the edge between the two ports, or None.
+        """
+        for edgeId in self.ports[destinationPort].edges:
+            if self.edges[edgeId].source == sourcePort:
+                return edgeId
+        return None
+
+    def edgeIds(self):
+        return [edgeId for edgeId, record in enumerate(self.edges)
+                if record is not None]
+
+    def hasPort(self, portId):
+        return 0 <= portId < len(self.ports) and self.ports[portId] is not None
+
+    def edgeSource(self, edgeId):
+        return self.edge(edgeId).source
+
+    def edgeDestination(self, edgeId):
+        return self.edge(edgeId).destination
+
+    # ------------------------------------------------------------------
+    # Topology
+    # ------------------------------------------------------------------
+
+    def immediateAncestors(self, nodeId):
+        """
+        Returns the ids of the nodes directly connected to any of the node's
+        input ports, without duplicates.
+        """
+        ancestors = []
+        seen = set()
+        for portId in self.node(nodeId).ports:
+            port = self.ports[portId]
+            if port.direction != INPUT:
+                continue
+            for edgeId in port.edges:
+                ancestor = self.ports[self.edges[edgeId].source].node
+                if ancestor not in seen:
+                    seen.add(ancestor)
+                    ancestors.append(ancestor)
+        return ancestors
+
+    def immediateDescendants(self, nodeId):
+        """
+        Returns the ids of the nodes directly connected to any of the node's
+        output ports, without duplicates.
+        """
+        descendants = []
+        seen = set()
+        for portId in self.node(nodeId).ports:
+            port = self.ports[portId]
+            if port.direction != OUTPUT:
+                continue
+            for edgeId in port.edges:
+                descendant = self.ports[self.edges[edgeId].destination].node
+                if descendant not in seen:
+                    seen.add(descendant)
+                    descendants.append(descendant)
+        return descendants
+
+    def getAllAncestors(self, nodeId):
+        """
+        Returns the ids of every node upstream of the node, lowest id first.
+        """
+        return self.reachability.getAllAncestors(nodeId)
+
+    def getAllDescendants(self, nodeId):
+        """
+        Returns the ids of every node downstream of the node, lowest id first.
+        """
+        return self.reachability.getAllDescendants(nodeId)
+
+    def isReachable(self, fromNode, toNode):
+        """
+        Returns True if toNode is downstream of fromNode.
+        """
+        return self.reachability.isReachable(fromNode, toNode)
+
+    def topologicalOrder(self):
+        """
+        Returns the node ids ordered so that every node comes after its
+        ancestors.
+        """
+        return self.order.nodes()
+
+    def validate(self):
+        """
+        Checks the consistency of the tables and that the graph is acyclic.
+        Raises a GraphError describing the first problem found, and returns
+        the node ids in a topological order otherwise.
+        """
+        for edgeId in self.edgeIds():
+            edge = self.edges[edgeId]
+            if not self.hasPort(edge.source) or not self.hasPort(edge.destination):
+                raise GraphError("Edge %r references a missing port." % edgeId)
+            if self.ports[edge.source].direction != OUTPUT or \
+               self.ports[edge.destination].direction != INPUT:
+                raise GraphError("Edge %r has misdirected ports." % edgeId)
+            if self.ports[edge.source].node == self.ports[edge.destination].node:
+                raise GraphError("Edge %r connects a node to itself." % edgeId)
+
+        for portId, port in enumerate(self.ports):
+            if port is None:
+                continue
+            if port.direction == INPUT and len(port.edges) > 1:
+                raise GraphError("Input port %r has several edges." % portId)
+
+        # Kahn's algorithm: every node must be emitted for the graph to be
+        # acyclic.
+        inDegree = {}
+        for nodeId in self.nodeIds():
+            inDegree[nodeId] = len(self.immediateAncestors(nodeId))
+        ready = [nodeId for nodeId, degree in inDegree.items() if degree == 0]
+        emitted = []
+        while ready:
+            nodeId = ready.pop()
+            emitted.append(nodeId)
+            for descendant in self.immediateDescendants(nodeId):
+                inDegree[descendant] -= 1
+                if inDegree[descendant] == 0:
+                    ready.append(descendant)
+        if len(emitted) != len(inDegree):
+            raise GraphError("The graph contains a cycle.")
+        return emitted
+
+    def rebuild(self):
+        """
+        Validates tables that were filled in directly, as the readers in
+        :mod:`giza.graph.serialize` do, and rebuilds the free lists, the
+        topological order and the reachability index from them. Listeners
+        are not notified.
+        """
+        order = self.validate()
+        self._freeNodes = [ident for ident, record in enumerate(self.nodes)
+                           if record is None]
+        self._freePorts = [ident for ident, record in enumerate(self.ports)
+                           if record is None]
+        self._freeEdges = [ident for ident, record in enumerate(self.edges)
+                           if record is None]
+        self._links = {}
+        for record in self.edges:
+            if record is not None:
+                link = (self.ports[record.source].node,
+                        self.ports[record.destination].node)
+                self._links[link] = self._links.get(link, 0) + 1
+        self.order.reset(order)
+        self.reachability.clear()
+        self.topologyVersion += 1
+
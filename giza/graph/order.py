@@ -0,0 +1,119 @@
+class TopologicalOrder(object):
+    """
+    TopologicalOrder
+
+    Maintains a topological order of a graph's nodes across edge insertions
+    using the dynamic algorithm of Pearce and Kelly. Every node holds a
+    position, and each edge runs from a lower position to a higher one.
+
+    Inserting an edge that already agrees with the order costs nothing.
+    Otherwise only the nodes whose positions lie between the edge's ends are
+    visited and reordered. Removing an edge never invalidates the order. The
+    same invariant makes cycle checks cheap: an edge from a node to one
+    positioned after it can never close a cycle.
+    """
+
+    def __init__(self, graph):
+        self.graph    = graph
+        self.position = {}
+        self.slots    = []
+        self.holes    = 0
+
+    def addNode(self, nodeId):
+        self.position[nodeId] = len(self.slots)
+        self.slots.append(nodeId)
+
+    def reset(self, nodeIds):
+        """
+        Replaces the order by the given topologically sorted node ids.
+        """
+        self.slots    = list(nodeIds)
+        self.position = dict((nodeId, position)
+                             for position, nodeId in enumerate(self.slots))
+        self.holes    = 0
+
+    def removeNode(self, nodeId):
+        self.slots[self.position.pop(nodeId)] = None
+        self.holes += 1
+        if self.holes > 64 and self.holes * 2 > len(self.slots):
+            self._compact()
+
+    def _compact(self):
+        self.slots = [nodeId for nodeId in self.slots if nodeId is not None]
+        for position, nodeId in enumerate(self.slots):
+            self.position[nodeId] = position
+        self.holes = 0
+
+    def nodes(self):
+        """
+        Returns the node ids in topological order.
+        """
+        return [nodeId for nodeId in self.slots if nodeId is not None]
+
+    def precedes(self, nodeId1, nodeId2):
+        """
+        Returns True if the first node is positioned before the second.
+        """
+        return self.position[nodeId1] < self.position[nodeId2]
+
+    def addEdge(self, sourceNode, destinationNode):
+        """
+        Updates the order for a new edge. The edge must not close a cycle.
+        """
+        lowerBound = self.position[destinationNode]
+        upperBound = self.position[sourceNode]
+        if lowerBound > upperBound:
+            return
+
+        forward = self._forward(destinationNode, upperBound, sourceNode)
+        if forward is None:
+            raise ValueError("Edge %r -> %r closes a cycle." %
+                             (sourceNode, destinationNode))
+        backward = self._backward(sourceNode, lowerBound)
+        self._reorder(backward, forward)
+
+    def _forward(self, start, upperBound, target):
+        """
+        Collects the nodes reachable from start that are positioned at or
+        before upperBound. Returns None if target is among them.
+        """
+        position = self.position
+        visited  = set([start])
+        stack    = [start]
+        while stack:
+            for nodeId in self.graph.immediateDescendants(stack.pop()):
+                if nodeId == target:
+                    return None
+                if nodeId not in visited and position[nodeId] < upperBound:
+                    visited.add(nodeId)
+                    stack.append(nodeId)
+        return visited
+
+    def _backward(self, start, lowerBound):
+        """
+        Collects the nodes that reach start and are positioned after
+        lowerBound.
+        """
+        position = self.position
+        visited  = set([start])
+        stack    = [start]
+        while stack:
+            for nodeId in self.graph.immediateAncestors(stack.pop()):
+                if nodeId not in visited and position[nodeId] > lowerBound:
+                    visited.add(nodeId)
+                    stack.append(nodeId)
+        return visited
+
+    def _reorder(self, backward, forward):
+        """
+        Moves the backward set in front of the forward set, reusing the
+        positions both sets occupied.
+        """
+        position = self.position
+        backward = sorted(backward, key=position.__getitem__)
+        forward  = sorted(forward,  key=position.__getitem__)
+        nodes    = backward + forward
+        slots    = sorted(position[nodeId] for nodeId in nodes)
+        for slot, nodeId in zip(slots, nodes):
+            position[nodeId]  = slot
+            self.slots[slot] = nodeId
@@ -0,0 +1,241 @@
+import binascii
+from collections import OrderedDict
+
+
+def maskToIds(mask):
+    """
+    Returns the ids of the bits set in a bitset, lowest first.
+    """
+    ids = []
+    if not mask:
+        return ids
+    digits = "%x" % mask
+    for index, digit in enumerate(reversed(digits)):
+        if digit == "0":
+            continue
+        value = int(digit, 16)
+        base  = index * 4
+        for bit in range(4):
+            if (value >> bit) & 1:
+                ids.append(base + bit)
+    return ids
+
+
+def idsToMask(ids):
+    """
+    Returns a bitset with the bits of the given ids set.
+    """
+    if not ids:
+        return 0
+    data = bytearray((max(ids) >> 3) + 1)
+    for ident in ids:
+        data[ident >> 3] |= 1 << (ident & 7)
+    data.reverse()
+    return int(binascii.hexlify(bytes(data)), 16)
+
+
+class ReachabilityIndex(object):
+    """
+    ReachabilityIndex
+
+    Caches the set of ancestors and the set of descendants of the nodes that
+    are queried, as bitsets keyed by node id. A set is computed on first use
+    by a search that stops at nodes whose sets are already cached, and only
+    the queried node's set is kept, so memory grows with the number of
+    queried nodes rather than with every node the searches walk through.
+    The cached sets share a budget of ``budget`` bytes, and the least
+    recently used ones are dropped beyond it.
+
+    Cached sets are kept up to date as the graph changes:
+
+    * adding an edge ORs the new ancestors into every cached set downstream
+      of it and the new descendants into every cached set upstream of it;
+    * removing the last edge between two nodes drops the cached sets it may
+      have shrunk, and they are recomputed on the next query.
+
+    Reachability tests between nodes without cached sets search forward from
+    the first node, pruned to the nodes the topological order places before
+    the second one, and cache nothing.
+    """
+
+    def __init__(self, graph, budget=16 * 1024 * 1024):
+        self.graph        = graph
+        self.budget       = budget
+        self._ancestors   = OrderedDict()
+        self._descendants = OrderedDict()
+        self._size        = 0
+
+    def clear(self):
+        self._ancestors.clear()
+        self._descendants.clear()
+        self._size = 0
+
+    def ancestorMask(self, nodeId):
+        """
+        Returns a bitset of the ids of every node upstream of the node.
+        """
+        return self._mask(nodeId, self._ancestors,
+                          self.graph.immediateAncestors)
+
+    def descendantMask(self, nodeId):
+        """
+        Returns a bitset of the ids of every node downstream of the node.
+        """
+        return self._mask(nodeId, self._descendants,
+                          self.graph.immediateDescendants)
+
+    def _mask(self, nodeId, cache, step):
+        mask = self._lookup(cache, nodeId)
+        if mask is None:
+            mask = self._search(nodeId, cache, step)
+            self._store(cache, nodeId, mask)
+            self._trim()
+        return mask
+
+    def _search(self, nodeId, cache, step):
+        # Walk the uncached nodes and take the cached sets as they are met.
+        seen   = set()
+        cached = []
+        stack  = [nodeId]
+        while stack:
+            for neighbour in step(stack.pop()):
+                if neighbour in seen:
+                    continue
+                seen.add(neighbour)
+                mask = cache.get(neighbour)
+                if mask is None:
+                    stack.append(neighbour)
+                else:
+                    cached.append(mask)
+        mask = idsToMask(seen)
+        for other in cached:
+            mask |= other
+        return mask
+
+    # ------------------------------------------------------------------
+    # Cache bookkeeping
+    # ------------------------------------------------------------------
+
+    def _lookup(self, cache, nodeId):
+        mask = cache.pop(nodeId, None)
+        if mask is not None:
+            # Mark the set as the most recently used.
+            cache[nodeId] = mask
+        return mask
+
+    def _store(self, cache, nodeId, mask):
+        self._discard(cache, nodeId)
+        cache[nodeId] = mask
+        self._size += (mask.bit_length() + 7) >> 3
+
+    def _discard(self, cache, nodeId):
+        mask = cache.pop(nodeId, None)
+        if mask is not None:
+            self._size -= (mask.bit_length() + 7) >> 3
+
+    def _trim(self):
+        """
+        Drops the least recently used sets, from the larger cache first, until
+        the cached sets fit in the budget.
+        """
+        while self._size > self.budget and \
+                len(self._ancestors) + len(self._descendants) > 1:
+            if len(self._ancestors) >= len(self._descendants):
+                victim = self._ancestors
+            else:
+                victim = self._descendants
+            self._discard(victim, next(iter(victim)))
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def getAllAncestors(self, nodeId):
+        return maskToIds(self.ancestorMask(nodeId))
+
+    def getAllDescendants(self, nodeId):
+        return maskToIds(self.descendantMask(nodeId))
+
+    def isReachable(self, fromNode, toNode):
+        """
+        Returns True if toNode is downstream of fromNode.
+        """
+        descendants = self._lookup(self._descendants, fromNode)
+        if descendants is not None:
+            return bool((descendants >> toNode) & 1)
+        ancestors = self._lookup(self._ancestors, toNode)
+        if ancestors is not None:
+            return bool((ancestors >> fromNode) & 1)
+
+        # Every node on a path to toNode is positioned before it.
+        position = self.graph.order.position
+        bound    = position[toNode]
+        if position[fromNode] >= bound:
+            return False
+        seen  = set([fromNode])
+        stack = [fromNode]
+        while stack:
+            for nodeId in self.graph.immediateDescendants(stack.pop()):
+                if nodeId == toNode:
+                    return True
+                if nodeId not in seen and position[nodeId] < bound:
+                    seen.add(nodeId)
+                    stack.append(nodeId)
+        return False
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def edgeAdded(self, sourceNode, destinationNode):
+        """
+        Updates the cached sets for a new edge between two nodes.
+        """
+        ancestors = self._ancestors.get(destinationNode)
+        if ancestors is not None and (ancestors >> sourceNode) & 1:
+            # The nodes were already linked; nothing changes.
+            return
+
+        if self._ancestors:
+            gained = self._ancestors.get(sourceNode)
+            if gained is None:
+                gained = self._search(sourceNode, self._ancestors,
+                                      self.graph.immediateAncestors)
+            gained |= 1 << sourceNode
+            for nodeId, mask in list(self._ancestors.items()):
+                if nodeId == destinationNode or (mask >> destinationNode) & 1:
+                    self._resize(self._ancestors, nodeId, mask | gained)
+
+        if self._descendants:
+            gained = self._descendants.get(destinationNode)
+            if gained is None:
+                gained = self._search(destinationNode, self._descendants,
+                                      self.graph.immediateDescendants)
+            gained |= 1 << destinationNode
+            for nodeId, mask in list(self._descendants.items()):
+                if nodeId == sourceNode or (mask >> sourceNode) & 1:
+                    self._resize(self._descendants, nodeId, mask | gained)
+
+        self._trim()
+
+    def _resize(self, cache, nodeId, mask):
+        # Replaces a set in place, keeping its place in the usage order.
+        self._size += ((mask.bit_length() + 7) >> 3) - \
+                      ((cache[nodeId].bit_length() + 7) >> 3)
+        cache[nodeId] = mask
+
+    def edgeRemoved(self, sourceNode, destinationNode):
+        """
+        Drops the cached sets that the removal of the last edge between two
+        nodes may have shrunk.
+        """
+        for nodeId, mask in list(self._ancestors.items()):
+            if nodeId == destinationNode or (mask >> destinationNode) & 1:
+                self._discard(self._ancestors, nodeId)
+        for nodeId, mask in list(self._descendants.items()):
+            if nodeId == sourceNode or (mask >> sourceNode) & 1:
+                self._discard(self._descendants, nodeId)
+
+    def nodeRemoved(self, nodeId):
+        self._discard(self._ancestors, nodeId)
+        self._discard(self._descendants, nodeId)
@@ -0,0 +1,332 @@
+"""
+Reading and writing graphs.
+
+Two formats hold the same content: the nodes with their type, position and
+parameters, their ports, and the edges between ports. Ids are renumbered
+densely, nodes first, then ports node by node, then edges.
+
+The binary format is an indexed container. A header lists the sections,
+each with its offset and length, and the tables are stored column by column
+so that they are read with a single ``struct`` call each:
+
+* ``STRS``, the type names, port kinds and labels, referred to by index;
+* ``NODE``, the node types, x and y positions and port counts;
+* ``PORT``, the port directions, kinds and labels;
+* ``EDGE``, the source and destination ports;
+* ``PARM``, the parameters of the nodes that have any, as JSON.
+
+The JSON format is meant for files that are edited or diffed by hand.
+
+Loading fills the graph tables directly and validates them once with
+:meth:`~giza.graph.graph.Graph.rebuild`, instead of connecting edges one at
+a time.
+"""
+import json
+import struct
+
+from giza.graph.graph import (NodeRecord, PortRecord, EdgeRecord, GraphError,
+                              Graph, INPUT, OUTPUT)
+
+MAGIC   = b"GIZA"
+VERSION = 1
+
+HEADER  = struct.Struct("<4sHH")
+SECTION = struct.Struct("<4sQQ")
+COUNT   = struct.Struct("<I")
+
+DIRECTIONS = (INPUT, OUTPUT)
+
+
+def _encodeParameters(parameters):
+    return dict((str(nodeIndex), values)
+                for nodeIndex, values in parameters.items())
+
+def _decodeValue(value):
+    # JSON has no tuples; colors come back as lists.
+    if isinstance(value, list):
+        return tuple(_decodeValue(item) for item in value)
+    return value
+
+def _decodeParameters(parameters):
+    return dict((int(nodeIndex),
+                 dict((name, _decodeValue(value))
+                      for name, value in values.items()))
+                for nodeIndex, values in parameters.items())
+
+
+class GraphTables(object):
+    """
+    The column-oriented content of a graph file.
+    """
+
+    def __init__(self):
+        self.types        = []
+        self.xs           = []
+        self.ys           = []
+        self.portCounts   = []
+        self.directions   = []
+        self.kinds        = []
+        self.labels       = []
+        self.sources      = []
+        self.destinations = []
+        self.parameters   = {}
+
+    @classmethod
+    def fromGraph(cls, graph):
+        tables   = cls()
+        nodeIds  = graph.nodeIds()
+        portIndex = {}
+        for nodeIndex, nodeId in enumerate(nodeIds):
+            record = graph.node(nodeId)
+            tables.types.append(record.typeName)
+            tables.xs.append(float(record.x))
+            tables.ys.append(float(record.y))
+            tables.portCounts.append(len(record.ports))
+            if record.parameters:
+                tables.parameters[nodeIndex] = dict(record.parameters)
+            for portId in record.ports:
+                port = graph.port(portId)
+                portIndex[portId] = len(tables.directions)
+                tables.directions.append(port.direction)
+                tables.kinds.append(port.kind)
+                tables.labels.append(port.label)
+        for edgeId in graph.edgeIds():
+            edge = graph.edge(edgeId)
+            tables.sources.append(portIndex[edge.source])
+            tables.destinations.append(portIndex[edge.destination])
+        return tables
+
+    def fill(self, graph=None):
+        """
+        Fills an empty graph with the tables and returns it.
+        """
+        graph = graph if graph is not None else Graph()
+        if graph.nodes or graph.ports or graph.edges:
+            raise GraphError("Graphs can only be loaded into an empty graph.")
+
+        nodes, ports, edges = graph.nodes, graph.ports, graph.edges
+        directions, kinds, labels = self.directions, self.kinds, self.labels
+        parameters = self.parameters
+        portCount  = len(directions)
+        try:
+            portId = 0
+            for nodeId, typeName in enumerate(self.types):
+                record = NodeRecord(typeName, parameters.get(nodeId, {}))
+                record.x = self.xs[nodeId]
+                record.y = self.ys[nodeId]
+                end = portId + self.portCounts[nodeId]
+                if end > portCount:
+                    raise GraphError("Node %r has missing ports." % nodeId)
+                record.ports = list(range(portId, end))
+                for portId in record.ports:
+                    ports.append(PortRecord(nodeId, directions[portId],
+                                            kinds[portId], labels[portId]))
+                portId = end
+                nodes.append(record)
+            if portId != portCount:
+                raise GraphError("The file has ports without a node.")
+
+            for edgeId, (source, destination) in enumerate(
+                    zip(self.sources, self.destinations)):
+                if not (0 <= source < portCount and 0 <= destination < portCount):
+                    raise GraphError("Edge %r references a missing port." %
+                                     edgeId)
+                edges.append(EdgeRecord(source, destination))
+                ports[source].edges.append(edgeId)
+                ports[destination].edges.append(edgeId)
+
+            graph.rebuild()
+        except Exception:
+            del nodes[:], ports[:], edges[:]
+            graph.rebuild()
+            raise
+        return graph
+
+    # ------------------------------------------------------------------
+    # JSON
+    # ------------------------------------------------------------------
+
+    def toJSON(self):
+        nodes = []
+        portIndex = 0
+        for nodeIndex, typeName in enumerate(self.types):
+            end   = portIndex + self.portCounts[nodeIndex]
+            ports = [[self.directions[index], self.kinds[index],
+                      self.labels[index]] for index in range(portIndex, end)]
+            portIndex = end
+            node = {"type": typeName, "x": self.xs[nodeIndex],
+                    "y": self.ys[nodeIndex], "ports": ports}
+            if nodeIndex in self.parameters:
+                node["parameters"] = self.parameters[nodeIndex]
+            nodes.append(node)
+        return {"format": "giza", "version": VERSION, "nodes": nodes,
+                "edges": [list(edge) for edge in zip(self.sources,
+                                                      self.destinations)]}
+
+    @classmethod
+    def fromJSON(cls, document):
+        if document.get("format") != "giza":
+            raise GraphError("Not a giza graph.")
+        if document.get("version", 0) > VERSION:
+            raise GraphError("Unsupported graph version %r." %
+                             document["version"])
+        tables = cls()
+        for nodeIndex, node in enumerate(document["nodes"]):
+            tables.types.append(node["type"])
+            tables.xs.append(float(node.get("x", 0.0)))
+            tables.ys.append(float(node.get("y", 0.0)))
+            tables.portCounts.append(len(node["ports"]))
+            if node.get("parameters"):
+                tables.parameters[nodeIndex] = node["parameters"]
+            for direction, kind, label in node["ports"]:
+                tables.directions.append(direction)
+                tables.kinds.append(kind)
+                tables.labels.append(label)
+        tables.parameters = _decodeParameters(tables.parameters)
+        for source, destination in document["edges"]:
+            tables.sources.append(source)
+            tables.destinations.append(destination)
+        return tables
+
+    # ------------------------------------------------------------------
+    # Binary
+    # ------------------------------------------------------------------
+
+    def toBinary(self):
+        strings = []
+        index   = {}
+        def intern(string):
+            if string not in index:
+                index[string] = len(strings)
+                strings.append(string)
+            return index[string]
+
+        kinds  = [intern(kind or "") for kind in self.kinds]
+        labels = [intern(label or "") for label in self.labels]
+        types  = [intern(typeName) for typeName in self.types]
+
+        nodeCount = len(types)
+        portCount = len(kinds)
+        edgeCount = len(self.sources)
+        blob = u"\0".join(strings).encode("utf-8")
+        sections = [
+            (b"STRS", COUNT.pack(len(strings)) + blob),
+            (b"NODE", COUNT.pack(nodeCount) +
+                      struct.pack("<%dI" % nodeCount, *types) +
+                      struct.pack("<%dd" % nodeCount, *self.xs) +
+                      struct.pack("<%dd" % nodeCount, *self.ys) +
+                      struct.pack("<%dI" % nodeCount, *self.portCounts)),
+            (b"PORT", COUNT.pack(portCount) +
+                      struct.pack("<%dB" % portCount,
+                                  *[DIRECTIONS.index(direction)
+                                    for direction in self.directions]) +
+                      struct.pack("<%dI" % portCount, *kinds) +
+                      struct.pack("<%dI" % portCount, *labels)),
+            (b"EDGE", COUNT.pack(edgeCount) +
+                      struct.pack("<%dI" % edgeCount, *self.sources) +
+                      struct.pack("<%dI" % edgeCount, *self.destinations)),
+            (b"PARM", json.dumps(_encodeParameters(self.parameters),
+                                 separators=(",", ":")).encode("utf-8")),
+        ]
+
+        offset = HEADER.size + SECTION.size * len(sections)
+        header = [HEADER.pack(MAGIC, VERSION, len(sections))]
+        for tag, data in sections:
+            header.append(SECTION.pack(tag, offset, len(data)))
+            offset += len(data)
+        return b"".join(header + [data for tag, data in sections])
+
+    @classmethod
+    def readBinary(cls, stream):
+        """
+        Reads the tables from a binary stream, section by section.
+        """
+        magic, version, count = HEADER.unpack(stream.read(HEADER.size))
+        if magic != MAGIC:
+            raise GraphError("Not a giza graph.")
+        if version > VERSION:
+            raise GraphError("Unsupported graph version %r." % version)
+        index = [SECTION.unpack(stream.read(SECTION.size))
+                 for _ in range(count)]
+
+        position = HEADER.size + SECTION.size * count
+        sections = {}
+        for tag, offset, length in sorted(index, key=lambda entry: entry[1]):
+            if offset != position:
+                stream.seek(offset)
+            sections[tag] = stream.read(length)
+            position = offset + length
+            if len(sections[tag]) != length:
+                raise GraphError("The graph file is truncated.")
+
+        try:
+            tables = cls()
+            data = sections[b"STRS"]
+            strings = data[COUNT.size:].decode("utf-8").split(u"\0")
+
+            data = sections[b"NODE"]
+            n, = COUNT.unpack_from(data)
+            offset = COUNT.size
+            types = struct.unpack_from("<%dI" % n, data, offset)
+            offset += 4 * n
+            tables.xs = list(struct.unpack_from("<%dd" % n, data, offset))
+            offset += 8 * n
+            tables.ys = list(struct.unpack_from("<%dd" % n, data, offset))
+            offset += 8 * n
+            tables.portCounts = struct.unpack_from("<%dI" % n, data, offset)
+            tables.types = [strings[index] for index in types]
+
+            data = sections[b"PORT"]
+            n, = COUNT.unpack_from(data)
+            offset = COUNT.size
+            directions = struct.unpack_from("<%dB" % n, data, offset)
+            offset += n
+            kinds = struct.unpack_from("<%dI" % n, data, offset)
+            offset += 4 * n
+            labels = struct.unpack_from("<%dI" % n, data, offset)
+            tables.directions = [DIRECTIONS[index] for index in directions]
+            tables.kinds  = [strings[index] or None for index in kinds]
+            tables.labels = [strings[index] or None for index in labels]
+
+            data = sections[b"EDGE"]
+            n, = COUNT.unpack_from(data)
+            tables.sources = struct.unpack_from("<%dI" % n, data, COUNT.size)
+            tables.destinations = struct.unpack_from("<%dI" % n, data,
+                                                     COUNT.size + 4 * n)
+
+            tables.parameters = _decodeParameters(
+                json.loads(sections[b"PARM"].decode("utf-8")))
+        except (KeyError, IndexError, struct.error, ValueError) as error:
+            raise GraphError("The graph file is corrupt: %s" % error)
+        return tables
+
+
+def isJSONPath(path):
+    return path.lower().endswith(".json")
+
+def save(graph, path):
+    """
+    Writes a graph to a file, as JSON if its name ends with ``.json`` and in
+    the binary format otherwise.
+    """
+    tables = GraphTables.fromGraph(graph)
+    if isJSONPath(path):
+        with open(path, "w") as stream:
+            json.dump(tables.toJSON(), stream, indent=1, sort_keys=True)
+    else:
+        with open(path, "wb") as stream:
+            stream.write(tables.toBinary())
+
+def load(path, graph=None):
+    """
+    Reads a graph written by :func:`save` into an empty graph, a new one
+    by default, and returns it.
+    """
+    if isJSONPath(path):
+        with open(path, "rb") as stream:
+            document = json.loads(stream.read().decode("utf-8"))
+        tables = GraphTables.fromJSON(document)
+    else:
+        with open(path, "rb") as stream:
+            tables = GraphTables.readBinary(stream)
+    return tables.fill(graph)
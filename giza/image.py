@@ -0,0 +1,168 @@
+import struct
+import sys
+import zlib
+
+import numpy
+
+try:
+    import cairo
+except ImportError:
+    cairo = None
+
+# Byte offsets of the channels within an ARGB32 pixel, which Cairo and Qt
+# store as native-endian 32-bit integers.
+if sys.byteorder == "little":
+    BLUE, GREEN, RED, ALPHA = 0, 1, 2, 3
+else:
+    ALPHA, RED, GREEN, BLUE = 0, 1, 2, 3
+
+
+def strideForWidth(width):
+    """
+    Returns the number of bytes per row Cairo expects for an ARGB32 image.
+    """
+    if cairo is not None:
+        return cairo.ImageSurface.format_stride_for_width(cairo.FORMAT_ARGB32,
+                                                          width)
+    return width * 4
+
+
+class ImageBuffer(object):
+    """
+    ImageBuffer
+
+    The value carried by a :class:`~giza.widgets.PixmapNodePort`: a
+    contiguous NumPy array of bytes laid out as Cairo's ARGB32 format, that
+    is premultiplied alpha, native-endian 32-bit pixels and rows of
+    ``stride`` bytes.
+
+    The same memory can be viewed, without copying, as an ndarray for
+    vectorized operators (:attr:`array`, :attr:`pixels`), as a Cairo image
+    surface to draw on (:meth:`toSurface`) and as a QImage to display
+    (:meth:`toQImage`).
+    """
+
+    def __init__(self, width, height, data=None):
+        self.width  = width
+        self.height = height
+        self.stride = strideForWidth(width)
+        if data is None:
+            data = numpy.zeros((height, self.stride), numpy.uint8)
+        elif data.shape != (height, self.stride) or \
+                not data.flags.c_contiguous or data.dtype != numpy.uint8:
+            raise ValueError("Image data must be a contiguous %dx%d array "
+                             "of bytes." % (height, self.stride))
+        self.data = data
+
+    def __repr__(self):
+        return "ImageBuffer(%d, %d)" % (self.width, self.height)
+
+    @classmethod
+    def fromArray(cls, array, copy=True):
+        """
+        Returns an image holding a (height, width, 4) array of premultiplied
+        bytes in ARGB32 channel order. Without copy, the image shares the
+        array's memory when its layout allows it.
+        """
+        height, width = array.shape[:2]
+        if not copy and array.dtype == numpy.uint8 and \
+                array.flags.c_contiguous and strideForWidth(width) == width * 4:
+            return cls(width, height, array.reshape(height, width * 4))
+        image = cls(width, height)
+        image.array[...] = array
+        return image
+
+    @classmethod
+    def fromSurface(cls, surface):
+        """
+        Returns an image sharing the memory of a Cairo ARGB32 image surface.
+        """
+        surface.flush()
+        width, height = surface.get_width(), surface.get_height()
+        data = numpy.frombuffer(surface.get_data(), numpy.uint8)
+        return cls(width, height, data.reshape(height, surface.get_stride()))
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    @property
+    def shape(self):
+        return (self.height, self.width, 4)
+
+    @property
+    def array(self):
+        """
+        A (height, width, 4) view of the pixel bytes.
+        """
+        rows = self.data[:, :self.width * 4]
+        return rows.reshape(self.height, self.width, 4)
+
+    @property
+    def pixels(self):
+        """
+        A (height, width) view of the pixels as 32-bit ARGB integers.
+        """
+        return self.data.view(numpy.uint32)[:, :self.width]
+
+    def copy(self):
+        return ImageBuffer(self.width, self.height, self.data.copy())
+
+    def toSurface(self):
+        """
+        Returns a Cairo image surface drawing into the image's memory. The
+        image must outlive the surface.
+        """
+        return cairo.ImageSurface.create_for_data(
+            memoryview(self.data), cairo.FORMAT_ARGB32, self.width,
+            self.height, self.stride)
+
+    def toRGBA(self):
+        """
+        Returns a (height, width, 4) array of straight, non-premultiplied
+        RGBA bytes.
+        """
+        array = self.array
+        alpha = array[..., ALPHA].astype(numpy.uint32)
+        rgba  = numpy.empty(array.shape, numpy.uint8)
+        for index, channel in enumerate((RED, GREEN, BLUE)):
+            values = array[..., channel].astype(numpy.uint32) * 255
+            rgba[..., index] = numpy.where(
+                alpha > 0, (values + alpha // 2) // numpy.maximum(alpha, 1), 0)
+        rgba[..., 3] = alpha
+        return rgba
+
+    def savePNG(self, path):
+        """
+        Writes the image to a PNG file, through Cairo when it is available.
+        """
+        if cairo is not None:
+            self.toSurface().write_to_png(path)
+            return
+
+        rgba = self.toRGBA()
+        rows = numpy.zeros((self.height, self.width * 4 + 1), numpy.uint8)
+        rows[:, 1:] = rgba.reshape(self.height, self.width * 4)
+
+        def chunk(kind, data):
+            return (struct.pack(">I", len(data)) + kind + data +
+                    struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff))
+
+        header = struct.pack(">IIBBBBB", self.width, self.height, 8, 6, 0, 0, 0)
+        with open(path, "wb") as stream:
+            stream.write(b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) +
+                         chunk(b"IDAT", zlib.compress(rows.tobytes(), 6)) +
+                         chunk(b"IEND", b""))
+
+    def toQImage(self):
+        """
+        Returns a QImage viewing the image's memory. The QImage keeps a
+        reference to the image.
+        """
+        from PyQt4.QtGui import QImage
+        import sip
+        image = QImage(sip.voidptr(self.data.ctypes.data), self.width,
+                       self.height, self.stride,
+                       QImage.Format_ARGB32_Premultiplied)
+        image.buffer = self
+        return image
@@ -1,5 +1,5 @@
-from giza.widgets import (Node, NodePort, ColorNodePort, ValueNodePort, 
-                         PixmapNodePort)
+from giza.widgets import Node
+from giza.operators.convert import Mix
 
 moduleData = {
     "name"       : "Convert",
@@ -10,17 +10,11 @@ moduleData = {
 class MixNode(Node):
     
     name = "Mix"
-    description = ":D"
+    description = "Blends two colors by a factor."
+    operator = Mix
     
-    def __init__(self):
-        super(MixNode, self).__init__()
+    def __init__(self, *args, **kwargs):
+        super(MixNode, self).__init__(*args, **kwargs)
         
         self.title = "Mix"
         # self.width = 400
-        self.addPort(NodePort(NodePort.OUTPUT, "lol"))
-        self.addPort(ColorNodePort(NodePort.OUTPUT))
-        self.addPort(ColorNodePort(NodePort.OUTPUT, "Vec4f"))
-        self.addPort(ValueNodePort(NodePort.OUTPUT, "Normal"))
-        self.addPort(PixmapNodePort(NodePort.INPUT, "Vec"))
-        self.addPort(PixmapNodePort(NodePort.INPUT, "Vec4f"))
-        self.addPort(ValueNodePort(NodePort.INPUT, "Normal"))
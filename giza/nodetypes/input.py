@@ -1,5 +1,5 @@
-from giza.widgets import (Node, NodePort, ColorNodePort, 
-                         ValueNodePort)
+from giza.widgets import Node
+from giza.operators.input import ColorInput, ValueInput, TimeInput
 
 moduleData = {
     "name"       : "Input",
@@ -10,23 +10,35 @@ moduleData = {
 class ColorInputNode(Node):
     
     name = "Color"
-    description = "Lol this is awesome!"
+    description = "A constant color."
+    operator = ColorInput
     
-    def __init__(self):
-        super(ColorInputNode, self).__init__()
+    def __init__(self, *args, **kwargs):
+        super(ColorInputNode, self).__init__(*args, **kwargs)
         
         self.title = "Color"
-        self.addPort(ColorNodePort(NodePort.OUTPUT, "Color"))
         
 
 class ValueInputNode(Node):
     
     name = "Value"
     description = "A floating point number"
+    operator = ValueInput
     
-    def __init__(self):
-        super(ValueInputNode, self).__init__()
+    def __init__(self, *args, **kwargs):
+        super(ValueInputNode, self).__init__(*args, **kwargs)
         
         self.title = "Value"
         self.width = 200
-        self.addPort(ValueNodePort(NodePort.OUTPUT, "Value"))
\ No newline at end of file
+
+
+class TimeInputNode(Node):
+    
+    name = "Time"
+    description = "The current time of an animation."
+    operator = TimeInput
+    
+    def __init__(self, *args, **kwargs):
+        super(TimeInputNode, self).__init__(*args, **kwargs)
+        
+        self.title = "Time"
@@ -0,0 +1,31 @@
+from giza.widgets import Node
+from giza.operators.pixmap import Checker, Blur
+
+moduleData = {
+    "name"       : "Pixmap",
+    "description": "Pixmap generators and filters for the Node classes.",
+}
+
+
+class CheckerNode(Node):
+    
+    name = "Checker"
+    description = "A checkerboard pattern."
+    operator = Checker
+    
+    def __init__(self, *args, **kwargs):
+        super(CheckerNode, self).__init__(*args, **kwargs)
+        
+        self.title = "Checker"
+        
+
+class BlurNode(Node):
+    
+    name = "Blur"
+    description = "A box blur."
+    operator = Blur
+    
+    def __init__(self, *args, **kwargs):
+        super(BlurNode, self).__init__(*args, **kwargs)
+        
+        self.title = "Blur"
@@ -0,0 +1,7 @@
+from giza.operators.base import (Operator, register, getOperator, registry,
+                                 defaultValues, THREAD, PROCESS)
+
+# Builtin operators register themselves on import.
+import giza.operators.input
+import giza.operators.convert
+import giza.operators.pixmap
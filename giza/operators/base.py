@@ -0,0 +1,156 @@
+from giza.graph import INPUT, OUTPUT
+
+# Execution backends
+THREAD  = "thread"
+PROCESS = "process"
+
+# Values used for unconnected inputs, by port kind
+defaultValues = {
+    None    : None,
+    "color" : (0.0, 0.0, 0.0, 1.0),
+    "value" : 0.0,
+    "pixmap": None,
+}
+
+registry = {}
+
+def register(operatorClass):
+    """
+    Registers an operator class under its class name, which is the type name
+    graph nodes refer to. Can be used as a class decorator.
+    """
+    registry[operatorClass.__name__] = operatorClass
+    return operatorClass
+
+def getOperator(typeName):
+    """
+    Returns the operator class registered under typeName, or None.
+    """
+    return registry.get(typeName)
+
+
+class Operator(object):
+    """
+    Operator
+
+    The headless definition of a node type: the ports it declares, the
+    parameters it takes and the function computing its outputs. Operators do
+    not depend on Qt, so graphs can be evaluated without any widgets.
+
+    Ports are declared as ``(kind, label)`` pairs, where kind is one of
+    ``"color"``, ``"value"``, ``"pixmap"`` or None.
+
+    Operators whose compute function spends its time in code that releases
+    the GIL (Cairo, NumPy) set ``releasesGIL`` so that the scheduler runs
+    them on its thread pool. Pure-Python operators that hold the GIL can set
+    ``backend`` to ``PROCESS`` to run in a pool of worker processes instead.
+
+    Pixmap operators that can compute part of an image set ``tiled`` and
+    implement :meth:`computeRegion`; :meth:`border` tells how far beyond a
+    region their pixmap inputs must reach, and :meth:`bounds` where their
+    pixels lie.
+
+    Operators whose compute function also works when value inputs and
+    parameters are NumPy arrays of samples set ``vectorized``, which lets
+    parameter sweeps evaluate them once for a whole batch.
+
+    Operators list the parameters measured in canvas pixels in
+    ``resolutionParameters``; :meth:`scaleParameters` scales them when the
+    graph is evaluated at a reduced proxy resolution.
+
+    Value and color operators can also describe their outputs as Python
+    expressions with :meth:`expression`, which lets
+    :class:`~giza.engine.compiler.Compiler` fuse chains of them into a single
+    function.
+
+    Sources of time, such as :class:`~giza.operators.input.TimeInput`, name
+    the parameter holding the current frame in ``timeParameter``.
+    """
+
+    name        = "Operator"
+    description = ""
+    backend     = THREAD
+    releasesGIL = False
+    tiled       = False
+    vectorized  = False
+
+    resolutionParameters = []
+    timeParameter        = None
+
+    inputs     = []
+    outputs    = []
+    parameters = {}
+    defaults   = {}
+
+    def ports(self):
+        """
+        Returns the declared ports as ``(direction, kind, label)`` triples.
+        """
+        return ([(INPUT,  kind, label) for kind, label in self.inputs] +
+                [(OUTPUT, kind, label) for kind, label in self.outputs])
+
+    def defaultValue(self, kind, label):
+        """
+        Returns the value of an unconnected input.
+        """
+        if label in self.defaults:
+            return self.defaults[label]
+        return defaultValues.get(kind)
+
+    def compute(self, inputs, parameters):
+        """
+        Computes the outputs from a dictionary of input values and a
+        dictionary of parameters, both keyed by name. Returns a dictionary of
+        output values keyed by output label.
+        """
+        raise NotImplementedError
+
+    def expression(self, inputs, parameters):
+        """
+        Returns the outputs as a dictionary of Python expressions, given the
+        expressions of the inputs and parameters, or None if the operator
+        cannot be expressed that way. Expressions may refer to their
+        arguments more than once.
+        """
+        return None
+
+    def scaleParameters(self, parameters, scale):
+        """
+        Scales the parameters listed in ``resolutionParameters`` in place for
+        an evaluation at a fraction of the full resolution. Whole numbers
+        stay whole and positive ones stay positive.
+        """
+        for name in self.resolutionParameters:
+            value  = parameters[name]
+            scaled = value * scale
+            if isinstance(value, int):
+                scaled = int(round(scaled))
+                if value > 0:
+                    scaled = max(1, scaled)
+            parameters[name] = scaled
+
+    def border(self, parameters):
+        """
+        Returns the number of pixels the pixmap inputs must extend beyond a
+        region for :meth:`computeRegion` to compute it.
+        """
+        return 0
+
+    def bounds(self, parameters, inputBounds):
+        """
+        Returns the region of the canvas covered by the pixmap outputs, given
+        the regions covered by the pixmap inputs keyed by label, or None if
+        the outputs are unbounded. Defaults to the bounds of the first pixmap
+        input.
+        """
+        for kind, label in self.inputs:
+            if kind == "pixmap":
+                return inputBounds.get(label)
+        return None
+
+    def computeRegion(self, inputs, parameters, region):
+        """
+        Computes the pixmap outputs within a region of the canvas. Pixmap
+        inputs cover the region grown by :meth:`border`.
+        """
+        raise NotImplementedError
@@ -0,0 +1,21 @@
+from giza.operators.base import Operator, register
+
+
+@register
+class Mix(Operator):
+
+    name = "Mix"
+    description = "Blends two colors by a factor."
+    vectorized = True
+
+    inputs   = [("color", "A"), ("color", "B"), ("value", "Factor")]
+    outputs  = [("color", "Color")]
+    defaults = {"B": (1.0, 1.0, 1.0, 1.0), "Factor": 0.5}
+
+    def compute(self, inputs, parameters):
+        a, b, factor = inputs["A"], inputs["B"], inputs["Factor"]
+        return {"Color": tuple(x + (y - x) * factor for x, y in zip(a, b))}
+
+    def expression(self, inputs, parameters):
+        return {"Color": "tuple(x + (y - x) * %s for x, y in zip(%s, %s))" % (
+            inputs["Factor"], inputs["A"], inputs["B"])}
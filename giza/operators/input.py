@@ -0,0 +1,60 @@
+from giza.operators.base import Operator, register
+
+
+@register
+class ColorInput(Operator):
+
+    name = "Color"
+    description = "A constant color."
+    vectorized = True
+
+    outputs    = [("color", "Color")]
+    parameters = {"color": (0.5, 0.5, 0.5, 1.0)}
+
+    # A swept color is an (N, 4) array of samples; its transpose gives the
+    # four channels as arrays, as a single color gives them as numbers.
+    def compute(self, inputs, parameters):
+        color = parameters["color"]
+        return {"Color": tuple(getattr(color, "T", color))}
+
+    def expression(self, inputs, parameters):
+        return {"Color": "tuple(getattr(%s, 'T', %s))" % (
+            parameters["color"], parameters["color"])}
+
+
+@register
+class ValueInput(Operator):
+
+    name = "Value"
+    description = "A floating point number."
+    vectorized = True
+
+    outputs    = [("value", "Value")]
+    parameters = {"value": 0.0}
+
+    def compute(self, inputs, parameters):
+        return {"Value": parameters["value"]}
+
+    def expression(self, inputs, parameters):
+        return {"Value": parameters["value"]}
+
+
+@register
+class TimeInput(Operator):
+
+    name = "Time"
+    description = "The current time of an animation."
+    vectorized = True
+    timeParameter = "frame"
+
+    outputs    = [("value", "Time"), ("value", "Frame")]
+    parameters = {"frame": 0, "rate": 24.0}
+
+    def compute(self, inputs, parameters):
+        frame = parameters["frame"]
+        return {"Time": frame / float(parameters["rate"]), "Frame": frame}
+
+    def expression(self, inputs, parameters):
+        return {"Time": "%s / float(%s)" % (parameters["frame"],
+                                            parameters["rate"]),
+                "Frame": parameters["frame"]}
@@ -0,0 +1,104 @@
+import numpy
+
+from giza.image import ImageBuffer, RED, GREEN, BLUE, ALPHA
+from giza.operators.base import Operator, register
+
+
+def pixelFromColor(color):
+    """
+    Returns the premultiplied ARGB32 bytes of an (r, g, b, a) color.
+    """
+    red, green, blue, alpha = [min(max(channel, 0.0), 1.0)
+                               for channel in color]
+    pixel = numpy.empty(4)
+    pixel[RED], pixel[GREEN], pixel[BLUE] = red, green, blue
+    pixel[ALPHA] = 1.0
+    return numpy.round(pixel * alpha * 255)
+
+
+@register
+class Checker(Operator):
+
+    name = "Checker"
+    description = "A checkerboard pattern."
+    tiled = True
+
+    outputs    = [("pixmap", "Image")]
+    resolutionParameters = ["width", "height", "size"]
+    parameters = {
+        "width" : 512,
+        "height": 512,
+        "size"  : 32,
+        "color1": (1.0, 1.0, 1.0, 1.0),
+        "color2": (0.0, 0.0, 0.0, 1.0),
+    }
+
+    def bounds(self, parameters, inputBounds):
+        from giza.engine.tiles import Region
+        return Region(0, 0, parameters["width"], parameters["height"])
+
+    def compute(self, inputs, parameters):
+        return self.computeRegion(inputs, parameters,
+                                  self.bounds(parameters, {}))
+
+    def computeRegion(self, inputs, parameters, region):
+        size    = parameters["size"]
+        rows    = (numpy.arange(region.y, region.bottom) // size)[:, None]
+        columns = (numpy.arange(region.x, region.right) // size)[None, :]
+        odd     = (rows + columns) % 2 == 1
+
+        image = ImageBuffer(region.width, region.height)
+        pixels = image.array
+        pixels[...] = pixelFromColor(parameters["color1"])
+        pixels[odd] = pixelFromColor(parameters["color2"])
+        return {"Image": image}
+
+
+def boxBlur(pixels, radius):
+    """
+    Blurs a (height, width, 4) array with a box of 2 * radius + 1 pixels,
+    shrinking it by radius pixels on every side.
+    """
+    diameter = 2 * radius + 1
+    blurred  = pixels.astype(numpy.float32)
+    for axis in (0, 1):
+        summed  = numpy.cumsum(blurred, axis=axis)
+        padding = [(0, 0)] * 3
+        padding[axis] = (1, 0)
+        summed  = numpy.pad(summed, padding, "constant")
+        length  = summed.shape[axis] - diameter
+        blurred = (summed.take(numpy.arange(diameter, diameter + length), axis) -
+                   summed.take(numpy.arange(0, length), axis)) / diameter
+    return numpy.round(blurred).astype(numpy.uint8)
+
+
+@register
+class Blur(Operator):
+
+    name = "Blur"
+    description = "A box blur."
+    tiled = True
+    releasesGIL = True
+
+    inputs     = [("pixmap", "Image")]
+    outputs    = [("pixmap", "Image")]
+    parameters = {"radius": 4}
+    resolutionParameters = ["radius"]
+
+    def border(self, parameters):
+        return int(parameters["radius"])
+
+    def compute(self, inputs, parameters):
+        image = inputs["Image"]
+        if image is None:
+            return {"Image": None}
+        radius = self.border(parameters)
+        padded = numpy.pad(image.array,
+                           [(radius, radius), (radius, radius), (0, 0)],
+                           "constant")
+        return {"Image": ImageBuffer.fromArray(boxBlur(padded, radius),
+                                               copy=False)}
+
+    def computeRegion(self, inputs, parameters, region):
+        blurred = boxBlur(inputs["Image"].array, self.border(parameters))
+        return {"Image": ImageBuffer.fromArray(blurred, copy=False)}
@@ -0,0 +1,366 @@
+"""
+Renders saved graphs without a display::
+
+    python -m giza.render graph.giza -o "renders/{output}-{variant:04d}.png"
+
+Outputs are named ``NODE:LABEL``, NODE being the node's id in the file. By
+default every pixmap output that feeds nothing is rendered. Parameters are
+set with ``--set NODE.NAME=VALUE``, and ``--vary NODE.NAME=V1,V2,...`` renders
+one variant per value, or per combination of values when given several
+times.
+
+``--frames START:END[:STEP]`` renders an animation. Time enters the graph
+through Time nodes and through parameters keyframed with
+``--keyframe NODE.NAME=FRAME:VALUE``; the nodes that do not depend on time
+are computed once per worker rather than once per frame.
+
+Variants, and chunks of the frame range, are spread across a pool of worker
+processes.
+
+Only the headless packages are imported; PyQt4 is not needed.
+"""
+from __future__ import print_function
+
+import argparse
+import ast
+import itertools
+import multiprocessing
+import os
+import sys
+import time
+
+from giza.graph import OUTPUT, GraphError
+from giza.graph import serialize
+from giza.engine import (Evaluator, ResultCache, DiskCache, Animation,
+                         FrameReport)
+from giza.image import ImageBuffer
+
+
+class RenderError(Exception):
+    pass
+
+
+def parseValue(text):
+    """
+    Parses a parameter value as a Python literal, or keeps it as a string.
+    """
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+def parseAssignment(text):
+    """
+    Parses ``NODE.NAME=VALUE`` into ``(node, name, value text)``.
+    """
+    target, separator, value = text.partition("=")
+    node, dot, name = target.partition(".")
+    if not separator or not dot:
+        raise RenderError("Expected NODE.NAME=VALUE, got %r." % text)
+    try:
+        return int(node), name, value
+    except ValueError:
+        raise RenderError("Node ids are integers, got %r." % node)
+
+def splitValues(text):
+    """
+    Splits a comma separated list of values, keeping tuples whole.
+    """
+    value = parseValue("[%s]" % text)
+    if isinstance(value, list):
+        return value
+    return [parseValue(item) for item in text.split(",")]
+
+def findOutputs(graph, names):
+    """
+    Returns the ids of the output ports named ``NODE:LABEL``, or of the
+    unconnected pixmap outputs.
+    """
+    portIds = []
+    if not names:
+        for nodeId in graph.nodeIds():
+            for portId in graph.outputPorts(nodeId):
+                port = graph.port(portId)
+                if port.kind == "pixmap" and not port.edges:
+                    portIds.append(portId)
+        return portIds
+
+    for name in names:
+        node, separator, label = name.partition(":")
+        try:
+            nodeId = int(node)
+        except ValueError:
+            raise RenderError("Outputs are named NODE:LABEL, got %r." % name)
+        if not graph.hasNode(nodeId):
+            raise RenderError("There is no node %r." % nodeId)
+        if label:
+            portId = graph.findPort(nodeId, label, OUTPUT)
+        else:
+            outputs = graph.outputPorts(nodeId)
+            portId  = outputs[0] if outputs else None
+        if portId is None:
+            raise RenderError("Node %r has no output %r." % (nodeId, label))
+        portIds.append(portId)
+    return portIds
+
+def parseFrames(text):
+    """
+    Parses ``START:END[:STEP]``, END included, into a list of frames.
+    """
+    try:
+        numbers = [int(number) for number in text.split(":")]
+    except ValueError:
+        numbers = []
+    if len(numbers) not in (2, 3) or (len(numbers) == 3 and numbers[2] <= 0):
+        raise RenderError("Expected frames as START:END[:STEP], got %r." %
+                          text)
+    step = numbers[2] if len(numbers) == 3 else 1
+    return list(range(numbers[0], numbers[1] + 1, step))
+
+def parseKeyframe(text):
+    """
+    Parses ``NODE.NAME=FRAME:VALUE`` into ``(node, name, frame, value)``.
+    """
+    nodeId, name, value = parseAssignment(text)
+    frame, separator, value = value.partition(":")
+    try:
+        return nodeId, name, int(frame), parseValue(value)
+    except ValueError:
+        raise RenderError("Expected NODE.NAME=FRAME:VALUE, got %r." % text)
+
+def chunks(frames, count):
+    """
+    Splits frames into at most count contiguous runs.
+    """
+    size = max(1, -(-len(frames) // max(1, count)))
+    return [frames[index:index + size]
+            for index in range(0, len(frames), size)]
+
+def variants(sweeps):
+    """
+    Returns one dictionary of ``(node, name): value`` per combination of the
+    swept values.
+    """
+    keys = [key for key, values in sweeps]
+    return [dict(zip(keys, combination)) for combination in
+            itertools.product(*[values for key, values in sweeps])]
+
+
+# ----------------------------------------------------------------------
+# Workers
+# ----------------------------------------------------------------------
+
+_worker = None
+
+class RenderWorker(object):
+    """
+    Holds a loaded graph and its evaluator in a worker process.
+    """
+
+    def __init__(self, path, parameters, keyframes, cacheDirectory):
+        self.graph = serialize.load(path)
+        for nodeId, name, value in parameters:
+            self.graph.setParameter(nodeId, name, value)
+        diskCache = DiskCache(cacheDirectory) if cacheDirectory else None
+        self.evaluator = Evaluator(self.graph, ResultCache(), diskCache)
+        self.animation = Animation(self.evaluator)
+        for nodeId, name, frame, value in keyframes:
+            self.animation.setKeyframe(nodeId, name, frame, value)
+
+    def render(self, index, variant, portIds, pattern, frames=None):
+        """
+        Evaluates the outputs for a variant, at each of the frames if any,
+        and writes them. Returns the variant index, a list of written files
+        or printed values, the time spent per node, an error message or None
+        and the number of frames rendered.
+        """
+        graph    = self.graph
+        written  = []
+        rendered = 0
+        report   = FrameReport()
+        try:
+            for (nodeId, name), value in variant.items():
+                graph.setParameter(nodeId, name, value)
+            sources = self.animation.timeSources()
+            for frame in frames or [None]:
+                values = self.animation.renderFrame(frame, portIds, report,
+                                                    sources)
+                self.write(portIds, values, pattern, index, frame, written)
+                rendered += 1
+        except Exception as error:
+            return index, written, report.durations, "%s: %s" % (
+                type(error).__name__, error), rendered
+        return index, written, report.durations, None, rendered
+
+    def write(self, portIds, values, pattern, index, frame, written):
+        """
+        Writes pixmap values as PNGs and lists the others in written.
+        """
+        graph = self.graph
+        for portId, value in zip(portIds, values):
+            port   = graph.port(portId)
+            output = "%d-%s" % (port.node, port.label)
+            if not isinstance(value, ImageBuffer):
+                if frame is not None:
+                    output = "%s@%d" % (output, frame)
+                written.append("%s = %r" % (output, value))
+                continue
+            path = pattern.format(output=output, variant=index,
+                                  frame=frame or 0, node=port.node,
+                                  label=port.label)
+            directory = os.path.dirname(path)
+            if directory and not os.path.isdir(directory):
+                try:
+                    os.makedirs(directory)
+                except OSError:
+                    if not os.path.isdir(directory):
+                        raise
+            value.savePNG(path)
+            written.append(path)
+
+def _initialize(path, parameters, keyframes, cacheDirectory):
+    global _worker
+    _worker = RenderWorker(path, parameters, keyframes, cacheDirectory)
+
+def _render(arguments):
+    return _worker.render(*arguments)
+
+
+# ----------------------------------------------------------------------
+# Command line
+# ----------------------------------------------------------------------
+
+def parseArguments(arguments):
+    parser = argparse.ArgumentParser(
+        prog="python -m giza.render",
+        description="Renders the outputs of a saved giza graph.")
+    parser.add_argument("graph", help="a graph file written by giza")
+    parser.add_argument("--output", action="append", default=[],
+                        metavar="NODE:LABEL",
+                        help="an output port to render; by default every "
+                             "unconnected pixmap output")
+    parser.add_argument("-o", "--pattern", default=None,
+                        help="the path of the written images, formatted with "
+                             "output, node, label, variant and frame "
+                             "(default: {output}-{variant:04d}.png, with "
+                             "-{frame:04d} added for animations)")
+    parser.add_argument("--set", action="append", default=[],
+                        metavar="NODE.NAME=VALUE",
+                        help="sets a parameter for every variant")
+    parser.add_argument("--vary", action="append", default=[],
+                        metavar="NODE.NAME=V1,V2,...",
+                        help="renders a variant per value")
+    parser.add_argument("--frames", metavar="START:END[:STEP]",
+                        help="renders each variant at every frame of a range")
+    parser.add_argument("--keyframe", action="append", default=[],
+                        metavar="NODE.NAME=FRAME:VALUE",
+                        help="animates a parameter; values are interpolated "
+                             "between keyframes")
+    parser.add_argument("-j", "--processes", type=int, default=None,
+                        help="the number of worker processes "
+                             "(default: one per CPU)")
+    parser.add_argument("--cache", metavar="DIRECTORY",
+                        help="an on-disk pixmap cache shared by the workers")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="only report failures")
+    return parser.parse_args(arguments)
+
+def render(options, stream=sys.stderr):
+    """
+    Renders the variants and frames described by parsed options and returns
+    the number of failed jobs.
+    """
+    parameters = []
+    for text in options.set:
+        nodeId, name, value = parseAssignment(text)
+        parameters.append((nodeId, name, parseValue(value)))
+    sweeps = []
+    for text in options.vary:
+        nodeId, name, value = parseAssignment(text)
+        sweeps.append(((nodeId, name), splitValues(value)))
+    keyframes = [parseKeyframe(text) for text in options.keyframe]
+    frames    = parseFrames(options.frames) if options.frames else None
+
+    graph = serialize.load(options.graph)
+    for nodeId in [parameter[0] for parameter in parameters] + \
+                  [key[0] for key, values in sweeps] + \
+                  [keyframe[0] for keyframe in keyframes]:
+        if not graph.hasNode(nodeId):
+            raise RenderError("There is no node %r." % nodeId)
+    portIds = findOutputs(graph, options.output)
+    if not portIds:
+        raise RenderError("The graph has nothing to render.")
+
+    pattern = options.pattern
+    if pattern is None:
+        pattern = "{output}-{variant:04d}.png"
+        if frames is not None:
+            pattern = "{output}-{variant:04d}-{frame:04d}.png"
+
+    # Frames are split into contiguous runs so that each worker computes the
+    # time-invariant nodes once per run.
+    allVariants = variants(sweeps)
+    processes   = options.processes or multiprocessing.cpu_count()
+    runs        = [None]
+    if frames is not None:
+        runs = chunks(frames, -(-processes // len(allVariants)))
+    jobs = [(index, variant, portIds, pattern, run)
+            for index, variant in enumerate(allVariants) for run in runs]
+    processes   = min(processes, len(jobs))
+    initializer = (options.graph, parameters, keyframes, options.cache)
+
+    start = time.time()
+    if processes > 1:
+        pool = multiprocessing.Pool(processes, _initialize, initializer)
+        try:
+            results = pool.imap_unordered(_render, jobs)
+            results = list(report(results, options.quiet, stream))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        worker  = RenderWorker(*initializer)
+        results = list(report((worker.render(*job) for job in jobs),
+                              options.quiet, stream))
+    elapsed = time.time() - start
+
+    failures  = [result for result in results if result[3] is not None]
+    rendered  = sum(result[4] for result in results)
+    nodeTimes = {}
+    for index, written, durations, error, count in results:
+        for nodeId, duration in durations.items():
+            nodeTimes[nodeId] = nodeTimes.get(nodeId, 0.0) + duration
+
+    if not options.quiet:
+        print("Rendered %d frames of %d variants in %.2fs (%.2f frames per "
+              "second) with %d processes." % (
+              rendered, len(allVariants), elapsed,
+              rendered / elapsed if elapsed else 0.0, processes), file=stream)
+        for nodeId in sorted(nodeTimes, key=nodeTimes.get, reverse=True):
+            print("  node %5d %-16s %8.3fs total, %8.4fs per frame" % (
+                nodeId, graph.nodeType(nodeId), nodeTimes[nodeId],
+                nodeTimes[nodeId] / max(1, rendered)), file=stream)
+    return len(failures)
+
+def report(results, quiet, stream):
+    for result in results:
+        index, written, durations, error, count = result
+        if error is not None:
+            print("Variant %d failed: %s" % (index, error), file=stream)
+        elif not quiet:
+            for line in written:
+                print(line, file=stream)
+        yield result
+
+def main(arguments=None):
+    options = parseArguments(sys.argv[1:] if arguments is None else arguments)
+    try:
+        failures = render(options)
+    except (RenderError, GraphError, IOError, OSError) as error:
+        print("giza.render: %s" % error, file=sys.stderr)
+        return 2
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+from PyQt4.QtCore import QObject, QThread, QTimer, pyqtSignal, pyqtSlot
+
+from giza.graph import NODE_ADDED, NODE_REMOVED, PARAMETER_CHANGED
+from giza.engine import EvaluationJob, EvaluationCancelled
+
+class EvaluationWorker(QObject):
+    """
+    EvaluationWorker
+
+    Runs evaluation jobs on the thread it lives in.
+    """
+    finished = pyqtSignal(object)
+    failed   = pyqtSignal(object, object)
+
+    @pyqtSlot(object)
+    def run(self, job):
+        try:
+            job.run()
+        except EvaluationCancelled:
+            pass
+        except Exception as error:
+            self.failed.emit(job, error)
+            return
+        self.finished.emit(job)
+
+class AsyncEvaluation(QObject):
+    """
+    AsyncEvaluation
+
+    Evaluates output ports on a background thread so that the view stays
+    responsive while nodes compute. Results are delivered on the GUI thread
+    through the queued ``resultsReady`` signal, as a dictionary of values
+    keyed by port id.
+
+    Requests made within the same event loop iteration are coalesced into a
+    single evaluation, and only one job runs at a time. Changing the graph
+    cancels the running job if it computes any node the change affects; the
+    outputs it already computed are kept when they are still current, and
+    the latest request is evaluated again once it stops.
+    """
+    resultsReady = pyqtSignal(dict)
+    failed       = pyqtSignal(object)
+    submitted    = pyqtSignal(object)
+
+    def __init__(self, evaluator, parent=None):
+        super(AsyncEvaluation, self).__init__(parent)
+
+        self.evaluator  = evaluator
+        self.graph      = evaluator.graph
+        self.portIds    = []
+        self.job        = None
+        self.pending    = False
+        self.generation = 0
+        self.stopped    = False
+
+        self.thread = QThread()
+        self.worker = EvaluationWorker()
+        self.worker.moveToThread(self.thread)
+        self.submitted.connect(self.worker.run)
+        self.worker.finished.connect(self.jobFinished)
+        self.worker.failed.connect(self.jobFailed)
+        self.thread.start()
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.submit)
+
+        self.graph.addListener(self.graphChanged)
+
+    def shutdown(self):
+        """
+        Cancels the running job and stops the thread. Results of jobs that 
+        finish meanwhile, and are still queued, are dropped.
+        """
+        self.stopped = True
+        self.graph.removeListener(self.graphChanged)
+        self.timer.stop()
+        if self.job is not None:
+            self.job.cancel()
+        self.thread.quit()
+        self.thread.wait()
+
+    def isBusy(self):
+        return self.job is not None
+
+    def request(self, portIds):
+        """
+        Schedules the evaluation of output ports, replacing any earlier
+        request that has not started yet.
+        """
+        self.portIds = list(portIds)
+        self.pending = True
+        self.timer.start()
+
+    def graphChanged(self, event, *args):
+        job = self.job
+        if job is None or event == NODE_ADDED:
+            return
+        if event == PARAMETER_CHANGED or event == NODE_REMOVED:
+            nodeId = args[0]
+        else:
+            nodeId = self.graph.portNode(args[2])
+        if job.affects(nodeId, self.graph):
+            job.cancel()
+
+    def submit(self):
+        if self.stopped or self.job is not None or not self.pending:
+            return
+        self.pending = False
+        portIds = [portId for portId in self.portIds
+                   if self.graph.hasPort(portId)]
+        self.generation += 1
+        job = EvaluationJob(self.evaluator, portIds, self.generation)
+        if not job.steps:
+            self.resultsReady.emit(job.values)
+            return
+        self.job = job
+        self.submitted.emit(job)
+
+    @pyqtSlot(object)
+    def jobFinished(self, job):
+        self.job = None
+        if self.stopped:
+            return
+        job.apply(self.evaluator)
+        if job.complete and not job.isCancelled():
+            self.resultsReady.emit(job.values)
+        else:
+            # Superseded; evaluate the latest request again.
+            self.pending = True
+        if self.pending:
+            self.timer.start()
+
+    @pyqtSlot(object, object)
+    def jobFailed(self, job, error):
+        self.job = None
+        if self.stopped:
+            return
+        job.apply(self.evaluator)
+        self.failed.emit(error)
+        if self.pending:
+            self.timer.start()
@@ -1,14 +1,50 @@
 from PyQt4.QtGui import *
 from PyQt4.QtCore import *
+from giza.graph import Graph
+from shadow import drawShadow
+from style import defaultStyle
 import random
 import time
 
+# Level of detail thresholds, in device pixels per scene unit. Below 
+# LOD_TEXT labels are not drawn, below LOD_DETAIL neither are sockets, 
+# gradients, rounded corners and shadows, and below LOD_MINIMAL nodes are 
+# flat rectangles and connections straight lines.
+LOD_TEXT    = 0.5
+LOD_DETAIL  = 0.35
+LOD_MINIMAL = 0.2
+
+def socketIndex(item):
+    """
+    Returns the SocketIndex of the item's scene, if it has one.
+    """
+    return getattr(item.scene(), "socketIndex", None)
+
+def levelOfDetail(painter):
+    """
+    Returns the scale an item is being painted at.
+    """
+    return QStyleOptionGraphicsItem.levelOfDetailFromTransform(
+        painter.worldTransform())
+
 class Node(QGraphicsWidget):
     """
     Node
+    
+    Node types set ``operator`` to the headless operator class (see 
+    :mod:`giza.operators`) that computes them; the node's ports are then 
+    created from the ports the operator declares.
+    
+    Given a nodeId, the node displays a node that already exists in the 
+    graph, such as one read from a file, along with its ports and position.
+    
+    Nodes created without a graph keep their record in a graph of their own
+    until they are added to a scene, and then move into the scene's graph.
     """
     
-    def __init__(self):
+    operator = None
+    
+    def __init__(self, graph=None, nodeId=None):
         super(Node, self).__init__()
         
         # QGraphicsItem Flags
@@ -17,7 +53,13 @@ class Node(QGraphicsWidget):
         self.setFlag(QGraphicsItem.ItemSendsGeometryChanges)
         
         # Nodegraph Definitions
-        self.ports = []
+        self.graph  = graph or Graph()
+        if nodeId is None:
+            typeName = (self.operator or type(self)).__name__
+            nodeId   = self.graph.addNode(typeName)
+        self.nodeId = nodeId
+        self.graph.node(self.nodeId).data = self
+        self.ports  = []
         
         # Layout
         layout = QGraphicsLinearLayout(Qt.Vertical)
@@ -33,38 +75,30 @@ class Node(QGraphicsWidget):
         self.handleBar = NodeHandleBar()
         self.layout().addItem(self.handleBar)
 
-        # Colors
-        self.backgroundColor     = QColor( 120, 120, 120, 230 )
-        self.normalBorderColor   = QColor(  15,  15,  15,  64 )
-        self.selectedBorderColor = QColor( 255, 191,   0, 102 )
-        self.textColor           = QColor(  30,  30,  30, 255 )
-        self.shadowColor         = QColor(   0,   0,   0, 255 )
-        self.selectedShadowColor = QColor( 100, 100, 100, 255 )
-
         # Settings
         self.title = "Node"
         self.shadowBlurRadius = 20
         self.setMinimumWidth(150)
         self.setPreferredSize(200, -1)
 
-        # Drop Shadow
-        self.shadow = QGraphicsDropShadowEffect()
-        self.shadow.setBlurRadius(self.shadowBlurRadius)
-        self.shadow.setOffset(0, 0)
-        self.shadow.setColor(self.shadowColor)
-        self.setGraphicsEffect(self.shadow)
-        
-        # Painter Definitions
-        self.pen   = QPen()
-        self.brush = QBrush(Qt.SolidPattern)
-        self.font  = QFont()
-        self.pen.setWidth(1)
-        self.pen.setColor(self.normalBorderColor)
-        self.brush.setColor(self.backgroundColor)
-        self.font.setPointSize(10)
+        # Drop Shadow, drawn from a cached pixmap (see shadow.py)
+        self.shadowEnabled = True
         
+        # Colors, pens and brushes come from the shared style (see style.py)
+        # according to the node's state.
+        self.selected = False
         self.resizing = False
         
+        # Profile Overlay
+        self.profile = None
+        self.heat    = 0.0
+        
+        if self.graph.nodePorts(self.nodeId):
+            self.addGraphPorts()
+            self.setPos(*self.graph.nodePosition(self.nodeId))
+        elif self.operator:
+            self.addOperatorPorts()
+        
     def itemChange(self, change, value):
         """
         Overrides QGraphicsItem's boundingRect() virtual public function to 
@@ -73,47 +107,141 @@ class Node(QGraphicsWidget):
         if change == QGraphicsItem.ItemSelectedHasChanged:
             self.setSelected(value.toBool())
         if change == QGraphicsItem.ItemPositionHasChanged:
+            position = self.pos()
+            self.graph.setNodePosition(self.nodeId, position.x(), position.y())
             self.updateConnections()
+        if change == QGraphicsItem.ItemSceneChange:
+            # Leaving the current scene
+            index = socketIndex(self)
+            if index is not None:
+                [index.remove(port) for port in self.ports]
+        if change == QGraphicsItem.ItemSceneHasChanged:
+            graph = getattr(self.scene(), "graph", None)
+            if graph is not None and graph is not self.graph:
+                self.moveToGraph(graph)
+            index = socketIndex(self)
+            if index is not None:
+                index.invalidate(self.ports)
             
         return super(Node, self).itemChange(change, value)
     
+    def moveToGraph(self, graph):
+        """
+        Moves the node's record and ports to another graph, removing them 
+        from the current one. The node's connections are removed.
+        """
+        [port.removeConnections() for port in self.ports]
+        record = self.graph.node(self.nodeId)
+        nodeId = graph.addNode(record.typeName, record.parameters)
+        graph.setNodePosition(nodeId, record.x, record.y)
+        graph.node(nodeId).data = self
+        
+        ports = dict((port.portId, port) for port in self.ports)
+        for portId in record.ports:
+            port   = ports[portId]
+            source = self.graph.port(portId)
+            port.portId = graph.addPort(nodeId, source.direction, source.kind,
+                                        source.label)
+            port.graph  = graph
+            graph.port(port.portId).data = port
+        
+        self.graph.removeNode(self.nodeId)
+        self.graph  = graph
+        self.nodeId = nodeId
+        
     def setGeometry(self, rect):
         super(Node, self).setGeometry(rect)
         self.updateConnections()
         
     def updateConnections(self):
+        """
+        Brings the connections and indexed sockets up to date after the 
+        node moved or changed shape.
+        """
         [port.updateConnections() for port in self.ports]
+        index = socketIndex(self)
+        if index is not None:
+            index.invalidate(self.ports)
         
     def boundingRect(self):
         """
         Overrides QGraphicsItem's boundingRect() virtual public function and 
         returns a valid bounding rect based on calculated width and height.
         """
-        return QRectF(QPointF(0, 0), self.geometry().size())#.adjusted(
-            #-self.shadowBlurRadius, -self.shadowBlurRadius, 
-            # self.shadowBlurRadius,  self.shadowBlurRadius)
+        return QRectF(QPointF(0, 0), self.geometry().size()).adjusted(
+            -self.shadowBlurRadius, -self.shadowBlurRadius, 
+             self.shadowBlurRadius,  self.shadowBlurRadius)
 
     def paint(self, painter, option, widget):
         """
         Overrides QGraphicsItem's paint() virtual public function.
         """
+        style = defaultStyle()
+        state = ".selected" if self.selected else ""
+        
+        lod = levelOfDetail(painter)
+        if lod < LOD_MINIMAL:
+            # A flat rectangle, in the heat color when profiled
+            color = style.color("node.background")
+            if self.profile is not None:
+                color = self.heatColor()
+            painter.fillRect(self.rect(), color)
+            return
+        
+        # Draw drop shadow
+        if lod >= LOD_DETAIL and self.shadowEnabled:
+            drawShadow(painter, self.rect(), style.color("node.shadow" + state),
+                       self.shadowBlurRadius, 4)
+        
         # Draw base rectangle
-        painter.setPen(self.pen)
-        painter.setBrush(self.brush)
-        painter.drawRoundedRect(self.boundingRect(), 4, 4)
+        painter.setPen(style.pen("node.border" + state))
+        painter.setBrush(style.brush("node.background"))
+        if lod < LOD_DETAIL:
+            painter.drawRect(self.rect())
+        else:
+            painter.drawRoundedRect(self.rect(), 4, 4)
+        
+        # Draw profile heat border
+        if self.profile is not None:
+            heatPen = QPen(self.heatColor(), 3)
+            painter.setPen(heatPen)
+            painter.setBrush(Qt.NoBrush)
+            painter.drawRoundedRect(self.rect().adjusted(1, 1, -1, -1), 4, 4)
+    
+    def heatColor(self):
+        """
+        Returns the overlay color for the node's heat, from green for the 
+        fastest nodes to red for the slowest.
+        """
+        return QColor.fromHsvF((1.0 - self.heat) / 3.0, 0.9, 0.9, 0.9)
+    
+    def setProfile(self, profile, heat=0.0):
+        """
+        Shows a NodeProfile (see :mod:`giza.engine.profiler`) on the node, 
+        heat being its share of the slowest node's time, or hides it when 
+        profile is None.
+        """
+        self.profile = profile
+        self.heat    = heat
+        if profile is None:
+            self.titleBar.timing = ""
+            self.setToolTip("")
+        else:
+            self.titleBar.timing = "%.1f ms" % (profile.lastTime * 1000)
+            self.setToolTip(
+                "%d calls, %.1f ms total, %.0f%% cache hits, %d bytes" % (
+                profile.calls, profile.time * 1000, profile.hitRate * 100, 
+                profile.bytes))
+        self.titleBar.update()
+        self.update()
 
     def setSelected(self, selected):
         """
-        Changes visual parameters on a selection or deselection event.
+        Switches to the selected or normal style on a selection or 
+        deselection event.
         """
-        if selected:
-            # Node selected
-            self.shadow.setColor(self.selectedShadowColor)
-            self.pen.setColor(self.selectedBorderColor)
-        else:
-            # Node deselected
-            self.shadow.setColor(self.shadowColor)
-            self.pen.setColor(self.normalBorderColor)
+        self.selected = selected
+        self.update()
     
     def handleMousePressEvent(self, event):
         self.resizing = True
@@ -136,20 +264,66 @@ class Node(QGraphicsWidget):
     def title(self, title):
         self.titleBar.title = title
 
-    def addPort(self, port):
+    def addPort(self, port, portId=None):
         """
-        Adds a port.
+        Adds a port, or displays an existing port of the node if a portId is
+        given.
         """
         self.ports.append(port)
+        port.graph  = self.graph
+        if portId is None:
+            portId = self.graph.addPort(self.nodeId, port.direction, 
+                                        port.kind, port.label)
+        port.portId = portId
+        self.graph.port(port.portId).data = port
         self.layout().insertItem(1, port)
         #port.setParentItem(self)
         
+    def addOperatorPorts(self):
+        """
+        Adds the ports declared by the node's operator, inputs first.
+        """
+        # Ports are inserted right below the title bar, so add them in 
+        # reverse to keep the declared order.
+        for direction, kind, label in reversed(self.operator().ports()):
+            self.addPort(portClasses[kind](direction, label))
+    
+    def addGraphPorts(self):
+        """
+        Adds a port for each of the ports the node has in the graph.
+        """
+        for portId in reversed(self.graph.nodePorts(self.nodeId)):
+            record = self.graph.port(portId)
+            port   = portClasses.get(record.kind, NodePort)(record.direction, 
+                                                            record.label)
+            self.addPort(port, portId)
+    
+    def setParameter(self, name, value):
+        """
+        Sets a parameter of the node in its graph.
+        """
+        self.graph.setParameter(self.nodeId, name, value)
+    
+    def parameter(self, name):
+        """
+        Returns a parameter of the node, falling back on the operator's 
+        default.
+        """
+        default = self.operator.parameters.get(name) if self.operator else None
+        return self.graph.parameter(self.nodeId, name, default)
+        
     def removePort(self, port):
         """
         Removes a port.
         """
         self.ports.remove(port)
+        index = socketIndex(self)
+        if index is not None:
+            index.remove(port)
         port.remove()
+        self.graph.removePort(port.portId)
+        port.graph  = None
+        port.portId = None
     
     @property
     def inputPorts(self):
@@ -179,13 +353,10 @@ class Node(QGraphicsWidget):
         
         Getting the immediate ancestors of [A] would return [[B], [C]].
         """
-        ancestors = []
-        for port in self.inputPorts:
-            for port in port.connectedPorts:
-                ancestors.append(port.parentItem())
-        return ancestors
+        return [self.graph.node(nodeId).data 
+                for nodeId in self.graph.immediateAncestors(self.nodeId)]
     
-    def getAllAncestors(self, source=None):
+    def getAllAncestors(self):
         """
         Returns a list of the nodes ancestors.
         
@@ -197,35 +368,39 @@ class Node(QGraphicsWidget):
             [E]       > [A]
                   [C]
         
-        Getting the ancestors of [A] would return [[B], [C], [D], [E]].""" 
-        if not source:
-            source = self
-        
-        ancestors = []
-        for ancestor in self.getImmediateAncestors():
-            # Check to make sure that the iterator is not referencing in a 
-            # cyclic loop
-            if ancestor not in ancestors and ancestor is not source:
-                ancestors.append(ancestor)
-                ancestors.extend(ancestor.getAllAncestors(source))
-                
-        return ancestors
+        Getting the ancestors of [A] would return [[B], [C], [D], [E]], 
+        ordered by node id, lowest first.
+
+        The ancestors are looked up in the graph's reachability index, so
+        repeated calls are cheap."""
+        return [self.graph.node(nodeId).data
+                for nodeId in self.graph.getAllAncestors(self.nodeId)]
+
+    def getAllDescendants(self):
+        """
+        Returns a list of the nodes descendants.
+
+        Retrieves the nodes that are implicitly and explicitly connected to any
+        of the node's output ports. With the node graph shown in
+        :meth:`getAllAncestors`, getting the descendants of [D] would return
+        [[B], [A]], ordered by node id, lowest first.
+        """
+        return [self.graph.node(nodeId).data
+                for nodeId in self.graph.getAllDescendants(self.nodeId)]
+
+    def isUpstreamOf(self, node):
+        """
+        Returns True if the given node is a descendant of this node.
+        """
+        return self.graph.isReachable(self.nodeId, node.nodeId)
 
 class NodeTitleBar(QGraphicsWidget):
     def __init__(self):
         super(NodeTitleBar, self).__init__()
 
-        # Colors
-        self.textColor = QColor(30, 30, 30, 255)
-
-        # Painter Definitions
-        self.pen = QPen(self.textColor)
-        self.font = QFont()
-        self.pen.setWidth(1)
-        self.font.setPointSize(10)
-
         # Settings
-        self.title = ""
+        self.title  = ""
+        self.timing = ""
 
         self.setMinimumSize(QSizeF(-1, 30))
         self.setPreferredSize(QSizeF(-1, 30))
@@ -234,10 +409,20 @@ class NodeTitleBar(QGraphicsWidget):
         """
         Overrides QGraphicsItem's paint() virtual public function.
         """
+        if levelOfDetail(painter) < LOD_TEXT:
+            return
+        
         # Draw title text
-        painter.setPen(self.pen)
-        painter.setFont(self.font)
+        style = defaultStyle()
+        painter.setPen(style.pen("node.text"))
+        painter.setFont(style.font("font.title"))
         painter.drawText(10, 20, self.title)
+        
+        # Draw profile timing
+        if self.timing:
+            textRect = self.boundingRect().adjusted(10, 0, -10, 0)
+            painter.drawText(textRect, Qt.AlignRight | Qt.AlignVCenter, 
+                             self.timing)
 
     def boundingRect(self):
         return QRectF(QPointF(0, 0), self.geometry().size())
@@ -254,16 +439,9 @@ class NodeTitleBar(QGraphicsWidget):
 class NodeHandleBar(QGraphicsWidget):
     def __init__(self):
         super(NodeHandleBar, self).__init__()
-
-        # Colors
-        self.textColor = QColor(30, 30, 30, 100)
         
         self.size = 20
         
-        # Painter Definitions
-        self.pen = QPen(self.textColor)
-        self.pen.setWidth(1)
-        
         self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
         self.setPreferredSize(QSizeF(-1, self.size))
         
@@ -271,8 +449,11 @@ class NodeHandleBar(QGraphicsWidget):
         """
         Overrides QGraphicsItem's paint() virtual public function.
         """
+        if levelOfDetail(painter) < LOD_TEXT:
+            return
+        
         # PAint the handle
-        painter.setPen(self.pen)
+        painter.setPen(defaultStyle().pen("node.handle"))
         
         rect       = self.boundingRect()
         topRight   = rect.topRight()   - QPointF(4, 0)
@@ -317,7 +498,7 @@ class NodeConnection(QGraphicsPathItem):
     """
     NodeConnection
     """
-    def __init__(self, sourcePort=None, destinationPort=None):
+    def __init__(self, sourcePort=None, destinationPort=None, edgeId=None):
         super(NodeConnection, self).__init__()
         
         self.adapter      = AnimationAdapter(self)
@@ -327,15 +508,20 @@ class NodeConnection(QGraphicsPathItem):
         self.active       = False
         self.source       = sourcePort
         self.destination  = destinationPort
-        self.pen          = QPen(QColor(30, 30, 30, 200), 2)
+        self.edgeId       = None
         self.pendingStart = None
         self.pendingEnd   = None
 
-        self.setPen(self.pen)
+        # The item's pen only sizes its bounding rect; paint() draws with 
+        # the shared style's.
+        self.setPen(defaultStyle().pen("connection", 2))
         self.setZValue(-1)
         
         if sourcePort and destinationPort:
-            self.connect(sourcePort, destinationPort)
+            if edgeId is None:
+                self.connect(sourcePort, destinationPort)
+            else:
+                self.attach(sourcePort, destinationPort, edgeId)
 
         # Animations
         self.fadeInAnimation = QPropertyAnimation(self.adapter, "opacity")
@@ -356,6 +542,34 @@ class NodeConnection(QGraphicsPathItem):
         self.setOpacity(0.5)
         self.fadeIn()
     
+    def paint(self, painter, option, widget):
+        """
+        Overrides QGraphicsPathItem's paint() to draw with the style's pen, 
+        and zoomed out connections with thin aliased lines, straight below 
+        LOD_MINIMAL.
+        """
+        style = defaultStyle()
+        path  = self.path()
+        if path.isEmpty():
+            return
+        
+        lod = levelOfDetail(painter)
+        if lod >= LOD_DETAIL:
+            painter.setPen(style.pen("connection", 2))
+            painter.setBrush(Qt.NoBrush)
+            painter.drawPath(path)
+            return
+        
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        # A zero width pen is a cosmetic one pixel pen.
+        painter.setPen(style.pen("connection", 0))
+        if lod < LOD_MINIMAL:
+            painter.drawLine(path.pointAtPercent(0), path.pointAtPercent(1))
+        else:
+            painter.drawPath(path)
+        painter.restore()
+    
     def fadeOut(self):
         self.fadeOutAnimation.start()
 
@@ -439,31 +653,13 @@ class NodeConnection(QGraphicsPathItem):
         if not isinstance(obj1, NodePort) or not isinstance(obj2, NodePort):
             return False
 
-        # The ports cannot be the same.
-        if obj1 is obj2:
-            return False
-
-        # The ports cannot have the same parent node.
-        if obj1.parentItem() is obj2.parentItem():
-            return False
-
-        # The ports must have opposite directions.
-        if obj1.direction is obj2.direction:
-            return False
-
-        # The connection cannot be a cyclic loop.
-        if obj1.isInput():
-            if obj1.parentItem() in obj2.parentItem().getAllAncestors():
-                return False
-        else:
-            if obj2.parentItem() in obj1.parentItem().getAllAncestors():
-                return False
-
-        # A connection cannot be a duplicate of another.
-        if obj1 in obj2.connectedPorts or obj2 in obj1.connectedPorts:
+        # The ports must belong to nodes of the same graph.
+        if obj1.graph is None or obj1.graph is not obj2.graph:
             return False
 
-        return True
+        # The remaining rules (distinct nodes, opposite directions, no 
+        # duplicates and no cyclic loops) are enforced by the graph.
+        return obj1.graph.canConnect(obj1.portId, obj2.portId)
 
     def canConnectTo(self, obj):
         """
@@ -495,8 +691,11 @@ class NodeConnection(QGraphicsPathItem):
                 else:
                     self.destination, self.source = obj1, obj2
 
-                self.source.connectTo(self.destination, self)
                 self.destination.removeConnections()
+                self.edgeId = self.source.graph.connect(self.source.portId, 
+                                                        self.destination.portId)
+                self.source.graph.edge(self.edgeId).data = self
+                self.source.connectTo(self.destination, self)
                 self.destination.connectTo(self.source, self)
 
                 self.active = True
@@ -506,6 +705,17 @@ class NodeConnection(QGraphicsPathItem):
 
         return success
 
+    def attach(self, source, destination, edgeId):
+        """
+        Displays an edge that already exists in the graph.
+        """
+        self.source, self.destination = source, destination
+        self.edgeId = edgeId
+        self.source.graph.edge(edgeId).data = self
+        self.source.connectTo(self.destination, self)
+        self.destination.connectTo(self.source, self)
+        self.active = True
+
     def disconnect(self):
         """
         Disconnect the connection.
@@ -514,6 +724,8 @@ class NodeConnection(QGraphicsPathItem):
         permanent modification or deletion.
         """
         if self.active:
+            self.source.graph.disconnect(self.edgeId)
+            self.edgeId = None
             self.source.removeConnection(self)
             self.destination.removeConnection(self)
 
@@ -534,12 +746,13 @@ class NodePort(QGraphicsWidget):
     INPUT  = "input"
     OUTPUT = "output"
     
+    kind = None
+    
     def __init__(self, direction=INPUT, label=None):
         super(NodePort, self).__init__()
         
-        self.textColor = QColor(30, 30, 30)
-        self.font = QFont()
-        self.font.setPointSize(10)
+        self.graph  = None
+        self.portId = None
         
         self.connections = {}
         self.pendingConnection = None
@@ -548,7 +761,6 @@ class NodePort(QGraphicsWidget):
         self.socket = NodePortSocket()
         self.socket.setParentItem(self)
         
-        self.setColor("#eee")
         self.setMinimumSize(QSizeF(-1, 30))
         self.setPreferredSize(QSizeF(-1, 30))
         
@@ -561,6 +773,9 @@ class NodePort(QGraphicsWidget):
             self.socket.setPos(0, 15)
         else:
             self.socket.setPos(self.size().width(), 15)
+        index = socketIndex(self)
+        if index is not None:
+            index.invalidate([self])
             
     def getSocketPosition(self):
         return self.socket.scenePos() + self.socket.boundingRect().center()
@@ -578,31 +793,43 @@ class NodePort(QGraphicsWidget):
             self.scene().addItem(self.pendingConnection)
             self.pendingConnection.anchorTo(self)
     
+    def socketAt(self, position):
+        """
+        Returns the port the pending connection can snap to at a scene 
+        position, or None. Scenes with a SocketIndex answer with the nearest
+        compatible socket within their snap radius; others with the socket 
+        under the position.
+        """
+        scene  = self.scene()
+        accept = self.pendingConnection.canConnectTo
+        index  = socketIndex(self)
+        if index is not None:
+            return index.nearest(position, scene.snapRadius, accept)
+        
+        item = scene.itemAt(position)
+        if isinstance(item, NodePortSocket) and accept(item.parentItem()):
+            return item.parentItem()
+        return None
+    
     def socketMouseMoveEvent(self, event):
         if self.pendingConnection:
             position = event.scenePos()
             # The pending connection is being dragged.
-            item = self.scene().itemAt(position)
+            port = self.socketAt(position)
             
             pendingEnd = self.pendingConnection.pendingEnd
-            if isinstance(pendingEnd, NodePort):
-                pendingEnd = pendingEnd.socket
-                
-            if pendingEnd is not item:
-                # The pending connection is being dragged over a new object.
-                
+            if port is None or port is not pendingEnd:
                 # Unhighlight any previously pending port sockets.
-                pendingEnd = self.pendingConnection.pendingEnd
-                if isinstance(pendingEnd, NodePort):
+                if isinstance(pendingEnd, NodePort) and port is not pendingEnd:
                     pendingEnd.socket.highlight(False)
                     pendingEnd.fadeConnections(False)
 
-                if isinstance(item, NodePortSocket) and self.pendingConnection.canConnectTo(item.parentItem()):
-                    # The pending connection is being dragged over a valid port.
+                if port is not None:
+                    # The pending connection snaps to a valid port.
                     # Highlight the port.
-                    item.highlight(True)
-                    item.parentItem().fadeConnections(True)
-                    self.pendingConnection.dragTo(item.parentItem())
+                    port.socket.highlight(True)
+                    port.fadeConnections(True)
+                    self.pendingConnection.dragTo(port)
                 else:
                     # Drag the pending connection to the current mouse position.
                     self.pendingConnection.dragTo(position)
@@ -646,26 +873,36 @@ class NodePort(QGraphicsWidget):
         self.connections.pop(connection)
         
     def removeConnections(self):
-        connections = []
-        for connection, port in self.connections.iteritems():
-            connections.append(connection)
-            port.removeConnection(connection)
+        for connection in self.connections.keys():
+            connection.disconnect()
             connection.delete()
-        [self.removeConnection(connection) for connection in connections]
-        self.connections.clear()
     
     def hasConnections(self):
         return len(self.connections) is not 0
     
     def updateConnections(self):
-        for connection in self.connections.keys():
-            connection.updatePath()
+        """
+        Marks the paths of the port's connections as out of date. In a 
+        NodeViewScene they are recomputed once before the next frame, 
+        however many times they are marked; elsewhere right away.
+        """
+        if not self.connections:
+            return
+        markDirty = getattr(self.scene(), "markConnectionsDirty", None)
+        if markDirty is not None:
+            markDirty(self.connections)
+        else:
+            for connection in self.connections.keys():
+                connection.updatePath()
     
     def setColor(self, color):
         self.socket.setColor(color)
         
     def paint(self, painter, option, widget):
-        painter.setPen(self.textColor)
+        if levelOfDetail(painter) < LOD_TEXT:
+            return
+        
+        painter.setPen(defaultStyle().pen("port.text"))
         textRect = self.boundingRect()
         n = 30
         textRect.setWidth(textRect.width() - n)
@@ -679,7 +916,7 @@ class NodePort(QGraphicsWidget):
         painter.drawText(textRect, alignment, self.label)
         
     def remove(self):
-        pass
+        self.removeConnections()
 
 class NodePortSocket(QGraphicsItem):
     def __init__(self):
@@ -688,33 +925,40 @@ class NodePortSocket(QGraphicsItem):
         self.setAcceptHoverEvents(True)
         self.radius = 6
         self.padding = 20
-        self.pen = QPen(QColor(30, 30, 30, 255*.25))
         self.highlighted = False
-        self.pen.setWidth(1)
-        self.setColor("#eee")
+        self.color = None
         
         diameter = self.radius * 2
         self.rect = QRectF(-self.radius, -self.radius, diameter, diameter)
         
     def setColor(self, color):
-        self.color  = QColor(color)
-        darkerColor = self.color.darker(110)
-        gradient = QRadialGradient(self.boundingRect().center(), 6)
-        gradient.setColorAt(0, self.color)
-        gradient.setColorAt(1, darkerColor)
-        self.brush = QBrush(gradient)
-        
-        self.highlightBrush = QBrush(self.color.lighter(110))
+        """
+        Overrides the color the style gives sockets of the port's kind, or 
+        restores it when color is None.
+        """
+        self.color = QColor(color) if color is not None else None
+        self.update()
+    
+    def socketColor(self, style):
+        if self.color is not None:
+            return self.color
+        kind = getattr(self.parentItem(), "kind", None)
+        return style.color("socket.%s" % kind if kind else "socket")
         
     def boundingRect(self):        
         return QRectF(-15, -15, 30, 30)
     
     def paint(self, painter, option, widget):
-        painter.setPen(self.pen)
+        lod = levelOfDetail(painter)
+        if lod < LOD_DETAIL:
+            return
         
-        painter.setBrush(self.brush)
-        if self.highlighted:
-            painter.setBrush(self.highlightBrush)
+        style = defaultStyle()
+        color = self.socketColor(style)
+        painter.setPen(style.pen("socket.border"))
+        # The gradient is not worth it below LOD_TEXT.
+        painter.setBrush(style.socketBrush(color, self.highlighted, 
+                                           lod < LOD_TEXT))
 
         painter.drawEllipse(self.rect)
     
@@ -738,19 +982,45 @@ class NodePortSocket(QGraphicsItem):
         self.parentItem().socketMouseReleaseEvent(event)
         
 class ColorNodePort(NodePort):
+    
+    kind = "color"
+    
     def __init__(self, *args, **kwargs):
         super(ColorNodePort, self).__init__(*args, **kwargs)
         self.label = self.label or "Color"
-        self.setColor("#ccc")
 
 class ValueNodePort(NodePort):
+    
+    kind = "value"
+    
     def __init__(self, *args, **kwargs):
         super(ValueNodePort, self).__init__(*args, **kwargs)
         self.label = self.label or "Value"
-        self.setColor("#356")
 
 class PixmapNodePort(NodePort):
+    
+    kind = "pixmap"
+    
     def __init__(self, *args, **kwargs):
         super(PixmapNodePort, self).__init__(*args, **kwargs)
         self.label = self.label or "Image"
-        self.setColor("#ff4")
+
+def nodeClass(typeName):
+    """
+    Returns the Node subclass displaying nodes of a type, or Node itself if 
+    none of the imported node types does.
+    """
+    pending = [Node]
+    while pending:
+        cls = pending.pop()
+        if (cls.operator or cls).__name__ == typeName:
+            return cls
+        pending.extend(cls.__subclasses__())
+    return Node
+
+portClasses = {
+    None    : NodePort,
+    "color" : ColorNodePort,
+    "value" : ValueNodePort,
+    "pixmap": PixmapNodePort,
+}
@@ -1,5 +1,6 @@
 import sys
-from PyQt4.QtGui import QGraphicsView, QApplication, QPainter
+from PyQt4.QtGui import QGraphicsView, QApplication, QPainter, QLabel
+from PyQt4.QtCore import QTimer
 
 from nodeviewscene import NodeViewScene
 
@@ -45,4 +46,95 @@ class NodeView(QGraphicsView):
         
         # self.setDragMode(QGraphicsView.ScrollHandDrag)
         self.setRenderHint(QPainter.Antialiasing)
-        self.setScene(NodeViewScene())
\ No newline at end of file
+        self.setScene(NodeViewScene())
+        
+        # Cache Usage Report
+        self.cacheLabel = QLabel(self)
+        self.cacheLabel.setStyleSheet("color: rgba(30, 30, 30, 200);")
+        self.cacheLabel.hide()
+        self.cacheTimer = QTimer(self)
+        self.cacheTimer.setInterval(500)
+        self.cacheTimer.timeout.connect(self.updateCacheUsage)
+        
+    def load(self, path, lazy=True):
+        """
+        Reads a graph file into the view's scene. When lazy, widgets are only
+        created for the nodes in view, and for the others as they scroll 
+        into it.
+        """
+        viewport = None
+        if lazy:
+            viewport = self.visibleSceneRect()
+        self.scene().load(path, viewport)
+    
+    def visibleSceneRect(self):
+        """
+        Returns the part of the scene in view, grown by a margin so that 
+        nodes positioned just outside of it, but reaching into it, count.
+        """
+        rect = self.mapToScene(self.viewport().rect()).boundingRect()
+        return rect.adjusted(-300, -300, 0, 0)
+    
+    def paintEvent(self, event):
+        # Connection paths marked dirty since the last frame are brought up 
+        # to date before anything is drawn.
+        self.scene().flushConnections()
+        super(NodeView, self).paintEvent(event)
+    
+    def visibleRectChanged(self):
+        """
+        Called whenever a different part of the scene comes into view, by
+        scrolling, zooming or resizing. Creates the widgets of lazily loaded
+        nodes that are now in view.
+        """
+        if self.scene().lazyNodes:
+            self.scene().materialize(self.visibleSceneRect())
+    
+    def scrollContentsBy(self, dx, dy):
+        super(NodeView, self).scrollContentsBy(dx, dy)
+        self.visibleRectChanged()
+    
+    def resizeEvent(self, event):
+        super(NodeView, self).resizeEvent(event)
+        self.visibleRectChanged()
+    
+    def scale(self, sx, sy):
+        super(NodeView, self).scale(sx, sy)
+        self.visibleRectChanged()
+    
+    def setTransform(self, transform, combine=False):
+        super(NodeView, self).setTransform(transform, combine)
+        self.visibleRectChanged()
+    
+    def setCacheUsageVisible(self, visible):
+        """
+        Shows or hides the evaluation cache usage in the corner of the view.
+        """
+        self.cacheLabel.setVisible(visible)
+        if visible:
+            self.updateCacheUsage()
+            self.cacheTimer.start()
+        else:
+            self.cacheTimer.stop()
+    
+    def setProfileOverlayVisible(self, visible):
+        """
+        Shows or hides the time each node takes to evaluate, as a heat 
+        colored border and as text in its title bar.
+        """
+        self.scene().setProfiling(visible)
+    
+    def updateCacheUsage(self):
+        statistics = self.scene().cache.statistics()
+        megabyte   = 1024.0 * 1024.0
+        self.cacheLabel.setText(
+            "Cache: %.1f / %.0f MB, %d entries, %.0f%% hits, %d evictions" % (
+            statistics["size"] / megabyte, statistics["budget"] / megabyte,
+            statistics["entries"], statistics["hitRate"] * 100, 
+            statistics["evictions"]))
+        self.cacheLabel.adjustSize()
+        self.cacheLabel.move(10, self.height() - self.cacheLabel.height() - 10)
+    
+    def closeEvent(self, event):
+        self.scene().shutdown()
+        super(NodeView, self).closeEvent(event)
@@ -1,10 +1,256 @@
 from PyQt4.QtGui import QGraphicsScene, QColor, QBrush
+from PyQt4.QtCore import QTimer
 from PyQt4 import QtCore
+from giza.graph import Graph, serialize
+from giza.engine import (Evaluator, ResultCache, ProgressiveEvaluation, 
+                         Profiler)
+from evaluation import AsyncEvaluation
+from node import Node, NodeConnection, nodeClass
+from style import defaultStyle
+from socketindex import SocketIndex
 
 class NodeViewScene(QGraphicsScene):
-    def __init__(self):
+    def __init__(self, graph=None, diskCache=None):
         super(NodeViewScene, self).__init__()
         
+        # Evaluation cache, shared by the evaluators of successive graphs
+        self.cache = ResultCache()
+
+        self.previewPorts = []
+        self.previews     = {}
+
+        # Connections whose paths are out of date, recomputed once per frame
+        # rather than every time one of their nodes moves.
+        self.dirtyConnections = set()
+        self.connectionTimer  = QTimer(self)
+        self.connectionTimer.setSingleShot(True)
+        self.connectionTimer.setInterval(0)
+        self.connectionTimer.timeout.connect(self.flushConnections)
+
+        # Socket positions, for hit tests and snapping while a connection is
+        # dragged. Sockets within snapRadius of the cursor attract it.
+        self.socketIndex = SocketIndex()
+        self.snapRadius  = 20
+
+        # Set while the profile overlay is shown.
+        self.profiler = None
+
+        # Nodes of a loaded graph that have no widget yet.
+        self.lazyNodes = set()
+
+        # Nodegraph Definitions
+        self.bindGraph(graph or Graph(), diskCache)
+        
+        # Theme changes repaint the whole scene.
+        defaultStyle().addListener(self.styleChanged)
+        
         backgroundBrush = QBrush(QColor(0, 0, 0, 20))
         backgroundBrush.setStyle(QtCore.Qt.CrossPattern)
-        self.setBackgroundBrush(backgroundBrush)
\ No newline at end of file
+        self.setBackgroundBrush(backgroundBrush)
+
+    def bindGraph(self, graph, diskCache=None):
+        """
+        Makes graph the scene's graph, with an evaluator of its own.
+        """
+        self.graph     = graph
+        self.evaluator = Evaluator(graph, self.cache, diskCache)
+        self.evaluator.profiler = self.profiler
+
+        # Previews are evaluated at a proxy resolution while an interaction,
+        # such as dragging a dial, is in progress.
+        self.progressive = ProgressiveEvaluation(self.evaluator)
+        self.progressive.fullResolutionRequested = self.scheduleEvaluation
+
+        # Evaluation runs on a background thread.
+        self.evaluation = AsyncEvaluation(self.evaluator, self)
+        self.evaluation.resultsReady.connect(self.previewsReady)
+
+    def setGraph(self, graph):
+        """
+        Replaces the scene's graph. The items showing the previous graph are
+        removed along with its previews and cached results.
+        """
+        diskCache = self.evaluator.diskCache
+        # Results of the previous graph must not reach the new one.
+        self.evaluation.resultsReady.disconnect(self.previewsReady)
+        self.evaluation.shutdown()
+        self.evaluation.deleteLater()
+        self.evaluator.close()
+        self.clear()
+        self.cache.clear()
+        self.previewPorts     = []
+        self.previews         = {}
+        self.dirtyConnections = set()
+        self.socketIndex      = SocketIndex()
+        self.lazyNodes        = set()
+        if self.profiler is not None:
+            self.profiler.reset()
+        self.bindGraph(graph, diskCache)
+
+    def removeItem(self, item):
+        """
+        Removes an item. Nodes take their record out of the scene's graph, 
+        along with their connections, and keep it in a graph of their own 
+        in case they are added to a scene again.
+        """
+        if isinstance(item, Node) and item.graph is self.graph:
+            item.moveToGraph(Graph())
+        super(NodeViewScene, self).removeItem(item)
+
+    def addPreview(self, portId):
+        """
+        Keeps the value of an output port up to date in ``previews``.
+        """
+        if portId not in self.previewPorts:
+            self.previewPorts.append(portId)
+            self.scheduleEvaluation()
+
+    def removePreview(self, portId):
+        if portId in self.previewPorts:
+            self.previewPorts.remove(portId)
+            self.previews.pop(portId, None)
+
+    def beginInteraction(self):
+        self.progressive.beginInteraction()
+
+    def endInteraction(self):
+        """
+        Ends an interaction. A full resolution pass is scheduled once the
+        last one ends.
+        """
+        self.progressive.endInteraction()
+
+    def scheduleEvaluation(self):
+        self.evaluatePreviews()
+
+    def evaluatePreviews(self):
+        """
+        Requests the preview ports on the background thread. Repeated
+        requests before it gets to them are coalesced.
+        """
+        self.evaluation.request(self.previewPorts)
+
+    def previewsReady(self, values):
+        self.previews.update(values)
+        if self.profiler is not None:
+            self.updateProfiles()
+        self.update()
+
+    def setProfiling(self, enabled):
+        """
+        Starts or stops profiling the evaluations of the scene's graph and 
+        showing the results on the nodes.
+        """
+        if enabled and self.profiler is None:
+            self.profiler = Profiler()
+            self.evaluator.profiler = self.profiler
+            self.updateProfiles()
+        elif not enabled and self.profiler is not None:
+            self.evaluator.profiler = None
+            self.profiler = None
+            self.updateProfiles()
+
+    def updateProfiles(self):
+        """
+        Shows the latest profiles on the node widgets.
+        """
+        profiles = self.profiler.profiles() if self.profiler else {}
+        heat     = self.profiler.heat(profiles) if self.profiler else {}
+        for nodeId in self.graph.nodeIds():
+            node = self.graph.node(nodeId).data
+            if node is not None:
+                node.setProfile(profiles.get(nodeId), heat.get(nodeId, 0.0))
+
+    def styleChanged(self):
+        self.update()
+
+    def markConnectionsDirty(self, connections):
+        """
+        Schedules the paths of the connections to be recomputed.
+        """
+        self.dirtyConnections.update(connections)
+        if not self.connectionTimer.isActive():
+            self.connectionTimer.start()
+
+    def flushConnections(self):
+        """
+        Recomputes the paths of the dirty connections. Runs before views 
+        paint, so each path is recomputed at most once per frame.
+        """
+        if not self.dirtyConnections:
+            return
+        self.connectionTimer.stop()
+        connections, self.dirtyConnections = self.dirtyConnections, set()
+        for connection in connections:
+            # Connections removed from the scene meanwhile are skipped.
+            if connection.scene() is self:
+                connection.updatePath()
+
+    def save(self, path):
+        """
+        Writes the scene's graph to a file (see :mod:`giza.graph.serialize`).
+        """
+        serialize.save(self.graph, path)
+
+    def load(self, path, viewport=None):
+        """
+        Reads a graph file into a new graph, which replaces the scene's graph 
+        (see :meth:`setGraph`).
+
+        Given a viewport rectangle, only the nodes inside of it are given 
+        widgets right away; the others are created by :meth:`materialize` 
+        once they come into view.
+        """
+        self.setGraph(serialize.load(path))
+        self.lazyNodes = set(self.graph.nodeIds())
+        if viewport is None:
+            self.materialize()
+        else:
+            self.materialize(viewport)
+
+    def materialize(self, rect=None):
+        """
+        Creates the widgets of the loaded nodes positioned within rect, or 
+        of all of them, and of the connections between nodes with widgets.
+        """
+        graph = self.graph
+        if rect is None:
+            nodeIds = self.lazyNodes
+        else:
+            left, top     = rect.left(), rect.top()
+            right, bottom = rect.right(), rect.bottom()
+            nodeIds = []
+            for nodeId in self.lazyNodes:
+                record = graph.node(nodeId)
+                if left <= record.x <= right and top <= record.y <= bottom:
+                    nodeIds.append(nodeId)
+        if not nodeIds:
+            return
+        nodeIds = list(nodeIds)
+        self.lazyNodes.difference_update(nodeIds)
+
+        for nodeId in nodeIds:
+            if graph.hasNode(nodeId) and graph.node(nodeId).data is None:
+                self.addItem(nodeClass(graph.nodeType(nodeId))(graph, nodeId))
+
+        for nodeId in nodeIds:
+            if not graph.hasNode(nodeId):
+                continue
+            for portId in graph.nodePorts(nodeId):
+                for edgeId in graph.portEdges(portId):
+                    edge = graph.edge(edgeId)
+                    if edge.data is not None:
+                        continue
+                    source      = graph.port(edge.source).data
+                    destination = graph.port(edge.destination).data
+                    if source is not None and destination is not None:
+                        self.addItem(NodeConnection(source, destination, 
+                                                    edgeId))
+
+    def shutdown(self):
+        """
+        Stops the background evaluation thread and stops following theme 
+        changes.
+        """
+        self.evaluation.shutdown()
+        defaultStyle().removeListener(self.styleChanged)
\ No newline at end of file
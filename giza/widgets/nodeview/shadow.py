@@ -0,0 +1,76 @@
+from PyQt4.QtGui import QImage, QPixmap, QColor, qRgba
+from PyQt4.QtCore import QRectF, QPointF
+import math
+
+# Nine-patch shadow pixmaps, keyed by blur radius, corner radius and color.
+_pixmaps = {}
+
+def shadowPixmap(radius, cornerRadius, color):
+    """
+    Returns the nine-patch pixmap of the shadow of a rounded rectangle, and 
+    the size of its corner patches.
+    
+    The pixmap holds the four corners, one pixel wide edges and a one pixel
+    center, which are stretched to shadow a rectangle of any size. Radii 
+    are rounded to whole pixels, so that nodes of every size and their 
+    variants share a handful of pixmaps.
+    """
+    radius       = max(1, int(round(radius)))
+    cornerRadius = max(0, int(round(cornerRadius)))
+    key = (radius, cornerRadius, color.rgba())
+    if key in _pixmaps:
+        return _pixmaps[key]
+    
+    # Corner patches reach radius out of the rectangle and far enough into 
+    # it to hold both the rounded corner and the inner half of the blur.
+    inner  = max(radius, cornerRadius)
+    corner = radius + inner
+    size   = 2 * corner + 1
+    half   = inner + 0.5
+    center = size / 2.0
+    
+    # An edge blurred with a Gaussian fading out over radius.
+    sigma = radius / 3.0
+    image = QImage(size, size, QImage.Format_ARGB32_Premultiplied)
+    for y in range(size):
+        qy = abs(y + 0.5 - center) - (half - cornerRadius)
+        for x in range(size):
+            qx = abs(x + 0.5 - center) - (half - cornerRadius)
+            # Signed distance to the rounded rectangle
+            distance = math.hypot(max(qx, 0), max(qy, 0)) + \
+                       min(max(qx, qy), 0) - cornerRadius
+            alpha = color.alphaF() * 0.5 * math.erfc(
+                distance / (sigma * math.sqrt(2)))
+            image.setPixel(x, y, qRgba(
+                int(color.red()   * alpha), int(color.green() * alpha), 
+                int(color.blue()  * alpha), int(255 * alpha)))
+    
+    _pixmaps[key] = (QPixmap.fromImage(image), corner)
+    return _pixmaps[key]
+
+def drawShadow(painter, rect, color, radius, cornerRadius=0, 
+               offset=QPointF(0, 0)):
+    """
+    Draws the blurred shadow of a rounded rectangle from a cached nine-patch
+    pixmap, instead of blurring the item offscreen on every paint.
+    """
+    pixmap, corner = shadowPixmap(radius, cornerRadius, color)
+    margin = max(1, int(round(radius)))
+    outer  = QRectF(rect).translated(offset)
+    outer.adjust(-margin, -margin, margin, margin)
+    
+    # Rectangles smaller than two corners squeeze the corners.
+    cx = min(float(corner), outer.width()  / 2.0)
+    cy = min(float(corner), outer.height() / 2.0)
+    xs = [(outer.left(), cx, 0, corner), 
+          (outer.left() + cx, outer.width() - 2 * cx, corner, 1),
+          (outer.right() - cx, cx, corner + 1, corner)]
+    ys = [(outer.top(), cy, 0, corner), 
+          (outer.top() + cy, outer.height() - 2 * cy, corner, 1),
+          (outer.bottom() - cy, cy, corner + 1, corner)]
+    for y, height, sourceY, sourceHeight in ys:
+        for x, width, sourceX, sourceWidth in xs:
+            if width > 0 and height > 0:
+                painter.drawPixmap(QRectF(x, y, width, height), pixmap, 
+                                   QRectF(sourceX, sourceY, 
+                                          sourceWidth, sourceHeight))
@@ -0,0 +1,89 @@
+import math
+
+class SocketIndex(object):
+    """
+    SocketIndex
+    
+    A uniform grid of the scene positions of port sockets, answering 
+    nearest socket queries without going through the scene's items. 
+    
+    Moved ports are only marked with :meth:`invalidate`; their positions are
+    read again the next time the index is queried, so dragging nodes costs 
+    nothing until a connection is being dragged.
+    """
+    
+    def __init__(self, cellSize=64):
+        self.cellSize  = float(cellSize)
+        self.cells     = {}
+        self.positions = {}
+        self.dirty     = set()
+    
+    def __len__(self):
+        self.refresh()
+        return len(self.positions)
+    
+    def cell(self, x, y):
+        return (int(math.floor(x / self.cellSize)), 
+                int(math.floor(y / self.cellSize)))
+    
+    def invalidate(self, ports):
+        """
+        Marks ports as added or moved.
+        """
+        self.dirty.update(ports)
+    
+    def remove(self, port):
+        self.dirty.discard(port)
+        entry = self.positions.pop(port, None)
+        if entry is not None:
+            ports = self.cells[entry[2]]
+            ports.discard(port)
+            if not ports:
+                del self.cells[entry[2]]
+    
+    def refresh(self):
+        """
+        Reads the positions of the ports marked since the last query.
+        """
+        if not self.dirty:
+            return
+        ports, self.dirty = self.dirty, set()
+        for port in ports:
+            if port.scene() is None:
+                self.remove(port)
+                continue
+            position = port.getSocketPosition()
+            x, y = position.x(), position.y()
+            cell  = self.cell(x, y)
+            entry = self.positions.get(port)
+            if entry is not None and entry[2] != cell:
+                self.remove(port)
+                entry = None
+            self.positions[port] = (x, y, cell)
+            if entry is None:
+                self.cells.setdefault(cell, set()).add(port)
+    
+    def nearest(self, position, radius, accept=None):
+        """
+        Returns the port with the socket closest to a scene position, within 
+        radius, for which accept(port) is true, or None.
+        """
+        self.refresh()
+        x, y = position.x(), position.y()
+        left, top     = self.cell(x - radius, y - radius)
+        right, bottom = self.cell(x + radius, y + radius)
+        
+        candidates = []
+        for cx in range(left, right + 1):
+            for cy in range(top, bottom + 1):
+                for port in self.cells.get((cx, cy), ()):
+                    px, py, cell = self.positions[port]
+                    distance = (px - x) ** 2 + (py - y) ** 2
+                    if distance <= radius * radius:
+                        candidates.append((distance, id(port), port))
+        
+        candidates.sort()
+        for distance, key, port in candidates:
+            if accept is None or accept(port):
+                return port
+        return None
@@ -0,0 +1,155 @@
+import weakref
+
+from PyQt4.QtGui import QColor, QPen, QBrush, QFont, QRadialGradient
+from PyQt4.QtCore import Qt, QPointF
+
+# Colors are given as (red, green, blue, alpha) or as names, and fonts as 
+# point sizes.
+DEFAULT_THEME = {
+    "node.background"      : (120, 120, 120, 230),
+    "node.border"          : ( 15,  15,  15,  64),
+    "node.border.selected" : (255, 191,   0, 102),
+    "node.text"            : ( 30,  30,  30, 255),
+    "node.handle"          : ( 30,  30,  30, 100),
+    "node.shadow"          : (  0,   0,   0, 255),
+    "node.shadow.selected" : (100, 100, 100, 255),
+    "port.text"            : ( 30,  30,  30, 255),
+    "socket"               : "#eee",
+    "socket.color"         : "#ccc",
+    "socket.value"         : "#356",
+    "socket.pixmap"        : "#ff4",
+    "socket.border"        : ( 30,  30,  30,  63),
+    "connection"           : ( 30,  30,  30, 200),
+    "dial.face"            : (120, 120, 120, 255),
+    "dial.border"          : (255, 255, 255,  30),
+    "dial.shadow"          : (  0,   0,   0,  75),
+    "dial.notch"           : (125, 125, 125, 255),
+    "font.title"           : 10,
+}
+
+
+class Style(object):
+    """
+    Style
+    
+    Hands out the colors, pens, brushes, fonts and gradients items paint 
+    with, keyed by role, such as ``"node.border.selected"``. Each resource is
+    created once and shared by every item, so items hold no paint resources
+    of their own; they must not modify the ones they are given, and copy 
+    them to draw variants.
+    
+    Changing the theme with :meth:`setTheme` drops the cached resources and 
+    notifies the listeners, such as scenes, which repaint with the new ones.
+    Listeners that are bound methods are held through a weak reference to 
+    their object, so that listening does not keep a scene alive.
+    """
+    
+    def __init__(self, theme=None):
+        self.theme     = dict(DEFAULT_THEME)
+        self.theme.update(theme or {})
+        self.resources = {}
+        self.listeners = []
+    
+    def addListener(self, listener):
+        self.listeners.append(self._entry(listener))
+    
+    def removeListener(self, listener):
+        entry = self._entry(listener)
+        if entry in self.listeners:
+            self.listeners.remove(entry)
+    
+    def _entry(self, listener):
+        owner    = getattr(listener, "__self__", None)
+        function = getattr(listener, "__func__", None)
+        if owner is None or function is None:
+            return (None, listener)
+        return (weakref.ref(owner), function)
+    
+    def _liveListeners(self):
+        """
+        Returns the listeners, rebinding methods to their objects, and 
+        forgets those whose object is gone.
+        """
+        listeners = []
+        for entry in list(self.listeners):
+            owner, function = entry
+            if owner is None:
+                listeners.append(function)
+                continue
+            target = owner()
+            if target is None:
+                self.listeners.remove(entry)
+            else:
+                listeners.append(function.__get__(target, type(target)))
+        return listeners
+    
+    def setTheme(self, theme):
+        """
+        Changes the values of some roles.
+        """
+        self.theme.update(theme)
+        self.resources.clear()
+        for listener in self._liveListeners():
+            listener()
+    
+    def resource(self, key, create):
+        """
+        Returns the resource cached under key, created by calling create the
+        first time it is asked for.
+        """
+        resource = self.resources.get(key)
+        if resource is None:
+            resource = self.resources[key] = create()
+        return resource
+    
+    def color(self, role):
+        def create():
+            value = self.theme[role]
+            if isinstance(value, tuple):
+                return QColor(*value)
+            return QColor(value)
+        return self.resource(("color", role), create)
+    
+    def pen(self, role, width=1):
+        return self.resource(("pen", role, width), 
+                             lambda: QPen(self.color(role), width))
+    
+    def brush(self, role):
+        return self.resource(("brush", role), 
+                             lambda: QBrush(self.color(role)))
+    
+    def font(self, role):
+        def create():
+            font = QFont()
+            font.setPointSize(self.theme[role])
+            return font
+        return self.resource(("font", role), create)
+    
+    def socketBrush(self, color, highlighted=False, flat=False):
+        """
+        Returns the brush of a port socket of a color: a radial gradient, a 
+        lighter flat color when highlighted, or a flat color.
+        """
+        def create():
+            if highlighted:
+                return QBrush(color.lighter(110))
+            if flat:
+                return QBrush(color)
+            gradient = QRadialGradient(QPointF(0, 0), 6)
+            gradient.setColorAt(0, color)
+            gradient.setColorAt(1, color.darker(110))
+            return QBrush(gradient)
+        return self.resource(("socket", color.rgba(), highlighted, flat), 
+                             create)
+
+
+_defaultStyle = None
+
+def defaultStyle():
+    """
+    Returns the style shared by the node view widgets.
+    """
+    global _defaultStyle
+    if _defaultStyle is None:
+        _defaultStyle = Style()
+    return _defaultStyle
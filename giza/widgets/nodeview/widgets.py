@@ -1,13 +1,18 @@
-from PyQt4.QtGui import (QGraphicsItem, QGraphicsEllipseItem, QColor, QPen, QBrush, 
-                         QGraphicsDropShadowEffect, QFont, QRadialGradient,
-                         QPainterPath)
+from PyQt4.QtGui import (QGraphicsItem, QGraphicsEllipseItem, QBrush, 
+                         QRadialGradient, QPainterPath)
 from PyQt4.QtCore import (QRectF, Qt, QPointF, QPropertyAnimation, QEasingCurve,
                           QObject, pyqtProperty)
+from shadow import drawShadow
+from style import defaultStyle
 import math
 
 class Dial(QGraphicsItem):
     """
     Dial
+
+    A dial can be bound to a node parameter with :meth:`bindParameter`.
+    While it is dragged the scene previews the graph at a proxy resolution,
+    and a full resolution pass follows the release.
     """
     
     def __init__(self):
@@ -15,43 +20,23 @@ class Dial(QGraphicsItem):
         
         self.angle = 0
 
-        # Colors
-        self.color               = QColor(120, 120, 120, 255)
-        self.notchColor          = QColor(115, 115, 115, 255)
-        self.normalBorderColor   = QColor(  255,  255,  255, 30  )
-        self.selectedBorderColor = QColor( 255, 191,   0, 102 )
-        self.textColor           = QColor(  30,  30,  30, 255 )
-        self.shadowColor         = QColor(0, 0, 0, 75)
-        self.selectedShadowColor = QColor( 100, 100, 100, 255 )
-
         # Settings
         self.width, self.height = 75, 75
         
-        # Drop Shadow
+        # Drop Shadow, drawn from a cached pixmap (see shadow.py)
         self.shadowBlurRadius = 8
-        self.shadow = QGraphicsDropShadowEffect()
-        self.shadow.setBlurRadius(self.shadowBlurRadius)
-        self.shadow.setOffset(0, 0.5)
-        self.shadow.setColor(self.shadowColor)
-        self.setGraphicsEffect(self.shadow)
-        
-        # Painter Definitions
-        self.pen = QPen()
-        gradient = QRadialGradient(self.boundingRect().center() + QPointF(0, -20), 80)
-        gradient.setColorAt(0, self.color.lighter(117))
-        gradient.setColorAt(1, self.color)
-        self.brush = QBrush(gradient)
-        self.font  = QFont()
-        self.pen.setWidth(1)
-        self.pen.setColor(self.normalBorderColor)
-        self.brush.setColor(self.color)
-        self.font.setPointSize(10)
+        self.shadowOffset     = QPointF(0, 0.5)
         
         # Nodegraph Definitions
         self.dragPoint  = None
         self.dragAngle  = 0
         self.dragFactor = 0
 
+        # Parameter Binding
+        self.node           = None
+        self.parameterName  = None
+        self.parameterScale = 1.0
+
         # Notch Specifications
         self.notch = DialNotch()
         self.notch.setParentItem(self)
@@ -62,6 +47,14 @@ class Dial(QGraphicsItem):
         Overrides QGraphicsItem's boundingRect() virtual public function and 
         returns a valid bounding rect based on calculated width and height.
         """
+        return self.bodyRect().adjusted(
+            -self.shadowBlurRadius, -self.shadowBlurRadius, 
+             self.shadowBlurRadius,  self.shadowBlurRadius + 1)
+
+    def bodyRect(self):
+        """
+        Returns the rect of the dial's face.
+        """
         return QRectF(0, 0, self.width, self.height).adjusted(
             -self.shadowBlurRadius, -self.shadowBlurRadius, 
              self.shadowBlurRadius,  self.shadowBlurRadius)
@@ -70,11 +63,61 @@ class Dial(QGraphicsItem):
         """
         Overrides QGraphicsItem's paint() virtual public function.
         """
-        painter.setPen(self.pen)
-        painter.setBrush(self.brush)
-        painter.drawEllipse(self.boundingRect())
+        style = defaultStyle()
+        rect  = self.bodyRect()
+        drawShadow(painter, rect, style.color("dial.shadow"), 
+                   self.shadowBlurRadius, rect.width() / 2.0, self.shadowOffset)
+        painter.setPen(style.pen("dial.border"))
+        painter.setBrush(style.resource(
+            ("dial.face", rect.width(), rect.height()), 
+            lambda: self.faceBrush(style, rect)))
+        painter.drawEllipse(rect)
+
+    def faceBrush(self, style, rect):
+        """
+        Returns the gradient of a dial face, shared by the dials of a size.
+        """
+        color    = style.color("dial.face")
+        gradient = QRadialGradient(rect.center() + QPointF(0, -20), 80)
+        gradient.setColorAt(0, color.lighter(117))
+        gradient.setColorAt(1, color)
+        return QBrush(gradient)
+
+    def bindParameter(self, node, name, scale=1.0):
+        """
+        Binds the dial to a node parameter, set to the angle in degrees times
+        scale.
+        """
+        self.node           = node
+        self.parameterName  = name
+        self.parameterScale = scale
+
+    def value(self):
+        return self.angle * self.parameterScale
+
+    def valueChanged(self):
+        if self.node is None:
+            return
+        value = self.value()
+        if isinstance(self.node.parameter(self.parameterName), int):
+            value = int(round(value))
+        self.node.setParameter(self.parameterName, value)
+        scene = self.scene()
+        if scene is not None and hasattr(scene, "evaluatePreviews"):
+            scene.evaluatePreviews()
+
+    def beginInteraction(self):
+        scene = self.scene()
+        if scene is not None and hasattr(scene, "beginInteraction"):
+            scene.beginInteraction()
+
+    def endInteraction(self):
+        scene = self.scene()
+        if scene is not None and hasattr(scene, "endInteraction"):
+            scene.endInteraction()
 
     def mousePressEvent(self, event):
+        self.beginInteraction()
         self.dragPoint  = event.scenePos()
         self.dragAngle  = self.angle
         part     = self.height / 2
@@ -89,10 +132,12 @@ class Dial(QGraphicsItem):
         d = scenePos - self.dragPoint
         self.angle = self.dragAngle + d.x() * self.dragFactor
         self.updateNotch()
+        self.valueChanged()
 
     def mouseReleaseEvent(self, event):
         self.dragPoint = None
         self.dragAngle = 0
+        self.endInteraction()
 
     def updateNotch(self):
         f  = 0.02
@@ -110,35 +155,10 @@ class DialNotch(QGraphicsItem):
     def __init__(self):
         super(DialNotch, self).__init__()
         self.setAcceptHoverEvents(True)
-        # Colors
-        self.color      = QColor(125, 125, 125, 255)
-        self.normalBorderColor   = QColor(  255,  255,  255, 30  )
-        self.selectedBorderColor = QColor( 255, 191,   0, 102 )
-        self.textColor           = QColor(  30,  30,  30, 255 )
-        self.shadowColor         = QColor(0, 0, 0, 75)
-        self.selectedShadowColor = QColor( 100, 100, 100, 255 )
-
         # Settings
         self.width, self.height = 12, 12
         self.highlighted = False
 
-        # Painter Definitions
-        self.pen = QPen()
-        self.pen.setWidth(1)
-        self.pen.setColor(self.normalBorderColor)
-
-        gradient = QRadialGradient(self.boundingRect().center() + QPointF(0, 1), self.width / 2.0)
-        gradient.setColorAt(0,   self.color)
-        gradient.setColorAt(0.5, self.color)
-        gradient.setColorAt(1,   self.color.darker(120))
-        self.brush = QBrush(gradient)
-
-        gradient = QRadialGradient(self.boundingRect().center() + QPointF(0, 1), self.width / 2.0)
-        gradient.setColorAt(0,   self.color.lighter(110))
-        gradient.setColorAt(0.5, self.color.lighter(110))
-        gradient.setColorAt(1,   self.color.darker(120).lighter(110))
-        self.highlightBrush = QBrush(gradient)
-
         # Other
         self.tracking = False
         self.angle = None
@@ -154,13 +174,27 @@ class DialNotch(QGraphicsItem):
         """
         Overrides QGraphicsItem's paint() virtual public function.
         """
-        painter.setPen(self.pen)
+        style = defaultStyle()
+        painter.setPen(style.pen("dial.border"))
+        painter.setBrush(style.resource(
+            ("dial.notch", self.width, self.highlighted), 
+            lambda: self.notchBrush(style)))
+        painter.drawEllipse(self.boundingRect())
 
-        painter.setBrush(self.brush)
+    def notchBrush(self, style):
+        """
+        Returns the gradient of the notch, lighter when highlighted.
+        """
+        color = style.color("dial.notch")
+        edge  = color.darker(120)
         if self.highlighted:
-            painter.setBrush(self.highlightBrush)
-
-        painter.drawEllipse(self.boundingRect())
+            color, edge = color.lighter(110), edge.lighter(110)
+        gradient = QRadialGradient(self.boundingRect().center() + QPointF(0, 1), 
+                                   self.width / 2.0)
+        gradient.setColorAt(0,   color)
+        gradient.setColorAt(0.5, color)
+        gradient.setColorAt(1,   edge)
+        return QBrush(gradient)
 
     def highlight(self, value):
         self.highlighted = value
@@ -175,6 +209,7 @@ class DialNotch(QGraphicsItem):
     def mousePressEvent(self, event):
         self.tracking = True
         parent = self.parentItem()
+        parent.beginInteraction()
         parent.dragPoint  = event.pos()
         parent.dragAngle  = parent.angle
 
@@ -189,10 +224,12 @@ class DialNotch(QGraphicsItem):
                 self.angle = a
             parent.angle = parent.dragAngle - a
             parent.updateNotch()
+            parent.valueChanged()
 
     def mouseReleaseEvent(self, event):
         self.tracking = False
         parent = self.parentItem()
         parent.dragPoint = None
         parent.dragAngle = 0
+        parent.endInteraction()
         self.angle = None
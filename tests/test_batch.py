@@ -0,0 +1,80 @@
+import unittest
+
+import numpy
+
+from giza.engine.batch import BatchEvaluator
+from giza.engine.compiler import Compiler, CompileError
+from giza.engine.evaluator import Evaluator
+from giza.graph import Graph, INPUT, OUTPUT
+from giza.operators import getOperator
+
+
+def addOperatorNode(graph, typeName, **parameters):
+    nodeId = graph.addNode(typeName, parameters)
+    for direction, kind, label in getOperator(typeName)().ports():
+        graph.addPort(nodeId, direction, kind, label)
+    return nodeId
+
+
+class ColorSweepTest(unittest.TestCase):
+
+    colors = [(0.5, 0.5, 1.0, 1.0), (0.0, 0.25, 0.5, 1.0),
+              (1.0, 0.0, 0.0, 0.5)]
+
+    def setUp(self):
+        self.graph = graph = Graph()
+        self.color = addOperatorNode(graph, "ColorInput")
+        self.mix   = addOperatorNode(graph, "Mix")
+        graph.connect(graph.findPort(self.color, "Color", OUTPUT),
+                      graph.findPort(self.mix, "A", INPUT))
+        self.output = graph.findPort(self.mix, "Color", OUTPUT)
+
+    def expected(self):
+        values = []
+        for color in self.colors:
+            self.graph.setParameter(self.color, "color", color)
+            evaluator = Evaluator(self.graph)
+            values.append(evaluator.evaluate(self.output))
+            evaluator.close()
+        return values
+
+    def assertColorsEqual(self, actual, expected):
+        self.assertEqual(len(actual), len(expected))
+        for color, other in zip(actual, expected):
+            self.assertEqual(len(color), 4)
+            for channel, value in zip(color, other):
+                self.assertAlmostEqual(float(channel), value)
+
+    def testBatchSweepMatchesEvaluator(self):
+        expected  = self.expected()
+        evaluator = Evaluator(self.graph)
+        values    = BatchEvaluator(evaluator).evaluate(
+            self.output, {(self.color, "color"): self.colors})
+        evaluator.close()
+        self.assertColorsEqual(values, expected)
+
+    def testCompiledSweepMatchesEvaluator(self):
+        expected  = self.expected()
+        evaluator = Evaluator(self.graph)
+        channels  = Compiler(evaluator).evaluate(
+            [self.output],
+            {(self.color, "color"): numpy.asarray(self.colors)})[0]
+        evaluator.close()
+        values = [tuple(channel[index] for channel in channels)
+                  for index in range(len(self.colors))]
+        self.assertColorsEqual(values, expected)
+
+
+    def testCompiledSweepOfFoldedNodeFails(self):
+        # Without the color input, Mix has neither parameters nor connected
+        # inputs and is folded into a constant.
+        inputPort = self.graph.findPort(self.mix, "A", INPUT)
+        self.graph.disconnect(self.graph.portEdges(inputPort)[0])
+        evaluator = Evaluator(self.graph)
+        compiler  = Compiler(evaluator)
+        self.assertRaises(CompileError, compiler.evaluate, [self.output],
+                          {(self.mix, "Factor"): numpy.linspace(0, 1, 3)})
+        evaluator.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from giza.engine.diskcache import DiskCache
+from giza.engine.evaluator import Evaluator
+from giza.graph import Graph, INPUT, OUTPUT
+from giza.graph.serialize import save, load
+from giza.operators import getOperator
+
+
+def addOperatorNode(graph, typeName, **parameters):
+    nodeId = graph.addNode(typeName, parameters)
+    for direction, kind, label in getOperator(typeName)().ports():
+        graph.addPort(nodeId, direction, kind, label)
+    return nodeId
+
+
+class DiskCacheReloadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def buildGraph(self):
+        graph   = Graph()
+        checker = addOperatorNode(graph, "Checker", width=64, height=64,
+                                  size=8, color1=(1.0, 0.0, 0.0, 1.0))
+        blur    = addOperatorNode(graph, "Blur", radius=2)
+        graph.connect(graph.findPort(checker, "Image", OUTPUT),
+                      graph.findPort(blur, "Image", INPUT))
+        return graph, blur
+
+    def evaluate(self, graph, nodeId):
+        diskCache = DiskCache(os.path.join(self.directory, "cache"))
+        evaluator = Evaluator(graph, diskCache=diskCache)
+        image = evaluator.evaluateNode(nodeId)["Image"]
+        evaluator.close()
+        return diskCache, image
+
+    def checkReload(self, name):
+        graph, blur = self.buildGraph()
+        diskCache, image = self.evaluate(graph, blur)
+        self.assertEqual(diskCache.hits, 0)
+
+        path = os.path.join(self.directory, name)
+        save(graph, path)
+        loaded = load(path)
+        blur   = [nodeId for nodeId in loaded.nodeIds()
+                  if loaded.nodeType(nodeId) == "Blur"][0]
+        diskCache, reloaded = self.evaluate(loaded, blur)
+        self.assertGreater(diskCache.hits, 0)
+        self.assertEqual(diskCache.misses, 0)
+        self.assertEqual(reloaded.array.tobytes(), image.array.tobytes())
+
+    def testJSONReloadHitsDiskCache(self):
+        self.checkReload("graph.json")
+
+    def testBinaryReloadHitsDiskCache(self):
+        self.checkReload("graph.giza")
+
+    def testFingerprintIgnoresTextAndSequenceTypes(self):
+        graph, blur = self.buildGraph()
+        evaluator   = Evaluator(graph)
+        checker     = graph.immediateAncestors(blur)[0]
+        parameters  = evaluator.gatherParameters(checker)
+        fingerprint = evaluator.fingerprint(checker, parameters, {})
+
+        parameters["color1"] = list(parameters["color1"])
+        parameters[u"size"]  = parameters.pop("size")
+        self.assertEqual(evaluator.fingerprint(checker, parameters, {}),
+                         fingerprint)
+        evaluator.close()
+
+
+if __name__ == "__main__":
+    unittest.main()